@@ -44,9 +44,146 @@ GRAPHENE = {
     "SCHEMA": "evidenta.schema.schema",
     "MIDDLEWARE": [
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "evidenta.middleware.instrumentation.InstrumentationMiddleware",
+        "evidenta.middleware.idempotency.IdempotencyMiddleware",
     ],
 }
 
+# cache shared by all server processes (Redis at REDIS_URL, needs the redis package) - the response cache and ETags,
+# idempotent mutations and wallet sessions keep their state in it. The process local LocMemCache used without
+# REDIS_URL is accepted by them only with ALLOW_PROCESS_LOCAL_CACHE=1, i.e. for a single process (runserver),
+# otherwise the response cache and ETags are disabled, mutations run without deduplication and wallet sessions
+# are refused
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.environ["REDIS_URL"]}
+        if os.environ.get("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+ALLOW_PROCESS_LOCAL_CACHE = os.environ.get("ALLOW_PROCESS_LOCAL_CACHE") == "1"
+
+# per-resolver timing and SQL attribution of sampled GraphQL requests, scraped from /metrics with
+# "Authorization: Bearer <METRICS_TOKEN>" - /metrics is closed while METRICS_TOKEN is not set
+GRAPHQL_INSTRUMENTATION = {
+    "ENABLED": True,
+    "SAMPLE_RATE": float(os.environ.get("GRAPHQL_INSTRUMENTATION_SAMPLE_RATE", 0.1)),
+    "MAX_OPERATIONS": 200,
+    "METRICS_TOKEN": os.environ.get("METRICS_TOKEN"),
+}
+
+# GraphQL operations slower than THRESHOLD_MS are logged to "evidenta.graphql.slow" logger with their SQL
+GRAPHQL_SLOW_LOG = {
+    "ENABLED": True,
+    "THRESHOLD_MS": int(os.environ.get("GRAPHQL_SLOW_LOG_THRESHOLD_MS", 1000)),
+    "QUEUE_SIZE": 1000,
+    "MAX_STATEMENTS": 200,
+    "EXPLAIN": True,
+}
+
+# static cost analysis of GraphQL operations, operations over the limits are rejected before execution
+GRAPHQL_QUERY_COST = {
+    "MAX_COST": int(os.environ.get("GRAPHQL_QUERY_MAX_COST", 5000)),
+    "MAX_DEPTH": int(os.environ.get("GRAPHQL_QUERY_MAX_DEPTH", 10)),
+    # assumed number of items of list fields without pagination arguments
+    "DEFAULT_LIST_SIZE": 10,
+}
+
+# token bucket of evidenta.middleware.rate_limit.RateLimitMiddleware - every request to PATHS is charged by its
+# query cost (at least MIN_PRICE or the sum of FIELD_PRICES of its root fields) plus DB_MS_PRICE per millisecond
+# spent in the database; load runs from a single user (see `load_replay`) need it disabled or raised
+GRAPHQL_RATE_LIMIT = {
+    "ENABLED": os.environ.get("GRAPHQL_RATE_LIMIT_ENABLED", "1") == "1",
+    "PATHS": ["/graphql"],
+    "CAPACITY": int(os.environ.get("GRAPHQL_RATE_LIMIT_CAPACITY", 5000)),
+    "REFILL_RATE": float(os.environ.get("GRAPHQL_RATE_LIMIT_REFILL_RATE", 50)),
+    "MIN_PRICE": 1,
+    "DB_MS_PRICE": 1,
+    "FIELD_PRICES": {
+        "sendInvitationLink": 2000,
+    },
+}
+
+# payloads of mutations with clientMutationId are kept for TIMEOUT seconds and returned to retries of the same
+# mutation with the same input by the same user (the same clientMutationId with another input is rejected),
+# a retry arriving while the first execution runs waits up to WAIT_TIMEOUT seconds for it
+GRAPHQL_IDEMPOTENCY = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(os.environ.get("GRAPHQL_IDEMPOTENCY_TIMEOUT", 24 * 60 * 60)),
+    "LOCK_TIMEOUT": 60,
+    "WAIT_TIMEOUT": 30,
+    "POLL_INTERVAL": 0.1,
+}
+
+# window of the recently created and updated users of the firmStatistics query, days kept in the summary table
+FIRM_STATISTICS = {
+    "DAYS": int(os.environ.get("FIRM_STATISTICS_DAYS", 30)),
+}
+
+# changesSince query of offline clients - rows changed in the last SETTLE_SECONDS wait for transactions which may
+# still commit older changes, cursors older than TOMBSTONE_RETENTION_DAYS (see purge_tombstones) need a full sync
+DELTA_SYNC = {
+    "PAGE_SIZE": 500,
+    "MAX_PAGE_SIZE": 2000,
+    "SETTLE_SECONDS": 2,
+    "TOMBSTONE_RETENTION_DAYS": int(os.environ.get("DELTA_SYNC_TOMBSTONE_RETENTION_DAYS", 90)),
+}
+
+# deletion worker (manage.py run_deletion_worker) - rows deleted per transaction, seconds between polls for new
+# tasks and seconds without progress after which a running task is taken over by another worker
+DELETION = {
+    "CHUNK_SIZE": int(os.environ.get("DELETION_CHUNK_SIZE", 500)),
+    "POLL_INTERVAL": 5,
+    "STALE_SECONDS": 300,
+}
+
+# cache of GraphQL query responses, invalidated by version counters of VERSIONED_MODELS bumped on every change,
+# operations selecting only SHARED_FIELDS are shared by users with the same role, companies and permissions,
+# operations selecting any of UNCACHED_FIELDS (results depending on time or on tables written without version
+# bumps) are never cached,
+# GET query operations get ETag computed from the same key and 304 Not Modified when it matches If-None-Match
+GRAPHQL_RESPONSE_CACHE = {
+    "ENABLED": True,
+    "ETAG": True,
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(os.environ.get("GRAPHQL_RESPONSE_CACHE_TIMEOUT", 300)),
+    "VERSIONED_MODELS": ["user.User", "user.Role", "company.Company", "custom_auth.Token"],
+    "SHARED_FIELDS": ["allRoles", "role", "users", "user"],
+    "UNCACHED_FIELDS": ["changesSince", "firmStatistics", "deletionTask"],
+}
+
+# serializer of GraphQL responses (orjson falls back to the standard json when it's not installed) and
+# compression of responses bigger than COMPRESSION_MIN_SIZE bytes negotiated by Accept-Encoding (br needs brotli)
+GRAPHQL_RESPONSE_ENCODING = {
+    "SERIALIZER": "evidenta.common.schemas.encoding.OrjsonSerializer",
+    "COMPRESSION_MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+}
+
+# results of introspection operations are computed once per schema version and served from memory,
+# SNAPSHOT_FILE made by `manage.py export_schema` is loaded on first use when it matches the schema
+GRAPHQL_INTROSPECTION_CACHE = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 16,
+    "SNAPSHOT_FILE": os.environ.get("GRAPHQL_INTROSPECTION_SNAPSHOT_FILE"),
+}
+
+# wallet key derivation, unlock sessions and export/import (evidenta.core.wallet.session, .transfer)
+WALLET = {
+    "KDF_ITERATIONS": 600_000,
+    "SESSION_IDLE_TIMEOUT": 300,
+    "SESSION_MAX_LIFETIME": 3600,
+    "EXPORT_CHUNK_SIZE": 200,
+    "IMPORT_BATCH_SIZE": 500,
+}
+
+# streaming CSV/XLSX exports of users and companies, rows are fetched and written by chunks of CHUNK_SIZE
+EXPORT = {
+    "CHUNK_SIZE": 2000,
+}
+
 GRAPHQL_JWT = {
     "JWT_VERIFY_EXPIRATION": True,
     "JWT_LONG_RUNNING_REFRESH_TOKEN": True,
@@ -72,6 +209,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "evidenta.middleware.rate_limit.RateLimitMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -12,5 +12,35 @@ DATABASES = {
     }
 }
 
+# migrated and seeded test database is cached in CACHE_DIR and restored by every test run (evidenta/conftest.py),
+# the snapshot is rebuilt when migrations or seed data change
+TEST_DB_SNAPSHOT = {
+    "ENABLED": os.environ.get("TEST_DB_SNAPSHOT", "1") == "1",
+    "CACHE_DIR": os.environ.get("TEST_DB_SNAPSHOT_DIR", os.path.join(BASE_DIR, ".test_db_cache")),
+}
+
 # TEST_FIXTURES_FILES = [os.path.join(BASE_DIR, "evidenta/fixtures/test_data.json")]
 TEST_FIXTURES_FILES = []
+
+# GraphQL API benchmarks (evidenta/common/tests/benchmarks), copy results file to the baseline file to lock latency
+BENCHMARK_RESULTS_FILE = os.environ.get("BENCHMARK_RESULTS_FILE", os.path.join(BASE_DIR, ".benchmarks/results.json"))
+BENCHMARK_BASELINE_FILE = os.environ.get("BENCHMARK_BASELINE_FILE", os.path.join(BASE_DIR, ".benchmarks/baseline.json"))
+BENCHMARK_LATENCY_TOLERANCE = float(os.environ.get("BENCHMARK_LATENCY_TOLERANCE", 1.5))
+BENCHMARK_COMPANIES = int(os.environ.get("BENCHMARK_COMPANIES", 20))
+BENCHMARK_USERS_PER_COMPANY = int(os.environ.get("BENCHMARK_USERS_PER_COMPANY", 25))
+BENCHMARK_ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", 5))
+
+# tests run in a single process
+ALLOW_PROCESS_LOCAL_CACHE = True
+
+# test transactions are never committed, so cached responses wouldn't be invalidated
+GRAPHQL_RESPONSE_CACHE = {**GRAPHQL_RESPONSE_CACHE, "ENABLED": False}
+
+# mutation payloads would outlive the rolled back test transactions, tests enable it explicitly
+GRAPHQL_IDEMPOTENCY = {**GRAPHQL_IDEMPOTENCY, "ENABLED": False}
+
+# budgets would be shared by tests of the same user ids, tests enable it explicitly
+GRAPHQL_RATE_LIMIT = {**GRAPHQL_RATE_LIMIT, "ENABLED": False}
+
+# changes made by a test are synced right away
+DELTA_SYNC = {**DELTA_SYNC, "SETTLE_SECONDS": 0}
@@ -22,6 +22,9 @@ from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
 
 from evidenta.common.schemas.views import CustomGraphQLView
+from evidenta.common.views import metrics_view
+from evidenta.core.company.views import companies_export_view
+from evidenta.core.user.views import users_export_view
 
 
 def debug_view(request):
@@ -38,6 +41,9 @@ def debug_view(request):
 urlpatterns = [
     path("graphql", csrf_exempt(CustomGraphQLView.as_view(graphiql=True))),
     path("debug/", debug_view),
+    path("metrics", metrics_view),
+    path("export/users.<str:export_format>", users_export_view),
+    path("export/companies.<str:export_format>", companies_export_view),
 ]
 
 urlpatterns += i18n_patterns(path("admin/", admin.site.urls))
@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "evidenta.common"
+    label = "common"
+    verbose_name = "Common"
+
+    def ready(self):
+        from evidenta.common.cache import connect_version_signals
+        from evidenta.common.counters import connect_counter_signals
+        from evidenta.common.statistics import connect_statistics_signals
+        from evidenta.common.sync import connect_sync_signals
+
+        connect_version_signals()
+        connect_counter_signals()
+        connect_statistics_signals()
+        connect_sync_signals()
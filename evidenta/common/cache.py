@@ -0,0 +1,94 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+VERSION_KEY_PREFIX = "gql:version:"
+
+
+def get_cache():
+    return caches[settings.GRAPHQL_RESPONSE_CACHE["CACHE_ALIAS"]]
+
+
+def is_shared_cache(alias: str) -> bool:
+    """
+    Whether entries of the cache are seen by all processes of the server. Features keeping state between requests
+    in the cache are correct only with such cache - a write handled by one worker has to invalidate responses
+    cached by the others. The process local LocMemCache is accepted only with ALLOW_PROCESS_LOCAL_CACHE.
+    """
+    return settings.ALLOW_PROCESS_LOCAL_CACHE or not isinstance(caches[alias], LocMemCache)
+
+
+def is_response_cache_enabled() -> bool:
+    config = settings.GRAPHQL_RESPONSE_CACHE
+    return config["ENABLED"] and is_shared_cache(config["CACHE_ALIAS"])
+
+
+def is_etag_enabled() -> bool:
+    # ETags are computed from the version counters, so they are as stale as the cached responses would be
+    config = settings.GRAPHQL_RESPONSE_CACHE
+    return config["ETAG"] and is_shared_cache(config["CACHE_ALIAS"])
+
+
+def get_versioned_models() -> set[str]:
+    return set(settings.GRAPHQL_RESPONSE_CACHE["VERSIONED_MODELS"])
+
+
+def get_versions() -> dict[str, int]:
+    """
+    Current version counters of the versioned models. Missing counters (new or evicted) are initialised
+    from the clock, so a counter never goes back to a value which may still be part of a cached key.
+    """
+    cache = get_cache()
+    keys = {f"{VERSION_KEY_PREFIX}{label}": label for label in sorted(get_versioned_models())}
+    versions = cache.get_many(keys)
+    if missing := [key for key in keys if key not in versions]:
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        versions |= cache.get_many(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_versions(*labels: str) -> None:
+    """
+    Invalidates cached responses depending on the given models. Called automatically on save, delete and
+    m2m changes, code using `update()`, `bulk_create()` etc. has to call it explicitly.
+    """
+    cache = get_cache()
+    for label in labels:
+        key = f"{VERSION_KEY_PREFIX}{label}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_versions_on_commit(*labels: str, using: str | None = None) -> None:
+    # responses cached before the commit are keyed by the old versions, so they are never served afterwards
+    transaction.on_commit(lambda: bump_versions(*labels), using=using)
+
+
+def _get_versioned_labels(*models: type[Model] | None) -> list[str]:
+    versioned_models = get_versioned_models()
+    return [model._meta.label for model in models if model is not None and model._meta.label in versioned_models]
+
+
+def _on_change(sender, using=None, **kwargs) -> None:
+    if labels := _get_versioned_labels(sender):
+        bump_versions_on_commit(*labels, using=using)
+
+
+def _on_m2m_change(sender, instance, action, model, using=None, **kwargs) -> None:
+    if action.startswith("post_") and (labels := _get_versioned_labels(type(instance), model)):
+        bump_versions_on_commit(*labels, using=using)
+
+
+def connect_version_signals() -> None:
+    post_save.connect(_on_change, dispatch_uid="graphql_response_cache_post_save")
+    post_delete.connect(_on_change, dispatch_uid="graphql_response_cache_post_delete")
+    m2m_changed.connect(_on_m2m_change, dispatch_uid="graphql_response_cache_m2m_changed")
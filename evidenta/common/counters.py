@@ -0,0 +1,108 @@
+from itertools import batched
+from typing import Callable, Iterable
+
+from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from evidenta.core.company.models import Company
+from evidenta.core.user.models import Role, User
+
+
+def _users_count(queryset: models.QuerySet, column: str) -> Coalesce:
+    counted = queryset.filter(**{column: OuterRef("pk")}).values(column).annotate(count=Count("*")).values("count")
+    return Coalesce(Subquery(counted), 0)
+
+
+# users being deleted by the deletion worker are hidden, so they are not counted either
+def _company_users_count() -> Coalesce:
+    return _users_count(Company.users.through.objects.filter(user__is_deleting=False), "company_id")
+
+
+def _role_users_count() -> Coalesce:
+    return _users_count(User.objects.filter(is_deleting=False), "role_id")
+
+
+def refresh_company_users_count(company_ids: Iterable[int]) -> None:
+    """Recounts members of the companies by one UPDATE, used by the bulk operations writing the through table."""
+    if company_ids := set(company_ids):
+        Company.objects.filter(pk__in=company_ids).update(users_count=_company_users_count())
+
+
+def refresh_role_users_count(role_ids: Iterable[int | None]) -> None:
+    """Recounts holders of the roles by one UPDATE, used by the bulk operations creating users or changing roles."""
+    if role_ids := {role_id for role_id in role_ids if role_id is not None}:
+        Role.objects.filter(pk__in=role_ids).update(users_count=_role_users_count())
+
+
+def reconcile_counters(chunk_size: int = 1000, log: Callable[[str], None] = lambda _: None) -> dict[str, int]:
+    """
+    Repairs drifted counters (raw SQL, failed signals) in chunks of primary keys, so the table isn't locked
+    as a whole. Only rows whose counter differs are written. Returns the number of repaired rows per model.
+    """
+    repaired = {}
+    for model, users_count in ((Role, _role_users_count), (Company, _company_users_count)):
+        repaired[model._meta.label] = 0
+        pks = model.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=chunk_size)
+        for chunk in batched(pks, chunk_size):
+            repaired[model._meta.label] += (
+                model.objects.filter(pk__in=chunk)
+                .annotate(actual_count=users_count())
+                .exclude(users_count=F("actual_count"))
+                .update(users_count=users_count())
+            )
+        log(f"{model._meta.verbose_name_plural}: {repaired[model._meta.label]} counters repaired")
+    return repaired
+
+
+def _add(model: type[models.Model], pk: int | None, delta: int) -> None:
+    if pk is not None:
+        # a drifted counter must not break the write, it's repaired by the reconciliation
+        model.objects.filter(pk=pk).update(users_count=Greatest(F("users_count") + delta, 0))
+
+
+def _on_user_save(sender, instance: User, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    if created:
+        _add(Role, instance.role_id, 1)
+    elif not hasattr(instance, "_loaded_role_id"):
+        # the user wasn't loaded from the database, so the previous role is unknown
+        refresh_role_users_count(Role.objects.values_list("pk", flat=True))
+    elif instance._loaded_role_id != instance.role_id:
+        _add(Role, instance._loaded_role_id, -1)
+        _add(Role, instance.role_id, 1)
+    instance._loaded_role_id = instance.role_id
+
+
+def _on_user_pre_delete(sender, instance: User, **kwargs) -> None:
+    # a user being deleted isn't counted since `request_deletion`
+    if instance.is_deleting:
+        return
+    # memberships are deleted in cascade without any signal (auto-created through models don't send them)
+    Company.objects.filter(users=instance).update(users_count=Greatest(F("users_count") - 1, 0))
+
+
+def _on_user_delete(sender, instance: User, **kwargs) -> None:
+    if not instance.is_deleting:
+        _add(Role, getattr(instance, "_loaded_role_id", instance.role_id), -1)
+
+
+def _on_membership_change(sender, instance, action: str, reverse: bool, pk_set: set[int] | None, **kwargs) -> None:
+    # `reverse` is True for `user.companies`, pk_set contains companies then
+    if action == "pre_clear":
+        instance._cleared_company_ids = (
+            set(instance.companies.values_list("pk", flat=True)) if reverse else {instance.pk}
+        )
+    elif action == "post_clear":
+        refresh_company_users_count(instance.__dict__.pop("_cleared_company_ids", ()))
+    elif action in ("post_add", "post_remove") and pk_set:
+        refresh_company_users_count(pk_set if reverse else {instance.pk})
+
+
+def connect_counter_signals() -> None:
+    post_save.connect(_on_user_save, sender=User, dispatch_uid="counters_user_post_save")
+    pre_delete.connect(_on_user_pre_delete, sender=User, dispatch_uid="counters_user_pre_delete")
+    post_delete.connect(_on_user_delete, sender=User, dispatch_uid="counters_user_post_delete")
+    m2m_changed.connect(_on_membership_change, sender=Company.users.through, dispatch_uid="counters_m2m_changed")
@@ -0,0 +1,156 @@
+import datetime
+import logging
+import time
+from typing import Callable, Iterator
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from evidenta.common.cache import bump_versions_on_commit
+from evidenta.common.counters import refresh_company_users_count, refresh_role_users_count
+from evidenta.common.enums import DeletionStatus
+from evidenta.common.models import DeletionTask
+from evidenta.common.statistics import refresh_firm_statistics_on_commit
+from evidenta.core.company.models import Company
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import User
+
+
+logger = logging.getLogger(__name__)
+
+
+def request_deletion(objects: models.QuerySet, requested_by: User | None = None) -> list[DeletionTask]:
+    """
+    Marks the objects (users or companies) as deleting - they are hidden at once and users can't log in anymore -
+    and creates tasks of the deletion worker, which deletes them in chunks. Returns the tasks.
+    """
+    model = objects.model
+    if not (ids := list(objects.filter(is_deleting=False).values_list("pk", flat=True))):
+        return []
+    flags = {"is_deleting": True, "updated": timezone.now()}
+    if model is User:
+        flags["is_active"] = False
+    model.objects.filter(pk__in=ids).update(**flags)
+    if model is User:
+        # hidden users are not counted, update() skips the signals maintaining counters and statistics
+        refresh_role_users_count(User.objects.filter(pk__in=ids).values_list("role_id", flat=True))
+        refresh_company_users_count(
+            Company.users.through.objects.filter(user_id__in=ids).values_list("company_id", flat=True)
+        )
+        refresh_firm_statistics_on_commit(user_ids=ids)
+    tasks = DeletionTask.objects.bulk_create(
+        DeletionTask(model=model._meta.label, object_id=pk, requested_by_id=requested_by.pk if requested_by else None)
+        for pk in ids
+    )
+    # update() skips the signals invalidating cached responses
+    bump_versions_on_commit(model._meta.label, using=objects.db)
+    return tasks
+
+
+def get_dependents(model: type[models.Model], pks: list[int]) -> Iterator[models.QuerySet]:
+    """Rows deleted in cascade with the objects - memberships and other m2m rows, then cascading foreign keys."""
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        if through._meta.auto_created:
+            yield through.objects.filter(**{f"{field.m2m_field_name()}__in": pks})
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            if relation.through._meta.auto_created:
+                yield relation.through.objects.filter(**{f"{relation.field.m2m_reverse_field_name()}__in": pks})
+        elif relation.on_delete is models.CASCADE:
+            yield relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": pks})
+
+
+def _delete_chunk(queryset: models.QuerySet, chunk_size: int) -> dict[str, int]:
+    """Deletes one chunk of the dependents in a short transaction, returns numbers of deleted rows per model."""
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+    if not ids:
+        return {}
+    chunk = queryset.model._base_manager.filter(pk__in=ids)
+    with transaction.atomic():
+        if queryset.model is Company.users.through:
+            memberships = set(chunk.values_list("user_id", "company_id"))
+            deleted = {queryset.model._meta.label: chunk.delete()[0]}
+            Company.objects.memberships_changed(removed=memberships)
+            return deleted
+        return chunk.delete()[1]
+
+
+def _add_progress(task: DeletionTask, deleted: dict[str, int]) -> None:
+    for label, count in deleted.items():
+        if count:
+            task.progress[label] = task.progress.get(label, 0) + count
+
+
+def _save_progress(task: DeletionTask, **fields) -> None:
+    # update() bypasses full_clean, `updated` is the heartbeat of the running task
+    DeletionTask.objects.filter(pk=task.pk).update(progress=task.progress, updated=timezone.now(), **fields)
+
+
+def run_deletion_task(task: DeletionTask, chunk_size: int, log: Callable[[str], None] = lambda _: None) -> None:
+    """
+    Deletes the dependents of the object chunk by chunk, each in its own transaction, so no table is locked
+    for long and memory is bounded by the chunk, and then the object itself. A failed task can be run again,
+    it continues with the rows left.
+    """
+    model = apps.get_model(task.model)
+    try:
+        for queryset in get_dependents(model, [task.object_id]):
+            while deleted := _delete_chunk(queryset, chunk_size):
+                _add_progress(task, deleted)
+                _save_progress(task)
+                log(f"{task}: {task.progress}")
+        with transaction.atomic():
+            deleted = model._base_manager.filter(pk=task.object_id).delete()[1]
+        _add_progress(task, deleted)
+        task.status = DeletionStatus.DONE
+        _save_progress(task, status=task.status)
+    except Exception as e:
+        logger.exception("Deletion of %s %s failed.", task.model, task.object_id)
+        task.status, task.error = DeletionStatus.FAILED, str(e)
+        _save_progress(task, status=task.status, error=task.error)
+    log(f"{task}: {task.progress}")
+
+
+def claim_next_task() -> DeletionTask | None:
+    """
+    Next pending task, or a running one whose worker stopped sending heartbeats (after STALE_SECONDS) - chunks
+    are idempotent, so it's safe to continue. The conditional UPDATE makes concurrent workers claim different tasks.
+    """
+    stale = timezone.now() - datetime.timedelta(seconds=settings.DELETION["STALE_SECONDS"])
+    claimable = Q(status=DeletionStatus.PENDING) | Q(status=DeletionStatus.RUNNING, updated__lt=stale)
+    for task in DeletionTask.objects.filter(claimable).order_by("pk")[:10]:
+        if DeletionTask.objects.filter(claimable, pk=task.pk).update(
+            status=DeletionStatus.RUNNING, updated=timezone.now()
+        ):
+            task.status = DeletionStatus.RUNNING
+            return task
+    return None
+
+
+def process_deletion_tasks(chunk_size: int | None = None, log: Callable[[str], None] = lambda _: None) -> int:
+    """Runs the tasks until none is left, returns their number."""
+    chunk_size = chunk_size or settings.DELETION["CHUNK_SIZE"]
+    processed = 0
+    while (task := claim_next_task()) is not None:
+        run_deletion_task(task, chunk_size, log)
+        processed += 1
+    return processed
+
+
+def run_deletion_worker(chunk_size: int | None = None, log: Callable[[str], None] = lambda _: None) -> None:
+    """Processes the tasks forever, polls for new ones every POLL_INTERVAL seconds."""
+    while True:
+        if not process_deletion_tasks(chunk_size, log):
+            time.sleep(settings.DELETION["POLL_INTERVAL"])
+
+
+def get_deletion_task(as_user: User, task_id: int) -> DeletionTask:
+    """Task requested by `as_user`, supervisors and admins see all of them."""
+    tasks = DeletionTask.objects.all()
+    if as_user.role.name not in (UserRole.SUPERVISOR, UserRole.ADMIN):
+        tasks = tasks.filter(requested_by_id=as_user.pk)
+    return tasks.get(pk=task_id)
@@ -1,5 +1,8 @@
 from enum import Enum
 
+from django.db.models import TextChoices
+from django.utils.translation import gettext_lazy as _
+
 
 class ApiErrorCode(Enum):
     # auth errors
@@ -31,6 +34,12 @@ class ApiErrorCode(Enum):
     INVALID_TOKEN = "invalid_token"  # noqa: S105
     INVALID_PASSWORDS = "invalid_passwords"
     INVALID_OLD_PASSWORD = "invalid_old_password"  # noqa: S105
+    # query limits
+    QUERY_TOO_COMPLEX = "query_too_complex"
+    QUERY_TOO_DEEP = "query_too_deep"
+    # idempotent mutations
+    MUTATION_IN_PROGRESS = "mutation_in_progress"
+    IDEMPOTENCY_KEY_REUSED = "idempotency_key_reused"
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -65,4 +74,15 @@ ERROR_MESSAGES = {
     ApiErrorCode.INVALID_TOKEN: "Given token is invalid.",
     ApiErrorCode.INVALID_PASSWORDS: "Given passwords are not same.",
     ApiErrorCode.INVALID_OLD_PASSWORD: "Given old password is not valid.",
+    ApiErrorCode.QUERY_TOO_COMPLEX: "Query cost {cost} exceeds maximum allowed cost {max_cost}.",
+    ApiErrorCode.QUERY_TOO_DEEP: "Query depth {depth} exceeds maximum allowed depth {max_depth}.",
+    ApiErrorCode.MUTATION_IN_PROGRESS: "Mutation {mutation} '{client_mutation_id}' is still in progress.",
+    ApiErrorCode.IDEMPOTENCY_KEY_REUSED: "Mutation {mutation} '{client_mutation_id}' was executed with another input.",
 }
+
+
+class DeletionStatus(TextChoices):
+    PENDING = "pending", _("Pending")
+    RUNNING = "running", _("Running")
+    DONE = "done", _("Done")
+    FAILED = "failed", _("Failed")
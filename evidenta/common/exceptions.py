@@ -106,3 +106,15 @@ class UnexpectedApiError(BaseAPIException):
 
 class InvalidTokenAPIException(BaseAPIException):
     pass
+
+
+class QueryCostAPIException(BaseAPIException):
+    pass
+
+
+class MutationInProgressAPIException(BaseAPIException):
+    pass
+
+
+class IdempotencyKeyReusedAPIException(BaseAPIException):
+    pass
@@ -0,0 +1,172 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+from itertools import batched
+from typing import Any, Callable, Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from evidenta.common.schemas.response_cache import authenticate_request
+
+
+XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""  # noqa: E501
+XLSX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""  # noqa: E501
+XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""  # noqa: E501
+XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""  # noqa: E501
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = "</sheetData></worksheet>"
+
+# characters which are not allowed in XML 1.0 documents
+ILLEGAL_XML_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# text cells starting with these characters are evaluated as formulas by spreadsheet applications opening a CSV
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class _Buffer:
+    """Write-only file collecting the output of csv/zip writers until it is drained into the response."""
+
+    def __init__(self):
+        self.parts: list[bytes] = []
+
+    def write(self, data: bytes | str) -> int:
+        self.parts.append(data.encode() if isinstance(data, str) else bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _csv_cell(value: Any) -> Any:
+    # user controlled text is prefixed by an apostrophe, so it is never executed as a formula
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_csv(header: list[str], rows: Iterable[tuple], chunk_size: int) -> Iterator[bytes]:
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    # BOM, so Excel opens the file as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for chunk in batched(rows, chunk_size):
+        writer.writerows([_csv_cell(value) for value in row] for row in chunk)
+        yield buffer.drain()
+    yield buffer.drain()
+
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int | float | Decimal):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime | date):
+        value = value.isoformat()
+    text = escape(ILLEGAL_XML_CHARACTERS.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Iterable[Any]) -> str:
+    return f"<row>{''.join(_xlsx_cell(value) for value in values)}</row>"
+
+
+def stream_xlsx(
+    header: list[str], rows: Iterable[tuple], chunk_size: int, sheet_name: str = "Export"
+) -> Iterator[bytes]:
+    """
+    Minimal single sheet workbook with inline strings (no shared strings table, which would need all
+    the rows up front). The zip is written to an unseekable buffer, so the entries use data descriptors
+    and every chunk of rows is sent as soon as it is compressed.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        workbook.writestr("_rels/.rels", XLSX_RELS)
+        workbook.writestr("xl/workbook.xml", XLSX_WORKBOOK.format(name=escape(sheet_name)))
+        workbook.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((XLSX_SHEET_START + _xlsx_row(header)).encode())
+            for chunk in batched(rows, chunk_size):
+                sheet.write("".join(_xlsx_row(row) for row in chunk).encode())
+                yield buffer.drain()
+            sheet.write(XLSX_SHEET_END.encode())
+    yield buffer.drain()
+
+
+def export_response(
+    queryset: QuerySet, columns: list[tuple[str, str]], filename: str, export_format: str
+) -> StreamingHttpResponse:
+    """
+    Streams `columns` (field lookup, header) of the queryset as CSV or XLSX. Rows are read as tuples by
+    a server-side cursor, so the memory doesn't grow with the number of rows.
+    """
+    chunk_size = settings.EXPORT["CHUNK_SIZE"]
+    fields, header = zip(*columns, strict=True)
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    stream = stream_xlsx if export_format == "xlsx" else stream_csv
+    response = StreamingHttpResponse(
+        stream(list(header), rows, chunk_size), content_type=EXPORT_CONTENT_TYPES[export_format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+def export_view(permissions: list[str]) -> Callable:
+    """
+    Authenticates the request by session or JWT, checks the same permissions as the GraphQL queries of
+    the exported objects and validates the `export_format` url argument.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @require_GET
+        @wraps(view)
+        def wrapper(request: HttpRequest, export_format: str) -> HttpResponse:
+            authenticate_request(request)
+            if not request.user.is_authenticated:
+                return HttpResponse(status=401)
+            if not request.user.has_perms(permissions):
+                return HttpResponse(status=403)
+            if export_format not in EXPORT_CONTENT_TYPES:
+                raise Http404(f"Unknown export format {export_format}.")
+            return view(request, export_format)
+
+        return wrapper
+
+    return decorator
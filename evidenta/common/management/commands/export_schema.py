@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from graphene_django.settings import graphene_settings
+from graphql import print_schema
+
+from evidenta.common.schemas.introspection import DEFAULT_INTROSPECTION_QUERY, build_snapshot
+
+
+class Command(BaseCommand):
+    help = "Exports GraphQL schema as SDL and introspection snapshot (see GRAPHQL_INTROSPECTION_CACHE)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sdl", default="schema.graphql", help="Output file of the SDL.")
+        parser.add_argument("--introspection", default="schema.json", help="Output file of the introspection.")
+        parser.add_argument(
+            "--query-file",
+            help="File with the introspection query to snapshot, e.g. the one sent by GraphiQL or codegen.",
+        )
+
+    def handle(self, *args, **options):
+        schema = graphene_settings.SCHEMA.graphql_schema
+        query = DEFAULT_INTROSPECTION_QUERY
+        if options["query_file"]:
+            with open(options["query_file"]) as f:
+                query = f.read()
+
+        with open(options["sdl"], "w") as f:
+            f.write(print_schema(schema))
+        with open(options["introspection"], "w") as f:
+            json.dump(build_snapshot(schema, query), f, indent=2)
+
+        self.stdout.write(f"Schema exported to {options['sdl']} and {options['introspection']}.")
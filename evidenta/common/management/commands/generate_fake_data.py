@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from evidenta.common.management.data.fake_data import FAKE_DATA_PASSWORD, delete_fake_data, generate_fake_data
+
+
+class Command(BaseCommand):
+    help = "Generates reproducible fake companies, users, memberships and tokens for load testing and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=100)
+        parser.add_argument("--users-per-company", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0, help="The same seed generates the same data.")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per bulk_create and DELETE.")
+        parser.add_argument("--clear", action="store_true", help="Delete previously generated data first.")
+
+    def handle(self, *args, **options):
+        if settings.PRODUCTION:
+            raise CommandError("Fake data can't be generated with PRODUCTION=True.")
+        if options["clear"]:
+            delete_fake_data(chunk_size=options["chunk_size"], log=self.stdout.write)
+
+        start = time.perf_counter()
+        stats = generate_fake_data(
+            companies=options["companies"],
+            users_per_company=options["users_per_company"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"Created {stats.companies} companies, {stats.users} users, {stats.memberships} memberships and "
+            f"{stats.tokens} tokens in {time.perf_counter() - start:.1f}s (password: {FAKE_DATA_PASSWORD})."
+        )
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from evidenta.common.management.data.fake_data import FAKE_ADMIN_USERNAME, FAKE_DATA_PASSWORD
+from evidenta.common.testing.load_replay import DEFAULT_MIX, ReplayContext, compare_results, load_recorded_mix, replay
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a weighted mix of GraphQL operations against a local dev server and reports latency percentiles, "
+        "throughput and error rate per operation. Expects data made by generate_fake_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/graphql")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--requests", type=int, help="Number of requests, --duration is used when not set.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds of the replay.")
+        parser.add_argument("--operations-file", help="JSON list of recorded operations replacing the default mix.")
+        parser.add_argument("--username", default=FAKE_ADMIN_USERNAME, help="User of the authenticated operations.")
+        parser.add_argument("--password", default=FAKE_DATA_PASSWORD)
+        parser.add_argument("--companies", type=int, default=100, help="--companies of generate_fake_data.")
+        parser.add_argument(
+            "--users-per-company", type=int, default=20, help="--users-per-company of generate_fake_data."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default=".benchmarks/load_replay.json")
+        parser.add_argument("--baseline", help="Results of a previous replay to compare with.")
+
+    def handle(self, *args, **options):
+        context = ReplayContext(
+            username=options["username"],
+            password=options["password"],
+            companies=options["companies"],
+            users_per_company=options["users_per_company"],
+            rng=random.Random(options["seed"]),
+        )
+        mix = load_recorded_mix(options["operations_file"]) if options["operations_file"] else DEFAULT_MIX
+        try:
+            result = asyncio.run(
+                replay(
+                    options["url"],
+                    mix,
+                    context,
+                    concurrency=options["concurrency"],
+                    requests=options["requests"],
+                    duration=None if options["requests"] else options["duration"],
+                )
+            ).to_dict()
+        except (ValueError, RuntimeError, OSError) as e:
+            raise CommandError(str(e)) from e
+
+        for name, stats in [*result["operations"].items(), ("total", result["total"])]:
+            self.stdout.write(
+                f"{name:<24} {stats['requests']:>7} req {stats['throughput_rps']:>9} rps "
+                f"p50 {stats['p50_ms']:>9} p95 {stats['p95_ms']:>9} p99 {stats['p99_ms']:>9} ms "
+                f"errors {stats['error_rate']:.2%}"
+            )
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                for line in compare_results(result, json.load(f)):
+                    self.stdout.write(line)
+        if options["output"]:
+            os.makedirs(os.path.dirname(options["output"]) or ".", exist_ok=True)
+            with open(options["output"], "w") as f:
+                json.dump({"created": timezone.now().isoformat(), **result}, f, indent=2)
+            self.stdout.write(f"Results saved to {options['output']}.")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from evidenta.common.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Deletes tombstones of the delta sync older than DELTA_SYNC['TOMBSTONE_RETENTION_DAYS']."
+
+    def handle(self, *args, **options):
+        purge_tombstones(log=self.stdout.write)
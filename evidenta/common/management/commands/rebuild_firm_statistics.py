@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from evidenta.common.statistics import rebuild_firm_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the firm statistics summary of all companies from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Companies rebuilt in one transaction.")
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_firm_statistics(chunk_size=options["chunk_size"], log=self.stdout.write)
+        self.stdout.write(f"Rebuilt statistics of {rebuilt} companies.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from evidenta.common.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Repairs denormalized users counters of roles and companies which drifted from the actual counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows checked by one UPDATE.")
+
+    def handle(self, *args, **options):
+        repaired = reconcile_counters(chunk_size=options["chunk_size"], log=self.stdout.write)
+        self.stdout.write(f"Repaired {sum(repaired.values())} counters.")
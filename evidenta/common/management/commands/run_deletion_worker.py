@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from evidenta.common.deletion import process_deletion_tasks, run_deletion_worker
+
+
+class Command(BaseCommand):
+    help = "Deletes users and companies requested for deletion, chunk by chunk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, help="Rows deleted in one transaction.")
+        parser.add_argument("--once", action="store_true", help="Exit when no task is left instead of polling.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            processed = process_deletion_tasks(chunk_size=options["chunk_size"], log=self.stdout.write)
+            self.stdout.write(f"Processed {processed} deletion tasks.")
+        else:
+            run_deletion_worker(chunk_size=options["chunk_size"], log=self.stdout.write)
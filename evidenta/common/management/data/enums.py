@@ -14,7 +14,7 @@ class BaseUsers(Enum):
         return self.value.capitalize()
 
 
-BASE_USERS_DATA = (
+BASE_USERS_DATA = tuple(
     {
         "username": val.value,
         "first_name": val.capitalize(),
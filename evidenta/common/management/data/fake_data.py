@@ -0,0 +1,182 @@
+import base64
+import datetime
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from evidenta.common.cache import bump_versions, bump_versions_on_commit
+from evidenta.common.counters import reconcile_counters, refresh_company_users_count, refresh_role_users_count
+from evidenta.common.deletion import get_dependents
+from evidenta.common.models import Tombstone
+from evidenta.common.statistics import rebuild_firm_statistics, refresh_firm_statistics
+from evidenta.common.utils import generate_company_identification_number
+from evidenta.core.auth.models import Token
+from evidenta.core.company.models import Company
+from evidenta.core.user.enums import UserGender, UserRole
+from evidenta.core.user.models import Role, User
+
+
+FAKE_DATA_PREFIX = "fake"
+FAKE_DATA_PASSWORD = "evidentaFake123"  # noqa: S105
+# superuser driving the load tests, see `load_replay`
+FAKE_ADMIN_USERNAME = f"{FAKE_DATA_PREFIX}_admin"
+
+# roughly the structure of an accounting firm, every role is present in every bigger company
+FAKE_ROLE_WEIGHTS = {
+    UserRole.CLIENT: 50,
+    UserRole.ACCOUNTANT: 25,
+    UserRole.GUEST: 15,
+    UserRole.SUPERVISOR: 7,
+    UserRole.ADMIN: 3,
+}
+FIRST_NAMES = ("Jan", "Petr", "Jana", "Eva", "Tomáš", "Lucie", "Martin", "Tereza", "Jakub", "Kateřina")
+LAST_NAMES = ("Novák", "Svoboda", "Novotný", "Dvořák", "Černý", "Procházka", "Kučera", "Veselý", "Horák", "Marek")
+CITIES = ("Praha", "Brno", "Ostrava", "Plzeň", "Liberec", "Olomouc", "Zlín", "Pardubice")
+# accountants take care of several companies
+ACCOUNTANT_EXTRA_COMPANIES = 2
+
+
+@dataclass
+class FakeDataStats:
+    companies: int = 0
+    users: int = 0
+    memberships: int = 0
+    tokens: int = 0
+
+
+def delete_fake_data(chunk_size: int = 5000, log: Callable[[str], None] = lambda _: None) -> None:
+    """
+    Deletes the generated users and companies in chunks of primary keys by plain DELETEs, memberships and other
+    dependents first. Queryset `delete()` would load and signal every row, the counters, statistics and cached
+    responses are refreshed once at the end instead.
+    """
+    for model, lookup in ((User, "username__startswith"), (Company, "name__startswith")):
+        ids = list(model._base_manager.filter(**{lookup: f"{FAKE_DATA_PREFIX}_"}).values_list("pk", flat=True))
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start : start + chunk_size]
+            with transaction.atomic():
+                for queryset in get_dependents(model, chunk):
+                    queryset._raw_delete(queryset.db)
+                model._base_manager.filter(pk__in=chunk)._raw_delete(model._base_manager.db)
+                # synced clients learn about the deletion, the signals recording tombstones are skipped
+                Tombstone.objects.bulk_create(Tombstone(model=model._meta.label, object_id=pk) for pk in chunk)
+            log(f"{model._meta.verbose_name_plural}: {start + len(chunk)}/{len(ids)} deleted")
+    reconcile_counters(chunk_size=chunk_size, log=log)
+    rebuild_firm_statistics(log=log)
+    bump_versions(User._meta.label, Company._meta.label, Role._meta.label, Token._meta.label)
+
+
+def generate_fake_data(
+    companies: int,
+    users_per_company: int,
+    seed: int = 0,
+    chunk_size: int = 5000,
+    log: Callable[[str], None] = lambda _: None,
+) -> FakeDataStats:
+    """
+    Creates `companies` companies with `users_per_company` members each, their memberships and invitation
+    tokens of the guests. The data depend only on `seed` and are written by `bulk_create` in chunks of
+    companies, so the memory doesn't grow with the size of the dataset.
+    """
+    rng = random.Random(seed)
+    roles = {role.name: role for role in Role.objects.all()}
+    password = make_password(FAKE_DATA_PASSWORD)
+    now = timezone.now()
+    token_expires_at = now + datetime.timedelta(minutes=settings.INVITATION_LINK_TOKEN_EXPIRATION_MINS)
+    through = Company.users.through
+    stats, company_ids = FakeDataStats(), []
+    companies_per_chunk = max(1, chunk_size // max(users_per_company, 1))
+
+    User.objects.update_or_create(
+        username=FAKE_ADMIN_USERNAME,
+        defaults={
+            "password": password,
+            "first_name": "Fake",
+            "last_name": "Admin",
+            "email": f"{FAKE_ADMIN_USERNAME}@fake.evidenta.cz",
+            "role": roles[UserRole.ADMIN],
+            "is_superuser": True,
+            "is_staff": True,
+        },
+    )
+
+    for start in range(0, companies, companies_per_chunk):
+        with transaction.atomic():
+            company_objs = Company.objects.bulk_create(
+                [
+                    Company(
+                        name=f"{FAKE_DATA_PREFIX}_company_{i}",
+                        # the "8" prefix keeps the numbers unique up to a million companies
+                        company_identification_number=(ico := generate_company_identification_number(f"8{i:06d}")),
+                        tax_identification_number=f"CZ{ico}",
+                        address_1=f"{rng.choice(LAST_NAMES)}ova {rng.randint(1, 300)}",
+                        city=rng.choice(CITIES),
+                        zip_code=f"{rng.randint(10000, 79999)}",
+                    )
+                    for i in range(start, min(start + companies_per_chunk, companies))
+                ],
+                batch_size=chunk_size,
+            )
+            company_ids += [company.pk for company in company_objs]
+
+            users, user_companies = [], []
+            for c, company in enumerate(company_objs, start=start):
+                for u in range(users_per_company):
+                    role = rng.choices(list(FAKE_ROLE_WEIGHTS), weights=FAKE_ROLE_WEIGHTS.values())[0]
+                    username = f"{FAKE_DATA_PREFIX}_{c}_{u}"
+                    users.append(
+                        User(
+                            username=username,
+                            password=password,
+                            first_name=rng.choice(FIRST_NAMES),
+                            last_name=rng.choice(LAST_NAMES),
+                            email=f"{username}@fake.evidenta.cz",
+                            role=roles[role],
+                            gender=rng.choice(UserGender.values),
+                            birthday=datetime.date(1950, 1, 1) + datetime.timedelta(days=rng.randrange(20000)),
+                            date_joined=now - datetime.timedelta(days=rng.randrange(5 * 365)),
+                            is_superuser=role == UserRole.ADMIN,
+                            is_staff=role == UserRole.ADMIN,
+                        )
+                    )
+                    user_companies.append([company.pk])
+                    if role == UserRole.ACCOUNTANT:
+                        user_companies[-1] += rng.sample(company_ids, min(ACCOUNTANT_EXTRA_COMPANIES, len(company_ids)))
+            users = User.objects.bulk_create(users, batch_size=chunk_size)
+
+            memberships = [
+                through(company_id=company_id, user_id=user.pk)
+                for user, company_ids_of_user in zip(users, user_companies, strict=True)
+                for company_id in dict.fromkeys(company_ids_of_user)
+            ]
+            through.objects.bulk_create(memberships, batch_size=chunk_size)
+            tokens = Token.objects.bulk_create(
+                [
+                    Token(
+                        user=user,
+                        token=base64.urlsafe_b64encode(rng.randbytes(48)).decode(),
+                        expires_at=token_expires_at,
+                    )
+                    for user in users
+                    if user.role_id == roles[UserRole.GUEST].pk
+                ],
+                batch_size=chunk_size,
+            )
+            # bulk_create doesn't send signals, counters, statistics and cached responses are updated explicitly
+            changed_company_ids = {membership.company_id for membership in memberships}
+            refresh_company_users_count(changed_company_ids)
+            refresh_firm_statistics(changed_company_ids)
+            refresh_role_users_count(roles[role].pk for role in FAKE_ROLE_WEIGHTS)
+            bump_versions_on_commit(User._meta.label, Company._meta.label, Token._meta.label)
+
+        stats.companies += len(company_objs)
+        stats.users += len(users)
+        stats.memberships += len(memberships)
+        stats.tokens += len(tokens)
+        log(f"{stats.companies}/{companies} companies, {stats.users} users")
+    return stats
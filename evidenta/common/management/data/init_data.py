@@ -1,6 +1,10 @@
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Permission
+from django.db import transaction
 
+from evidenta.common.cache import bump_versions_on_commit
+from evidenta.common.counters import refresh_role_users_count
 from evidenta.core.user.enums import UserRole
 from evidenta.core.user.models import Role, User
 
@@ -13,25 +17,65 @@ def create_base_data(**kwargs) -> None:
 
 
 def create_roles_and_permissions() -> None:
-    for role_name, permissions in ROLES_AND_PERMISSIONS.items():
-        print(f"Creating '{role_name}' role")  # noqa: T201
-        role, created = Role.objects.get_or_create(name=role_name)
-        for perm_name in permissions:
-            try:
-                perm = Permission.objects.get(codename=perm_name)
-                role.permissions.add(perm)
-            except Permission.DoesNotExist:
-                print(f"Permission {perm_name} not found")  # noqa: T201
+    """
+    Set-based and idempotent: missing roles and role permissions are created by a constant number of queries,
+    permissions assigned on top of `ROLES_AND_PERMISSIONS` are kept.
+    """
+    with transaction.atomic():
+        roles = dict(Role.objects.filter(name__in=list(ROLES_AND_PERMISSIONS)).values_list("name", "pk"))
+        if missing_roles := [name for name in ROLES_AND_PERMISSIONS if name not in roles]:
+            for role_name in missing_roles:
+                print(f"Creating '{role_name}' role")  # noqa: T201
+            roles.update((role.name, role.pk) for role in Role.objects.bulk_create(Role(name=n) for n in missing_roles))
+
+        codenames = {codename for permissions in ROLES_AND_PERMISSIONS.values() for codename in permissions}
+        permissions: dict[str, list[int]] = {}
+        for pk, codename in Permission.objects.filter(codename__in=codenames).values_list("pk", "codename"):
+            permissions.setdefault(codename, []).append(pk)
+        for codename in sorted(codenames - permissions.keys()):
+            print(f"Permission {codename} not found")  # noqa: T201
+
+        through = Role.permissions.through
+        current = set(through.objects.filter(role_id__in=roles.values()).values_list("role_id", "permission_id"))
+        wanted = {
+            (roles[role_name], permission_id)
+            for role_name, codenames_of_role in ROLES_AND_PERMISSIONS.items()
+            for codename in codenames_of_role
+            for permission_id in permissions.get(codename, [])
+        }
+        if missing := wanted - current:
+            through.objects.bulk_create(
+                through(role_id=role_id, permission_id=permission_id) for role_id, permission_id in sorted(missing)
+            )
+        if missing_roles or missing:
+            # bulk_create doesn't send signals, cached responses are invalidated explicitly
+            bump_versions_on_commit(Role._meta.label)
 
 
 def create_base_users() -> None:
     if settings.PRODUCTION or not settings.DEBUG:
         print(f"Can't create base users with PRODUCTION={settings.PRODUCTION} and DEBUG={settings.DEBUG}")  # noqa: T201
         return
+    usernames = [user_data["username"] for user_data in BASE_USERS_DATA]
+    existing = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+    roles = {role.name: role for role in Role.objects.filter(name__in=UserRole.values)}
+    users = []
     for user_data in BASE_USERS_DATA:
+        if user_data["username"] in existing:
+            continue
         print(f"Creating '{user_data['username']}' user")  # noqa: T201
-        create = User.objects.create
-        if user_data.get("role") == UserRole.ADMIN:
-            user_data["is_superuser"] = True
-            user_data["is_staff"] = True
-        create(password=f"evidenta{user_data.get('username')}123", **user_data)
+        is_admin = user_data["role"] == UserRole.ADMIN
+        users.append(
+            User(
+                **{**user_data, "role": roles[user_data["role"]]},
+                password=make_password(f"evidenta{user_data['username']}123"),
+                is_superuser=is_admin,
+                is_staff=is_admin,
+            )
+        )
+    if users:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # bulk_create doesn't send signals, counters and cached responses are updated explicitly
+            refresh_role_users_count(user.role_id for user in users)
+            bump_versions_on_commit(User._meta.label)
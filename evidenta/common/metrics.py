@@ -0,0 +1,145 @@
+import bisect
+import math
+import threading
+from collections import defaultdict
+
+
+DEFAULT_DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_: str
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _labels(self, labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_}"]
+
+
+class Counter(Metric):
+    type_ = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._labels(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return super().render() + [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in values.items()]
+
+
+class Histogram(Metric):
+    type_ = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            # [bucket counts..., sum, count]
+            values = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            values[bisect.bisect_left(self.buckets, value)] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        return int(self._values.get(self._labels(labels), [0])[-1])
+
+    def sum(self, **labels: str) -> float:
+        return self._values.get(self._labels(labels), [0, 0])[-2]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = {key: list(v) for key, v in self._values.items()}
+        lines = super().render()
+        for key, observed in values.items():
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets, observed, strict=False):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bucket)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(observed[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {observed[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics registry rendered in the Prometheus text exposition format. Every worker process
+    keeps its own values, so the scraper has to scrape workers separately (or aggregate by instance).
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_cls: type[Metric], name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
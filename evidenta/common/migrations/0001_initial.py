@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-19 13:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(max_length=64)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("company_id", models.PositiveBigIntegerField(null=True)),
+                ("user_id", models.PositiveBigIntegerField(null=True)),
+                ("deleted", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "db_table": "tombstone",
+                "indexes": [models.Index(fields=["deleted", "id"], name="tombstone_deleted_6dae41_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.14 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeletionTask",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("model", models.CharField(max_length=64)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("requested_by_id", models.PositiveBigIntegerField(null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("progress", models.JSONField(blank=True, default=dict)),
+                ("error", models.TextField(blank=True, default="")),
+            ],
+            options={
+                "db_table": "deletion_task",
+                "indexes": [models.Index(fields=["status", "id"], name="deletion_ta_status_fe449e_idx")],
+            },
+        ),
+    ]
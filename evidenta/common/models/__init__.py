@@ -0,0 +1,5 @@
+from .deletion import DeletionTask
+from .tombstone import Tombstone
+
+
+__all__ = ("DeletionTask", "Tombstone")
@@ -0,0 +1,26 @@
+from django.db import models
+
+from evidenta.common.enums import DeletionStatus
+from evidenta.common.models.base import BaseModel
+
+
+class DeletionTask(BaseModel):
+    """
+    Deletion of a user or company by the deletion worker (`evidenta.common.deletion`). The object is marked
+    as deleting right away, its dependents are deleted in chunks and `progress` counts the deleted rows per model.
+    """
+
+    model = models.CharField(max_length=64)
+    # plain ids, not foreign keys - the task outlives the deleted object and maybe the requester too
+    object_id = models.PositiveBigIntegerField()
+    requested_by_id = models.PositiveBigIntegerField(null=True)
+    status = models.CharField(choices=DeletionStatus.choices, default=DeletionStatus.PENDING, max_length=16)
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        db_table = "deletion_task"
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.model}:{self.object_id} ({self.status})"
@@ -0,0 +1,24 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Record of an object which disappeared for some users - it was deleted, or a removed membership made it
+    invisible to them. Read by the delta sync (`evidenta.common.sync`), which shows it to members of `company_id`,
+    to the user `user_id` and to supervisors and admins, and only while the object isn't visible to the caller.
+    """
+
+    model = models.CharField(max_length=64)
+    # plain ids, not foreign keys - the tombstones outlive the rows they point to
+    object_id = models.PositiveBigIntegerField()
+    company_id = models.PositiveBigIntegerField(null=True)
+    user_id = models.PositiveBigIntegerField(null=True)
+    deleted = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "tombstone"
+        indexes = [models.Index(fields=["deleted", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.model}:{self.object_id}"
@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+
+from graphene.relay import Connection
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.settings import graphene_settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLField,
+    GraphQLList,
+    GraphQLNamedType,
+    GraphQLObjectType,
+    GraphQLSchema,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    get_named_type,
+    get_nullable_type,
+    is_leaf_type,
+)
+from graphql.execution import ExecutionContext
+from graphql.execution.values import get_argument_values
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.exceptions import QueryCostAPIException
+from evidenta.common.schemas.utils import get_error_message_from_error_code
+
+
+COST_REQUEST_ATTRIBUTE = "graphql_cost"
+
+
+@dataclass
+class QueryCost:
+    cost: int
+    depth: int
+    # names of the selected root fields (aliased fields repeatedly), the rate limiter prices them
+    root_fields: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, int]:
+        return {
+            "requested": self.cost,
+            "maximum": settings.GRAPHQL_QUERY_COST["MAX_COST"],
+            "depth": self.depth,
+            "maximum_depth": settings.GRAPHQL_QUERY_COST["MAX_DEPTH"],
+        }
+
+
+def collect_root_fields(
+    selection_set: SelectionSetNode, fragments: dict[str, FragmentDefinitionNode]
+) -> dict[str, str]:
+    """
+    Names of the root fields by their response keys, including fields selected by fragment spreads and inline
+    fragments. Fields merged by the execution are collected once, `@skip`/`@include` are not evaluated.
+    """
+    fields: dict[str, str] = {}
+    _collect_root_fields(selection_set, fragments, fields, visited=set())
+    return fields
+
+
+def _collect_root_fields(
+    selection_set: SelectionSetNode, fragments: dict[str, FragmentDefinitionNode], fields: dict[str, str], visited: set
+) -> None:
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            fields[(selection.alias or selection.name).value] = selection.name.value
+            continue
+        if isinstance(selection, FragmentSpreadNode):
+            # a fragment spread again adds no fields
+            if selection.name.value in visited:
+                continue
+            visited.add(selection.name.value)
+            selection = fragments.get(selection.name.value)
+        if selection is not None:
+            _collect_root_fields(selection.selection_set, fragments, fields, visited)
+
+
+class QueryCostAnalyzer:
+    """
+    Static cost estimate of an operation. A field costs its weight (`field_costs` on the graphene type,
+    by default 1 for fields returning objects and 0 for scalars) plus cost of its selection multiplied by
+    the number of items the field can return - `first`/`last` of connections, `RELAY_CONNECTION_MAX_LIMIT`
+    for connections without them and the configured default for plain lists. Connection and edge wrappers
+    don't add depth, every `node` of a connection costs 1.
+    """
+
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        fragments: dict[str, FragmentDefinitionNode],
+        variable_values: dict[str, Any],
+    ):
+        self.schema = schema
+        self.fragments = fragments
+        self.variable_values = variable_values
+        self.config = settings.GRAPHQL_QUERY_COST
+        # (cost, depth relative to the spread) of every fragment, computed once per analysis
+        self._fragment_costs: dict[str, tuple[int, int]] = {}
+
+    def analyze(self, operation: OperationDefinitionNode) -> QueryCost:
+        root_type = self.schema.get_root_type(operation.operation)
+        return QueryCost(
+            *self._selection_set_cost(root_type, operation.selection_set, depth=0),
+            root_fields=tuple(collect_root_fields(operation.selection_set, self.fragments).values()),
+        )
+
+    def _selection_set_cost(self, parent_type: GraphQLNamedType, selection_set: SelectionSetNode, depth: int):
+        cost, max_depth = 0, depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self._field_cost(parent_type, selection, depth + 1)
+            elif isinstance(selection, FragmentSpreadNode):
+                field_cost, field_depth = self._fragment_spread_cost(selection.name.value, depth)
+            else:
+                fragment_type = (
+                    self.schema.get_type(selection.type_condition.name.value)
+                    if selection.type_condition
+                    else parent_type
+                )
+                field_cost, field_depth = self._selection_set_cost(fragment_type, selection.selection_set, depth)
+            cost += field_cost
+            max_depth = max(max_depth, field_depth)
+        return cost, max_depth
+
+    def _fragment_spread_cost(self, name: str, depth: int) -> tuple[int, int]:
+        # the cost doesn't depend on where the fragment is spread, so documents reusing fragments at every level
+        # are analyzed in linear time instead of walking the fragments again for every spread
+        if name not in self._fragment_costs:
+            if (fragment := self.fragments.get(name)) is None:
+                return 0, depth
+            fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+            self._fragment_costs[name] = self._selection_set_cost(fragment_type, fragment.selection_set, depth=0)
+        cost, fragment_depth = self._fragment_costs[name]
+        return cost, depth + fragment_depth
+
+    def _field_cost(self, parent_type: GraphQLNamedType, node: FieldNode, depth: int):
+        name = node.name.value
+        # introspection is served from the schema, not from the database
+        if name.startswith("__") or not isinstance(parent_type, GraphQLObjectType) or name not in parent_type.fields:
+            return 0, depth - 1
+
+        if is_connection_wrapper(parent_type):
+            # every returned node costs 1, the wrappers themselves are free
+            weight, multiplier, depth = int(name == "node"), 1, depth - 1
+        else:
+            field = parent_type.fields[name]
+            weight = self._field_weight(parent_type, name, get_named_type(field.type))
+            multiplier = self._multiplier(field, node)
+        if node.selection_set is None:
+            return weight, depth
+
+        named_type = get_named_type(parent_type.fields[name].type)
+        children_cost, children_depth = self._selection_set_cost(named_type, node.selection_set, depth)
+        return weight + multiplier * children_cost, children_depth
+
+    @staticmethod
+    def _field_weight(parent_type: GraphQLObjectType, name: str, named_type: GraphQLNamedType) -> int:
+        field_costs = getattr(getattr(parent_type, "graphene_type", None), "field_costs", {})
+        if (weight := field_costs.get(to_snake_case(name))) is not None:
+            return weight
+        return 0 if is_leaf_type(named_type) else 1
+
+    def _multiplier(self, field: GraphQLField, node: FieldNode) -> int:
+        if "first" in field.args or "last" in field.args:
+            arguments = get_argument_values(field, node, self.variable_values)
+            requested = [arguments[arg] for arg in ("first", "last") if arguments.get(arg) is not None]
+            return max(requested) if requested else graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        if isinstance(get_nullable_type(field.type), GraphQLList):
+            return self.config["DEFAULT_LIST_SIZE"]
+        return 1
+
+
+def is_connection_wrapper(object_type: GraphQLObjectType) -> bool:
+    graphene_type = getattr(object_type, "graphene_type", None)
+    if not isinstance(graphene_type, type):
+        return False
+    return issubclass(graphene_type, Connection) or {"node", "cursor"} <= set(graphene_type._meta.fields)
+
+
+class CostAnalysisExecutionContext(ExecutionContext):
+    """
+    Execution context rejecting too expensive or too deep operations before the first resolver (and SQL) runs.
+    The computed cost is stored on the request for the rate limiter and returned in the response extensions.
+    """
+
+    def execute_operation(self, operation: OperationDefinitionNode, root_value: Any):
+        cost = QueryCostAnalyzer(self.schema, self.fragments, self.variable_values).analyze(operation)
+        self.cost = cost
+        if self.context_value is not None:
+            setattr(self.context_value, COST_REQUEST_ATTRIBUTE, cost)
+        check_query_cost(cost, operation)
+        return super().execute_operation(operation, root_value)
+
+    def build_response(self, data, errors):
+        result = super().build_response(data, errors)
+        if cost := getattr(self, "cost", None):
+            result.extensions = {**(result.extensions or {}), "cost": cost.to_dict()}
+        return result
+
+
+def check_query_cost(cost: QueryCost, operation: OperationDefinitionNode) -> None:
+    config = settings.GRAPHQL_QUERY_COST
+    if cost.depth > config["MAX_DEPTH"]:
+        error_code, params = ApiErrorCode.QUERY_TOO_DEEP, {"depth": cost.depth, "max_depth": config["MAX_DEPTH"]}
+    elif cost.cost > config["MAX_COST"]:
+        error_code, params = ApiErrorCode.QUERY_TOO_COMPLEX, {"cost": cost.cost, "max_cost": config["MAX_COST"]}
+    else:
+        return
+
+    message = get_error_message_from_error_code(error_code, **params)
+    raise GraphQLError(
+        message,
+        operation,
+        original_error=QueryCostAPIException(message=message, error_data=params, error_code=error_code),
+    )
@@ -0,0 +1,106 @@
+import gzip
+import json
+import logging
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import Promise
+from django.utils.module_loading import import_string
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class JSONSerializer:
+    """Serializer of GraphQL responses based on the standard library, handles everything `DjangoJSONEncoder` does."""
+
+    def dumps(self, data: Any, pretty: bool = False) -> str:
+        if pretty:
+            return json.dumps(data, sort_keys=True, indent=2, separators=(",", ": "), cls=DjangoJSONEncoder)
+        return json.dumps(data, separators=(",", ":"), cls=DjangoJSONEncoder)
+
+
+def _orjson_default(obj: Any) -> Any:
+    # orjson serializes dates, times and UUIDs natively
+    if isinstance(obj, Decimal | Promise):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonSerializer(JSONSerializer):
+    """Several times faster serializer using the optional `orjson` package."""
+
+    def dumps(self, data: Any, pretty: bool = False) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=_orjson_default, option=option).decode()
+
+
+@lru_cache
+def get_serializer() -> JSONSerializer:
+    serializer_class = import_string(settings.GRAPHQL_RESPONSE_ENCODING["SERIALIZER"])
+    if issubclass(serializer_class, OrjsonSerializer) and orjson is None:
+        logger.warning("orjson is not installed, GraphQL responses are serialized by the standard json module.")
+        serializer_class = JSONSerializer
+    return serializer_class()
+
+
+def get_accepted_encodings(request: HttpRequest) -> set[str]:
+    accepted = set()
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        encoding, _, params = item.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    config = settings.GRAPHQL_RESPONSE_ENCODING
+    if encoding == "br":
+        return brotli.compress(content, quality=config["BROTLI_QUALITY"])
+    return gzip.compress(content, compresslevel=config["GZIP_LEVEL"], mtime=0)
+
+
+def compress_response(request: HttpRequest, response: HttpResponse) -> HttpResponse:
+    """
+    Compresses the response body with brotli (when installed) or gzip negotiated by `Accept-Encoding`. Small
+    bodies are sent as they are, compressing them costs more than sending the saved bytes.
+    """
+    if response.streaming or response.has_header("Content-Encoding"):
+        return response
+
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if len(response.content) < settings.GRAPHQL_RESPONSE_ENCODING["COMPRESSION_MIN_SIZE"]:
+        return response
+
+    accepted = get_accepted_encodings(request)
+    encoding = "br" if brotli is not None and "br" in accepted else "gzip" if "gzip" in accepted else None
+    if encoding is None:
+        return response
+
+    response.content = compress(response.content, encoding)
+    response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(len(response.content))
+    return response
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    GraphQLError,
+    GraphQLSchema,
+    OperationDefinitionNode,
+    execute,
+    get_introspection_query,
+    get_operation_ast,
+    parse,
+    print_schema,
+    validate,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTROSPECTION_QUERY = get_introspection_query(descriptions=True)
+
+
+@lru_cache
+def get_schema_hash(schema: GraphQLSchema) -> str:
+    """Version of the schema, introspection results are valid until the SDL changes."""
+    return hashlib.sha256(print_schema(schema).encode()).hexdigest()
+
+
+def is_introspection_operation(operation: OperationDefinitionNode) -> bool:
+    return all(
+        isinstance(selection, FieldNode) and selection.name.value.startswith("__")
+        for selection in operation.selection_set.selections
+    )
+
+
+def build_snapshot(schema: GraphQLSchema, query: str = DEFAULT_INTROSPECTION_QUERY) -> dict[str, Any]:
+    result = execute(schema, parse(query))
+    if result.errors:
+        raise result.errors[0]
+    return {"schema_hash": get_schema_hash(schema), "query": query, "data": result.data}
+
+
+class IntrospectionCache:
+    """
+    Results of introspection operations per schema version, computed on first use (or loaded from a snapshot
+    made by `export_schema`) and served from memory. They don't depend on the user, so they are shared.
+    """
+
+    def __init__(self):
+        self.results: OrderedDict[tuple, ExecutionResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self._snapshot_loaded = False
+
+    @staticmethod
+    def get_key(schema: GraphQLSchema, query: str, variables: dict[str, Any] | None, operation_name: str | None):
+        return (
+            get_schema_hash(schema),
+            hashlib.sha256(query.encode()).hexdigest(),
+            json.dumps(variables or {}, sort_keys=True),
+            operation_name,
+        )
+
+    def lookup(
+        self, schema: GraphQLSchema, query: str | None, variables: dict[str, Any] | None, operation_name: str | None
+    ) -> ExecutionResult | None:
+        config = settings.GRAPHQL_INTROSPECTION_CACHE
+        # cheap check first, the document is parsed only for introspection candidates
+        if not config["ENABLED"] or not query or ("__schema" not in query and "__type" not in query):
+            return None
+        if not self._snapshot_loaded:
+            self.load_snapshot(schema, config["SNAPSHOT_FILE"])
+
+        key = self.get_key(schema, query, variables, operation_name)
+        with self._lock:
+            if (result := self.results.get(key)) is not None:
+                self.results.move_to_end(key)
+                return result
+
+        try:
+            document = parse(query)
+        except GraphQLError:
+            return None
+        operation = get_operation_ast(document, operation_name)
+        if operation is None or not is_introspection_operation(operation) or validate(schema, document):
+            # invalid operations are executed as usual, so the errors are reported the same way
+            return None
+        result = execute(schema, document, variable_values=variables, operation_name=operation_name)
+        if result.errors:
+            return None
+        self.store(key, result)
+        return result
+
+    def store(self, key: tuple, result: ExecutionResult) -> None:
+        with self._lock:
+            self.results[key] = result
+            while len(self.results) > settings.GRAPHQL_INTROSPECTION_CACHE["MAX_ENTRIES"]:
+                self.results.popitem(last=False)
+
+    def load_snapshot(self, schema: GraphQLSchema, path: str | None) -> None:
+        self._snapshot_loaded = True
+        if not path:
+            return
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Unable to load introspection snapshot %s.", path, exc_info=True)
+            return
+        if snapshot.get("schema_hash") != get_schema_hash(schema):
+            logger.warning("Introspection snapshot %s is outdated, run export_schema.", path)
+            return
+        operation = get_operation_ast(parse(snapshot["query"]))
+        # clients may or may not send the operation name
+        for operation_name in {None, operation.name.value if operation and operation.name else None}:
+            self.store(
+                self.get_key(schema, snapshot["query"], None, operation_name), ExecutionResult(data=snapshot["data"])
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self.results.clear()
+            self._snapshot_loaded = False
+
+
+introspection_cache = IntrospectionCache()
@@ -0,0 +1,23 @@
+import graphene
+from graphene.utils.thenables import maybe_thenable
+
+
+class ClientIDMutation(graphene.relay.ClientIDMutation):
+    """
+    Relay mutation passing only its own input fields to `mutate_and_get_payload`, `clientMutationId` is just
+    echoed in the payload (and used by `evidenta.middleware.idempotency.IdempotencyMiddleware`).
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def mutate(cls, root, info, input):
+        input = dict(input)
+        client_mutation_id = input.pop("client_mutation_id", None)
+
+        def on_resolve(payload):
+            payload.client_mutation_id = client_mutation_id
+            return payload
+
+        return maybe_thenable(cls.mutate_and_get_payload(root, info, **input), on_resolve)
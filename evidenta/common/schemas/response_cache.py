@@ -0,0 +1,131 @@
+import hashlib
+import json
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.http import HttpRequest
+
+from graphql import ExecutionResult, FragmentDefinitionNode, GraphQLError, OperationType, get_operation_ast, parse
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.utils import get_http_authorization
+
+from evidenta.common.cache import get_cache, get_versions, is_response_cache_enabled
+from evidenta.common.metrics import registry
+from evidenta.common.schemas.cost import collect_root_fields
+from evidenta.core.user.enums import UserRole
+
+
+KEY_PREFIX = "gql:response:"
+KEY_REQUEST_ATTRIBUTE = "graphql_cache_key"
+
+CACHE_REQUESTS = registry.counter(
+    "graphql_response_cache_requests_total",
+    "GraphQL query operations looked up in the response cache by result (hit, miss).",
+    ("result",),
+)
+
+
+def get_hit_ratio() -> float:
+    hits, misses = CACHE_REQUESTS.value(result="hit"), CACHE_REQUESTS.value(result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def authenticate_request(request: HttpRequest) -> None:
+    """
+    Resolves the JWT user before the execution (`JSONWebTokenMiddleware` does it only in the resolvers),
+    because the cache key depends on the user. The middleware doesn't authenticate the request again.
+    """
+    if request.user.is_anonymous and get_http_authorization(request) is not None:
+        if (user := authenticate(request=request)) is not None:
+            request.user = user
+
+
+def get_visibility_scope(request: HttpRequest, shared: bool) -> str:
+    """
+    Everything the response of a shared operation may depend on. Visibility of users is given by the role and
+    companies of the user (see `get_all_related_users`), permissions decide whether the fields may be resolved.
+    """
+    user = request.user
+    if user.is_anonymous:
+        return "anonymous"
+    role = user.role.name if user.role else None
+    if not shared or role == UserRole.GUEST:
+        return f"user:{user.pk}"
+    return json.dumps(
+        [
+            role,
+            user.is_superuser,
+            sorted(user.companies.values_list("pk", flat=True)),
+            sorted(user.get_all_permissions()),
+        ]
+    )
+
+
+class ResponseCache:
+    """
+    Cache of successful query operations. The key contains versions of all versioned models read before the
+    execution, so a response computed concurrently with a write is stored under versions which are outdated
+    by the write's commit and it's never served.
+    """
+
+    def get_request_key(
+        self, request: HttpRequest, query: str | None, variables: dict[str, Any] | None, operation_name: str | None
+    ) -> str | None:
+        """Key of a query operation, None for everything which must not be cached (mutations, invalid documents)."""
+        if not query:
+            return None
+        try:
+            document = parse(query)
+            operation = get_operation_ast(document, operation_name)
+            authenticate_request(request)
+        except (GraphQLError, JSONWebTokenError):
+            # invalid document or token, the error is reported by the execution
+            return None
+        if operation is None or operation.operation != OperationType.QUERY:
+            return None
+
+        # fields selected by root fragments count as well, otherwise they would bypass UNCACHED_FIELDS
+        fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        root_fields = set(collect_root_fields(operation.selection_set, fragments).values())
+        if root_fields & set(settings.GRAPHQL_RESPONSE_CACHE["UNCACHED_FIELDS"]):
+            return None
+        shared = root_fields <= set(settings.GRAPHQL_RESPONSE_CACHE["SHARED_FIELDS"])
+        return self.get_key(query, variables, operation_name, get_visibility_scope(request, shared=shared))
+
+    def lookup(
+        self, request: HttpRequest, query: str | None, variables: dict[str, Any] | None, operation_name: str | None
+    ) -> tuple[str | None, ExecutionResult | None]:
+        if not is_response_cache_enabled():
+            return None, None
+        # the key may be already computed for the ETag of the request
+        key = getattr(request, KEY_REQUEST_ATTRIBUTE, None) or self.get_request_key(
+            request, query, variables, operation_name
+        )
+        if key is None:
+            return None, None
+        if (cached := get_cache().get(key)) is None:
+            CACHE_REQUESTS.inc(result="miss")
+            return key, None
+        CACHE_REQUESTS.inc(result="hit")
+        data, extensions = cached
+        return key, ExecutionResult(data=data, extensions=extensions)
+
+    @staticmethod
+    def store(key: str, result: ExecutionResult) -> None:
+        if not result.errors:
+            get_cache().set(key, (result.data, result.extensions), timeout=settings.GRAPHQL_RESPONSE_CACHE["TIMEOUT"])
+
+    @staticmethod
+    def get_key(query: str, variables: dict[str, Any] | None, operation_name: str | None, scope: str) -> str:
+        payload = json.dumps(
+            [query, variables or {}, operation_name, scope, get_versions()], sort_keys=True, default=str
+        )
+        return KEY_PREFIX + hashlib.sha256(payload.encode()).hexdigest()
+
+
+response_cache = ResponseCache()
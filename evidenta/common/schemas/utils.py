@@ -3,6 +3,8 @@ from typing import Any, Callable
 
 from django.core.exceptions import ValidationError
 
+from graphql import FieldNode, FragmentSpreadNode, GraphQLResolveInfo, SelectionSetNode
+
 from evidenta.common.enums import ERROR_MESSAGES, ApiErrorCode
 from evidenta.common.exceptions import (
     InvalidDataAPIException,
@@ -135,3 +137,26 @@ def raise_invalid_token_exception(original_error: Exception) -> None:
 
 def get_error_message_from_error_code(error_code: ApiErrorCode, **kwargs) -> str:
     return ERROR_MESSAGES.get(error_code).format(**kwargs)
+
+
+def is_field_selected(info: GraphQLResolveInfo, *path: str) -> bool:
+    """Whether the field on `path` (relative to the resolved field) is selected, including fragments."""
+
+    def _is_selected(selection_set: SelectionSetNode | None, path: tuple[str, ...]) -> bool:
+        if selection_set is None:
+            return False
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                if selection.name.value == path[0] and (
+                    len(path) == 1 or _is_selected(selection.selection_set, path[1:])
+                ):
+                    return True
+                continue
+            fragment = (
+                info.fragments.get(selection.name.value) if isinstance(selection, FragmentSpreadNode) else selection
+            )
+            if fragment is not None and _is_selected(fragment.selection_set, path):
+                return True
+        return False
+
+    return any(_is_selected(field_node.selection_set, path) for field_node in info.field_nodes)
@@ -1,12 +1,74 @@
-from graphene_django.views import GraphQLView
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 
+from graphene_django.views import GraphQLView, HttpError
+
+from evidenta.common.cache import is_etag_enabled
 from evidenta.common.exceptions import BaseAPIException
+from evidenta.common.schemas.cost import CostAnalysisExecutionContext
+from evidenta.common.schemas.encoding import compress_response, get_serializer
+from evidenta.common.schemas.introspection import introspection_cache
+from evidenta.common.schemas.response_cache import KEY_PREFIX, KEY_REQUEST_ATTRIBUTE, response_cache
+from evidenta.middleware.instrumentation import instrument_graphql_request
+from evidenta.middleware.slow_log import log_slow_operation
+
+
+EXTENSIONS_REQUEST_ATTRIBUTE = "graphql_extensions"
 
 
 class CustomGraphQLView(GraphQLView):
+    execution_context_class = CostAnalysisExecutionContext
+
+    def dispatch(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag and etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return self.set_etag(HttpResponseNotModified(), etag)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if etag and response.status_code == 200:
+            self.set_etag(response, etag)
+        return compress_response(request, response)
+
+    @staticmethod
+    def set_etag(response, etag: str):
+        # the response depends on the user, shared caches have to revalidate it with the user's credentials
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ("Cookie", "Authorization"))
+        return response
+
+    def get_etag(self, request) -> str | None:
+        """
+        Validator of GET query operations computed from the response cache key, i.e. from the version counters
+        of the models, so a client polling unchanged data gets 304 Not Modified without the query being executed.
+        """
+        if not is_etag_enabled() or request.method != "GET" or self.batch:
+            return None
+        if self.graphiql and self.can_display_graphiql(request, {}):
+            return None
+        try:
+            query, variables, operation_name, _ = self.get_graphql_params(request, {})
+        except HttpError:
+            return None
+        if (key := response_cache.get_request_key(request, query, variables, operation_name)) is None:
+            return None
+        setattr(request, KEY_REQUEST_ATTRIBUTE, key)
+        return f'W/"{key.removeprefix(KEY_PREFIX)}"'
 
     def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
-        result = super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        cache_key = None
+        result = introspection_cache.lookup(self.schema.graphql_schema, query, variables, operation_name)
+        if result is None:
+            cache_key, result = response_cache.lookup(request, query, variables, operation_name)
+        if result is None:
+            with (
+                log_slow_operation(request, operation_name, variables),
+                instrument_graphql_request(request, operation_name),
+            ):
+                result = super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+            if cache_key:
+                response_cache.store(cache_key, result)
 
         if result.errors:
             errors = [
@@ -22,8 +84,16 @@ class CustomGraphQLView(GraphQLView):
                 for e in result.errors
             ]
             result.errors = errors
+        # graphene_django doesn't render extensions, they are added to the response in json_encode
+        setattr(request, EXTENSIONS_REQUEST_ATTRIBUTE, result.extensions)
         return result
 
+    def json_encode(self, request, d, pretty=False):
+        if extensions := getattr(request, EXTENSIONS_REQUEST_ATTRIBUTE, None):
+            d = {**d, "extensions": extensions}
+            delattr(request, EXTENSIONS_REQUEST_ATTRIBUTE)
+        return get_serializer().dumps(d, pretty=bool(self.pretty or pretty or request.GET.get("pretty")))
+
     def format_error(self, error):
         if isinstance(error, dict):
             return error
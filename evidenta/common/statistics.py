@@ -0,0 +1,164 @@
+import datetime
+import threading
+from itertools import batched
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.utils import timezone
+
+from evidenta.core.company.models import Company, FirmStatistics
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import User
+
+
+STATISTICS_KEY = ("company_id", "user__role_id", "user__is_superuser")
+# saves changing neither of these don't change the statistics (e.g. last_login)
+STATISTICS_FIELDS = {"role", "is_superuser", "updated"}
+
+_pending = threading.local()
+
+
+def get_statistics_since(days: int) -> datetime.date:
+    return timezone.localdate() - datetime.timedelta(days=days - 1)
+
+
+def _aggregate(company_ids: set[int]) -> list[FirmStatistics]:
+    # users being deleted by the deletion worker are hidden, so they are not counted either
+    memberships = Company.users.through.objects.filter(company_id__in=company_ids, user__is_deleting=False)
+    rows: dict[tuple, FirmStatistics] = {}
+
+    def _row(company_id: int, role_id: int | None, is_superuser: bool, day: datetime.date | None) -> FirmStatistics:
+        if (key := (company_id, role_id, is_superuser, day)) not in rows:
+            rows[key] = FirmStatistics(company_id=company_id, role_id=role_id, is_superuser=is_superuser, day=day)
+        return rows[key]
+
+    for *key, count in memberships.values_list(*STATISTICS_KEY).annotate(count=Count("*")):
+        _row(*key, None).users_count = count
+
+    since = get_statistics_since(settings.FIRM_STATISTICS["DAYS"])
+    since = timezone.make_aware(datetime.datetime.combine(since, datetime.time()))
+    for field in ("created", "updated"):
+        daily = (
+            memberships.filter(**{f"user__{field}__gte": since})
+            .annotate(day=TruncDate(f"user__{field}"))
+            .values_list(*STATISTICS_KEY, "day")
+            .annotate(count=Count("*"))
+        )
+        for *key, count in daily:
+            setattr(_row(*key), f"{field}_count", count)
+    return list(rows.values())
+
+
+def refresh_firm_statistics(company_ids: Iterable[int]) -> None:
+    """
+    Recomputes statistics of the given companies - a constant number of queries, whose cost depends only on
+    the number of their members. Changes of single members go through `refresh_firm_statistics_on_commit`.
+    """
+    if not (company_ids := set(company_ids)):
+        return
+    with transaction.atomic():
+        # serializes concurrent refreshes of the same companies, so their rows are never duplicated
+        list(Company.objects.select_for_update().filter(pk__in=company_ids).order_by("pk").values_list("pk"))
+        FirmStatistics.objects.filter(company_id__in=company_ids).delete()
+        FirmStatistics.objects.bulk_create(_aggregate(company_ids))
+
+
+def refresh_firm_statistics_on_commit(company_ids: Iterable[int] = (), user_ids: Iterable[int] = ()) -> None:
+    """
+    Refreshes the companies (and the current companies of the users) once the transaction commits, so a mutation
+    changing a user and its memberships in several steps refreshes each of them only once.
+    """
+    if getattr(_pending, "changes", None) is None:
+        _pending.changes = (set(), set())
+    _pending.changes[0].update(company_ids)
+    _pending.changes[1].update(user_ids)
+    # changes of a rolled back transaction stay pending and are refreshed (needlessly, but correctly) with the next one
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending() -> None:
+    if (changes := _pending.__dict__.pop("changes", None)) is None:
+        return
+    company_ids, user_ids = changes
+    if user_ids:
+        company_ids |= set(
+            Company.users.through.objects.filter(user_id__in=user_ids).values_list("company_id", flat=True)
+        )
+    refresh_firm_statistics(company_ids)
+
+
+def rebuild_firm_statistics(chunk_size: int = 500, log: Callable[[str], None] = lambda _: None) -> int:
+    """Full rebuild in chunks of companies, also drops the daily rows which fell out of the window."""
+    rebuilt = 0
+    pks = Company.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=chunk_size)
+    for chunk in batched(pks, chunk_size):
+        refresh_firm_statistics(chunk)
+        rebuilt += len(chunk)
+        log(f"{rebuilt} companies")
+    return rebuilt
+
+
+def get_firm_statistics(as_user: User, days: int) -> list[dict[str, Any]]:
+    """
+    Statistics of the companies whose members `as_user` can see, the same visibility as `get_all_related_users`
+    - all companies for supervisors and admins, own companies without superusers for clients and accountants,
+    companies and users being deleted are left out.
+    """
+    statistics = FirmStatistics.objects.filter(
+        Q(day__isnull=True) | Q(day__gte=get_statistics_since(days)), company__is_deleting=False
+    )
+    match as_user.role.name if as_user.role else None:
+        case UserRole.SUPERVISOR | UserRole.ADMIN:
+            pass
+        case UserRole.CLIENT | UserRole.ACCOUNTANT:
+            statistics = statistics.filter(company__in=as_user.companies.all(), is_superuser=False)
+        case _:
+            return []
+
+    companies: dict[int, dict[str, Any]] = {}
+    rows = (
+        statistics.values("company_id", "company__name", "role__name")
+        .annotate(users=Sum("users_count"), created=Sum("created_count"), updated=Sum("updated_count"))
+        .order_by("company__name", "company_id", "role__name")
+    )
+    for row in rows:
+        company = companies.setdefault(
+            row["company_id"],
+            {"company_id": row["company_id"], "company_name": row["company__name"], "users": 0, "roles": []},
+        )
+        company["users"] += row["users"]
+        company["roles"].append(
+            {"role": row["role__name"], "users": row["users"], "created": row["created"], "updated": row["updated"]}
+        )
+    return list(companies.values())
+
+
+def _on_user_save(sender, instance: User, created: bool, raw: bool = False, update_fields=None, **kwargs) -> None:
+    # a new user isn't a member of any company yet
+    if raw or created or (update_fields is not None and not STATISTICS_FIELDS & set(update_fields)):
+        return
+    refresh_firm_statistics_on_commit(user_ids={instance.pk})
+
+
+def _on_user_pre_delete(sender, instance: User, **kwargs) -> None:
+    # memberships are deleted in cascade, the companies are unknown afterwards
+    refresh_firm_statistics_on_commit(company_ids=instance.companies.values_list("pk", flat=True))
+
+
+def _on_membership_change(sender, instance, action: str, reverse: bool, pk_set: set[int] | None, **kwargs) -> None:
+    if action == "pre_clear":
+        refresh_firm_statistics_on_commit(
+            company_ids=instance.companies.values_list("pk", flat=True) if reverse else {instance.pk}
+        )
+    elif action in ("post_add", "post_remove") and pk_set:
+        refresh_firm_statistics_on_commit(company_ids=pk_set if reverse else {instance.pk})
+
+
+def connect_statistics_signals() -> None:
+    post_save.connect(_on_user_save, sender=User, dispatch_uid="statistics_user_post_save")
+    pre_delete.connect(_on_user_pre_delete, sender=User, dispatch_uid="statistics_user_pre_delete")
+    m2m_changed.connect(_on_membership_change, sender=Company.users.through, dispatch_uid="statistics_m2m_changed")
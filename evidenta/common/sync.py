@@ -0,0 +1,210 @@
+import base64
+import datetime
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Prefetch, Q
+from django.db.models.signals import m2m_changed, pre_delete
+from django.utils import timezone
+
+from evidenta.common.models import Tombstone
+from evidenta.core.company.models import Company
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import Role, User
+
+
+STREAMS = ("users", "companies", "roles", "tombstones")
+
+
+@dataclass
+class Changes:
+    users: list[User] = field(default_factory=list)
+    companies: list[Company] = field(default_factory=list)
+    roles: list[Role] = field(default_factory=list)
+    # (model label, pk) of objects which disappeared for the caller
+    deleted: list[tuple[str, int]] = field(default_factory=list)
+    cursor: str = ""
+    has_more: bool = False
+
+
+def encode_cursor(positions: dict[str, tuple[datetime.datetime, int]]) -> str:
+    payload = {stream: [timestamp.isoformat(), pk] for stream, (timestamp, pk) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(payload, sort_keys=True).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> dict[str, tuple[datetime.datetime, int]]:
+    """Positions of the streams, empty for the first (full) sync. Raises ValueError for a malformed cursor."""
+    if not cursor:
+        return {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            stream: (datetime.datetime.fromisoformat(timestamp), int(pk))
+            for stream, (timestamp, pk) in payload.items()
+            if stream in STREAMS
+        }
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}.") from e
+
+
+def _page(
+    queryset: models.QuerySet, field_name: str, position: tuple[datetime.datetime, int] | None, until, first: int
+) -> list:
+    # keyset pagination by the (field, pk) index, rows changed in the same instant are told apart by pk
+    queryset = queryset.filter(**{f"{field_name}__lte": until})
+    if position is not None:
+        timestamp, pk = position
+        queryset = queryset.filter(Q(**{f"{field_name}__gt": timestamp}) | Q(**{field_name: timestamp, "pk__gt": pk}))
+    return list(queryset.order_by(field_name, "pk")[: first + 1])
+
+
+def _get_visible_querysets(as_user: User) -> dict[str, models.QuerySet]:
+    companies = Company.objects.get_all_related_companies(as_user=as_user)
+    # memberships in companies the caller doesn't see are left out, by a subquery - the prefetch joins
+    # the memberships of the synced users, which `companies` of clients and accountants filter already
+    visible_companies = Company.objects.filter(pk__in=companies.values("pk")).only("pk")
+    users = User.objects.get_all_related_users(as_user=as_user).prefetch_related(
+        Prefetch("companies", queryset=visible_companies)
+    )
+    return {"users": users, "companies": companies, "roles": Role.objects.all()}
+
+
+def _get_visible_tombstones(as_user: User) -> models.QuerySet[Tombstone]:
+    if as_user.role in (UserRole.SUPERVISOR, UserRole.ADMIN):
+        return Tombstone.objects.all()
+    return Tombstone.objects.filter(Q(company_id__in=as_user.companies.values("pk")) | Q(user_id=as_user.pk))
+
+
+def get_changes_since(as_user: User, cursor: str | None, first: int) -> Changes:
+    """
+    Users, companies and roles visible to `as_user` which changed after `cursor` and the objects which disappeared
+    for the caller meanwhile, at most `first` of each. Rows changed in the last SETTLE_SECONDS are left for the next
+    call, transactions still running might commit changes older than them.
+    """
+    config = settings.DELTA_SYNC
+    positions = decode_cursor(cursor)
+    now = timezone.now()
+    if "tombstones" in positions and positions["tombstones"][0] < now - datetime.timedelta(
+        days=config["TOMBSTONE_RETENTION_DAYS"]
+    ):
+        raise ValueError("Cursor is older than the retained tombstones, a full sync is needed.")
+    until = now - datetime.timedelta(seconds=config["SETTLE_SECONDS"])
+
+    changes = Changes()
+    visible = _get_visible_querysets(as_user)
+    for stream, queryset in visible.items():
+        rows = _page(queryset, "updated", positions.get(stream), until, first)
+        changes.has_more |= len(rows) > first
+        if rows := rows[:first]:
+            setattr(changes, stream, rows)
+            positions[stream] = (rows[-1].updated, rows[-1].pk)
+
+    tombstones = _page(_get_visible_tombstones(as_user), "deleted", positions.get("tombstones"), until, first)
+    changes.has_more |= len(tombstones) > first
+    if tombstones := tombstones[:first]:
+        positions["tombstones"] = (tombstones[-1].deleted, tombstones[-1].pk)
+        models_by_label = {queryset.model._meta.label: queryset for queryset in visible.values()}
+        candidates: dict[str, set[int]] = {}
+        for tombstone in tombstones:
+            candidates.setdefault(tombstone.model, set()).add(tombstone.object_id)
+        # re-added members and the like - the object is visible again, so the tombstone doesn't apply anymore
+        still_visible = {
+            (label, pk)
+            for label, pks in candidates.items()
+            if label in models_by_label
+            for pk in models_by_label[label].filter(pk__in=pks).values_list("pk", flat=True)
+        }
+        for tombstone in tombstones:
+            key = (tombstone.model, tombstone.object_id)
+            if key not in still_visible and key not in changes.deleted:
+                changes.deleted.append(key)
+
+    changes.cursor = encode_cursor(positions)
+    return changes
+
+
+def purge_tombstones(log: Callable[[str], None] = lambda _: None) -> int:
+    """Deletes tombstones older than TOMBSTONE_RETENTION_DAYS, clients with older cursors must sync from scratch."""
+    retention = datetime.timedelta(days=settings.DELTA_SYNC["TOMBSTONE_RETENTION_DAYS"])
+    purged, _ = Tombstone.objects.filter(deleted__lt=timezone.now() - retention).delete()
+    log(f"{purged} tombstones purged")
+    return purged
+
+
+def touch_users(user_ids: Iterable[int]) -> None:
+    """Marks users as changed, their memberships are synced with them."""
+    if user_ids := set(user_ids):
+        User.objects.filter(pk__in=user_ids).update(updated=timezone.now())
+
+
+def touch_memberships(pairs: Iterable[tuple[int, int]]) -> None:
+    """
+    Marks both sides of added (user id, company id) memberships as changed - the membership is synced with
+    the user, and the company may have just become visible to the user, whose cursor is newer than the company.
+    """
+    if pairs := set(pairs):
+        touch_users(user_id for user_id, _ in pairs)
+        Company.objects.filter(pk__in={company_id for _, company_id in pairs}).update(updated=timezone.now())
+
+
+def record_removed_memberships(pairs: Iterable[tuple[int, int]]) -> None:
+    """
+    Tombstones of removed (user id, company id) memberships - the user may disappear for the members
+    of the company and the company for the user. Used by the bulk operations writing the through table.
+    """
+    if not (pairs := set(pairs)):
+        return
+    Tombstone.objects.bulk_create(
+        tombstone
+        for user_id, company_id in pairs
+        for tombstone in (
+            Tombstone(model=User._meta.label, object_id=user_id, company_id=company_id),
+            Tombstone(model=Company._meta.label, object_id=company_id, user_id=user_id),
+        )
+    )
+    touch_users(user_id for user_id, _ in pairs)
+
+
+def _on_user_delete(sender, instance: User, **kwargs) -> None:
+    # memberships are deleted in cascade, the companies are unknown afterwards
+    company_ids = instance.companies.values_list("pk", flat=True)
+    Tombstone.objects.bulk_create(
+        Tombstone(model=User._meta.label, object_id=instance.pk, company_id=company_id)
+        for company_id in (None, *company_ids)
+    )
+
+
+def _on_company_delete(sender, instance: Company, **kwargs) -> None:
+    # the former members see the company disappear, users visible through it alone aren't announced to them
+    # - clients drop users without any synced company themselves
+    user_ids = instance.users.values_list("pk", flat=True)
+    Tombstone.objects.bulk_create(
+        Tombstone(model=Company._meta.label, object_id=instance.pk, user_id=user_id) for user_id in (None, *user_ids)
+    )
+
+
+def _on_role_delete(sender, instance: Role, **kwargs) -> None:
+    Tombstone.objects.create(model=Role._meta.label, object_id=instance.pk)
+
+
+def _on_membership_change(sender, instance, action: str, reverse: bool, pk_set: set[int] | None, **kwargs) -> None:
+    # `reverse` is True for `user.companies`, pk_set contains companies then
+    if action == "pre_clear":
+        pk_set = set((instance.companies if reverse else instance.users).values_list("pk", flat=True))
+    if not pk_set:
+        return
+    pairs = {(instance.pk, pk) if reverse else (pk, instance.pk) for pk in pk_set}
+    if action in ("pre_clear", "post_remove"):
+        record_removed_memberships(pairs)
+    elif action == "post_add":
+        touch_memberships(pairs)
+
+
+def connect_sync_signals() -> None:
+    pre_delete.connect(_on_user_delete, sender=User, dispatch_uid="sync_user_pre_delete")
+    pre_delete.connect(_on_company_delete, sender=Company, dispatch_uid="sync_company_pre_delete")
+    pre_delete.connect(_on_role_delete, sender=Role, dispatch_uid="sync_role_pre_delete")
+    m2m_changed.connect(_on_membership_change, sender=Company.users.through, dispatch_uid="sync_m2m_changed")
@@ -0,0 +1,269 @@
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from graphene_django.utils.testing import graphql_query
+
+from evidenta.common.counters import refresh_company_users_count, refresh_role_users_count
+from evidenta.common.models import Tombstone
+from evidenta.common.statistics import refresh_firm_statistics
+from evidenta.common.utils import generate_company_identification_number
+from evidenta.core.company.models import Company
+from evidenta.core.user.enums import UserGender, UserRole
+from evidenta.core.user.models import Role, User
+
+
+BENCHMARK_PASSWORD = "evidentaBenchmark123"  # noqa: S105
+BENCHMARK_USER_PREFIX = "bench"
+
+# roles assigned to the seeded company members, weighted roughly like a real accounting firm
+BENCHMARK_MEMBER_ROLES = (
+    UserRole.CLIENT,
+    UserRole.CLIENT,
+    UserRole.CLIENT,
+    UserRole.ACCOUNTANT,
+    UserRole.ACCOUNTANT,
+    UserRole.GUEST,
+)
+
+
+@dataclass
+class BenchmarkDataset:
+    companies: int
+    users_per_company: int
+    admin: User
+    supervisor: User
+    accountant: User
+
+    @property
+    def users(self) -> int:
+        return self.companies * self.users_per_company
+
+    def delete(self) -> None:
+        users = User.objects.filter(username__startswith=f"{BENCHMARK_USER_PREFIX}_")
+        companies = Company.objects.filter(name__startswith=f"{BENCHMARK_USER_PREFIX}_")
+        user_ids, company_ids = list(users.values_list("pk", flat=True)), list(companies.values_list("pk", flat=True))
+        users.delete()
+        companies.delete()
+        # tombstones of the dataset would be synced to the users of the tests run afterwards
+        Tombstone.objects.filter(
+            Q(model=User._meta.label, object_id__in=user_ids) | Q(model=Company._meta.label, object_id__in=company_ids)
+        ).delete()
+
+
+@dataclass
+class BenchmarkResult:
+    operation: str
+    rounds: int
+    wall_time_ms: float
+    wall_time_max_ms: float
+    query_count: int
+    response_bytes: int
+    timings_ms: list[float] = field(default_factory=list, repr=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data.pop("timings_ms")
+        return data
+
+
+def seed_benchmark_data(companies: int, users_per_company: int, chunk_size: int = 500) -> BenchmarkDataset:
+    roles = {role.name: role for role in Role.objects.all()}
+    password = make_password(BENCHMARK_PASSWORD)
+    now = timezone.now()
+
+    company_objs = Company.objects.bulk_create(
+        [
+            Company(
+                name=f"{BENCHMARK_USER_PREFIX}_company_{i}",
+                company_identification_number=(ico := generate_company_identification_number(f"9{i:06d}")),
+                tax_identification_number=f"CZ{ico}",
+                address_1=f"Benchmark street {i}",
+                city="Evidenta Hill",
+                zip_code="12345",
+            )
+            for i in range(companies)
+        ],
+        batch_size=chunk_size,
+    )
+
+    def _user(username: str, role: UserRole, **extra) -> User:
+        return User(
+            username=username,
+            password=password,
+            first_name=username.capitalize(),
+            last_name="Benchmark",
+            email=f"{username}@benchmark.cz",
+            role=roles[role],
+            gender=UserGender.MALE,
+            date_joined=now,
+            **extra,
+        )
+
+    staff = User.objects.bulk_create(
+        [
+            _user(f"{BENCHMARK_USER_PREFIX}_admin", UserRole.ADMIN, is_superuser=True, is_staff=True),
+            _user(f"{BENCHMARK_USER_PREFIX}_supervisor", UserRole.SUPERVISOR),
+            _user(f"{BENCHMARK_USER_PREFIX}_accountant", UserRole.ACCOUNTANT),
+        ]
+    )
+    members = User.objects.bulk_create(
+        [
+            _user(
+                f"{BENCHMARK_USER_PREFIX}_{c}_{u}",
+                BENCHMARK_MEMBER_ROLES[u % len(BENCHMARK_MEMBER_ROLES)],
+            )
+            for c in range(companies)
+            for u in range(users_per_company)
+        ],
+        batch_size=chunk_size,
+    )
+
+    through = Company.users.through
+    memberships = [
+        through(company_id=company.pk, user_id=members[c * users_per_company + u].pk)
+        for c, company in enumerate(company_objs)
+        for u in range(users_per_company)
+    ]
+    memberships += [through(company_id=company.pk, user_id=staff[2].pk) for company in company_objs]
+    through.objects.bulk_create(memberships, batch_size=chunk_size)
+    refresh_company_users_count(company.pk for company in company_objs)
+    refresh_firm_statistics(company.pk for company in company_objs)
+    refresh_role_users_count(role.pk for role in roles.values())
+
+    return BenchmarkDataset(
+        companies=companies,
+        users_per_company=users_per_company,
+        admin=staff[0],
+        supervisor=staff[1],
+        accountant=staff[2],
+    )
+
+
+def run_graphql_benchmark(
+    operation: str,
+    client: Client,
+    query: Callable[[int], tuple[str, dict[str, Any] | None]],
+    rounds: int = 5,
+    warmup: int = 1,
+) -> BenchmarkResult:
+    """
+    Runs `query(round_number)` `warmup + rounds` times through the whole django stack and measures
+    median wall time, SQL query count and size of the response body. `query` is a callable, so the
+    mutations can generate unique input for every round.
+    """
+    timings, query_count, response_bytes = [], 0, 0
+    for i in range(warmup + rounds):
+        document, variables = query(i)
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = graphql_query(document, variables=variables, client=client)
+            elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, f"{operation}: unexpected response {response.content[:500]!r}"
+        assert "errors" not in response.json(), f"{operation}: {response.json()['errors']}"
+        if i < warmup:
+            continue
+        timings.append(elapsed)
+        query_count = max(query_count, len(ctx.captured_queries))
+        response_bytes = max(response_bytes, len(response.content))
+
+    return BenchmarkResult(
+        operation=operation,
+        rounds=rounds,
+        wall_time_ms=round(statistics.median(timings), 3),
+        wall_time_max_ms=round(max(timings), 3),
+        query_count=query_count,
+        response_bytes=response_bytes,
+        timings_ms=timings,
+    )
+
+
+def run_function_benchmark(
+    operation: str, function: Callable[[], bytes], rounds: int = 5, warmup: int = 1
+) -> BenchmarkResult:
+    """
+    Measures median time of `function()` without the django stack (e.g. serialization and compression of
+    a response) and size of its output.
+    """
+    timings, response_bytes = [], 0
+    for i in range(warmup + rounds):
+        start = time.perf_counter()
+        content = function()
+        elapsed = (time.perf_counter() - start) * 1000
+        if i < warmup:
+            continue
+        timings.append(elapsed)
+        response_bytes = len(content)
+
+    return BenchmarkResult(
+        operation=operation,
+        rounds=rounds,
+        wall_time_ms=round(statistics.median(timings), 3),
+        wall_time_max_ms=round(max(timings), 3),
+        query_count=0,
+        response_bytes=response_bytes,
+        timings_ms=timings,
+    )
+
+
+class BenchmarkReport:
+    def __init__(
+        self,
+        results_file: str = settings.BENCHMARK_RESULTS_FILE,
+        baseline_file: str = settings.BENCHMARK_BASELINE_FILE,
+        latency_tolerance: float = settings.BENCHMARK_LATENCY_TOLERANCE,
+    ):
+        self.results_file = results_file
+        self.latency_tolerance = latency_tolerance
+        self.baseline = self._load(baseline_file)
+        self.results: dict[str, BenchmarkResult] = {}
+        self.metadata: dict[str, Any] = {}
+
+    @staticmethod
+    def _load(path: str) -> dict[str, dict[str, Any]]:
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f).get("operations", {})
+
+    def record(self, result: BenchmarkResult, query_budget: int) -> None:
+        self.results[result.operation] = result
+        self.check(result, query_budget)
+
+    def check(self, result: BenchmarkResult, query_budget: int) -> None:
+        assert (
+            result.query_count <= query_budget
+        ), f"{result.operation}: executed {result.query_count} SQL queries, budget is {query_budget}"
+        if baseline := self.baseline.get(result.operation):
+            limit = baseline["wall_time_ms"] * self.latency_tolerance
+            assert result.wall_time_ms <= limit, (
+                f"{result.operation}: median wall time {result.wall_time_ms}ms regressed over baseline "
+                f"{baseline['wall_time_ms']}ms (tolerance x{self.latency_tolerance})"
+            )
+
+    def dump(self) -> None:
+        if not self.results:
+            return
+        os.makedirs(os.path.dirname(self.results_file) or ".", exist_ok=True)
+        with open(self.results_file, "w") as f:
+            json.dump(
+                {
+                    "created": timezone.now().isoformat(),
+                    "commit": os.environ.get("GITHUB_SHA"),
+                    **self.metadata,
+                    "operations": {name: result.to_dict() for name, result in sorted(self.results.items())},
+                },
+                f,
+                indent=2,
+            )
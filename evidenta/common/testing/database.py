@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterable
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.test.utils import setup_databases
+
+
+logger = logging.getLogger(__name__)
+
+# bump to invalidate all snapshots when the way they are built changes
+SNAPSHOT_FORMAT = 1
+POSTGRESQL_LOCK_ID = 0x65766964  # "evid"
+
+
+def get_snapshot_key(seed_files: Iterable[str | Path]) -> str:
+    """Hash of everything the migrated and seeded database depends on - migrations of all apps and seed data."""
+    digest = hashlib.sha256(f"{SNAPSHOT_FORMAT}:{django.get_version()}".encode())
+    for app_config in sorted(apps.get_app_configs(), key=lambda app_config: app_config.label):
+        for path in sorted((Path(app_config.path) / "migrations").glob("*.py")):
+            digest.update(f"{app_config.label}/{path.name}".encode())
+            digest.update(path.read_bytes())
+    for path in seed_files:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _use_test_database(connection: BaseDatabaseWrapper, test_name: str) -> None:
+    connection.close()
+    settings.DATABASES[connection.alias]["NAME"] = test_name
+    connection.settings_dict["NAME"] = test_name
+
+
+def _setup_sqlite(connection: BaseDatabaseWrapper, snapshot: Path, seed: Callable[[], None], verbosity: int):
+    if snapshot.exists():
+        old_name = connection.settings_dict["NAME"]
+        test_name = connection.creation._get_test_db_name()
+        if not connection.creation.is_in_memory_db(test_name) and os.path.exists(test_name):
+            os.remove(test_name)
+        _use_test_database(connection, test_name)
+        connection.ensure_connection()
+        # the backup API copies pages, so it works for the in-memory as well as file test databases
+        source = sqlite3.connect(snapshot)
+        try:
+            source.backup(connection.connection)
+        finally:
+            source.close()
+        if verbosity:
+            logger.info("Test database %s restored from %s.", connection.alias, snapshot)
+        return [(connection, old_name, True)]
+
+    old_config = setup_databases(verbosity, interactive=False, aliases={connection.alias}, serialized_aliases=set())
+    seed()
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    for stale in snapshot.parent.glob(f"{connection.alias}-*.sqlite3"):
+        stale.unlink(missing_ok=True)
+    # parallel workers may build the snapshot at the same time, the rename makes it appear complete or not at all
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot.parent, suffix=".tmp")
+    os.close(fd)
+    target = sqlite3.connect(tmp_path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+    os.replace(tmp_path, snapshot)
+    return old_config
+
+
+def _setup_postgresql(connection: BaseDatabaseWrapper, key: str, seed: Callable[[], None], verbosity: int):
+    template = f"{connection.settings_dict['NAME']}_snapshot_{key}"[:63]
+    test_settings = connection.settings_dict["TEST"]
+    with connection._nodb_cursor() as cursor:
+        # one worker builds the template, the others wait for it
+        cursor.execute("SELECT pg_advisory_lock(%s)", [POSTGRESQL_LOCK_ID])
+        try:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [template])
+            if cursor.fetchone() is None:
+                test_name, test_settings["NAME"] = test_settings.get("NAME"), template
+                try:
+                    old_name = connection.creation.create_test_db(verbosity, autoclobber=True, serialize=False)
+                    seed()
+                    _use_test_database(connection, old_name)
+                finally:
+                    test_settings["NAME"] = test_name
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [POSTGRESQL_LOCK_ID])
+    # CREATE DATABASE ... TEMPLATE, migrate then finds nothing to apply
+    test_settings["TEMPLATE"] = template
+    return setup_databases(verbosity, interactive=False, aliases={connection.alias}, serialized_aliases=set())
+
+
+def setup_snapshot_databases(
+    seed: Callable[[], None], seed_files: Iterable[str | Path], cache_dir: str | Path, verbosity: int = 0
+) -> list:
+    """
+    Provisions the test database from a snapshot of the migrated and seeded database, built by the first
+    run and reused until migrations or seed data change. SQLite snapshots are files in `cache_dir`
+    restored into every worker's own test database, PostgreSQL snapshots are template databases cloned by
+    `CREATE DATABASE ... TEMPLATE`. Returns the config for `django.test.utils.teardown_databases`.
+    """
+    connection = connections["default"]
+    key = get_snapshot_key(seed_files)
+    match connection.vendor:
+        case "sqlite":
+            return _setup_sqlite(connection, Path(cache_dir) / f"{connection.alias}-{key}.sqlite3", seed, verbosity)
+        case "postgresql":
+            return _setup_postgresql(connection, key, seed, verbosity)
+        case _:
+            old_config = setup_databases(verbosity, interactive=False, serialized_aliases=set())
+            seed()
+            return old_config
@@ -0,0 +1,357 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from evidenta.common.management.data.fake_data import FAKE_DATA_PREFIX, LAST_NAMES
+
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+TOKEN_AUTH_MUTATION = """
+mutation TokenAuth($input: ObtainJSONWebTokenInput!) {
+  tokenAuth(input: $input) {
+    token
+  }
+}
+"""  # noqa: S105
+
+ME_QUERY = """
+query Me {
+  me {
+    id
+    username
+    firstName
+    lastName
+    email
+  }
+}
+"""
+
+USERS_QUERY = """
+query Users($first: Int, $after: String, $role: String, $orderBy: String, $lastNameStartswith: String) {
+  users(first: $first, after: $after, role: $role, orderBy: $orderBy, lastNameStartswith: $lastNameStartswith) {
+    edges {
+      node {
+        id
+        username
+        firstName
+        lastName
+        email
+        role {
+          name
+        }
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+CREATE_USER_MUTATION = """
+mutation CreateUser($input: CreateUserInput!) {
+  createUser(input: $input) {
+    user {
+      id
+    }
+  }
+}
+"""
+
+SEND_RESET_PASSWORD_LINK_MUTATION = """
+mutation SendResetPasswordLink($input: SendResetPasswordLinkInput!) {
+  sendResetPasswordLink(input: $input) {
+    clientMutationId
+  }
+}
+"""  # noqa: S105
+
+
+@dataclass
+class ReplayContext:
+    username: str
+    password: str
+    companies: int
+    users_per_company: int
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    rng: random.Random = field(default_factory=random.Random)
+
+    def fake_username(self) -> str:
+        return f"{FAKE_DATA_PREFIX}_{self.rng.randrange(self.companies)}_{self.rng.randrange(self.users_per_company)}"
+
+
+def _no_variables(context: ReplayContext, i: int) -> None:
+    return None
+
+
+@dataclass
+class ReplayOperation:
+    name: str
+    weight: int
+    query: str
+    variables: Callable[[ReplayContext, int], dict[str, Any] | None] = _no_variables
+    authenticated: bool = True
+
+
+DEFAULT_MIX = [
+    ReplayOperation(
+        "tokenAuth",
+        5,
+        TOKEN_AUTH_MUTATION,
+        lambda context, i: {"input": {"username": context.username, "password": context.password}},
+        authenticated=False,
+    ),
+    ReplayOperation("me", 30, ME_QUERY),
+    ReplayOperation(
+        "users",
+        50,
+        USERS_QUERY,
+        lambda context, i: {
+            "first": 20,
+            "role": context.rng.choice(["client", "accountant", None]),
+            "orderBy": "last_name",
+            "lastNameStartswith": context.rng.choice(LAST_NAMES)[:2],
+        },
+    ),
+    ReplayOperation(
+        "createUser",
+        5,
+        CREATE_USER_MUTATION,
+        lambda context, i: {
+            "input": {
+                "username": f"load_{context.run_id}_{i}",
+                "firstName": "Load",
+                "lastName": "Replay",
+                "email": f"load_{context.run_id}_{i}@fake.evidenta.cz",
+                "role": "guest",
+            }
+        },
+    ),
+    ReplayOperation(
+        "sendResetPasswordLink",
+        10,
+        SEND_RESET_PASSWORD_LINK_MUTATION,
+        lambda context, i: {"input": {"email": f"{context.fake_username()}@fake.evidenta.cz"}},
+        authenticated=False,
+    ),
+]
+
+
+def _render(value: Any, i: int) -> Any:
+    if isinstance(value, str):
+        return value.replace("{i}", str(i))
+    if isinstance(value, dict):
+        return {key: _render(item, i) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_render(item, i) for item in value]
+    return value
+
+
+def _render_variables(variables: dict[str, Any] | None, context: ReplayContext, i: int) -> dict[str, Any] | None:
+    return _render(variables, i)
+
+
+def load_recorded_mix(path: str) -> list[ReplayOperation]:
+    """
+    Operations recorded as a JSON list of `{"name", "weight", "query", "variables", "authenticated"}`.
+    Every `{i}` in string variables is replaced by the request number, so the mutations get unique input.
+    """
+    with open(path) as f:
+        recorded = json.load(f)
+    return [
+        ReplayOperation(
+            name=operation["name"],
+            weight=operation.get("weight", 1),
+            query=operation["query"],
+            variables=partial(_render_variables, operation.get("variables")),
+            authenticated=operation.get("authenticated", True),
+        )
+        for operation in recorded
+    ]
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client, enough for JSON POSTs to the local dev server."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or parts.hostname not in LOCAL_HOSTS:
+            raise ValueError(f"Load replay runs only against a local http server, not {url}.")
+        self.host, self.port, self.path = parts.hostname, parts.port or 80, parts.path or "/"
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def post(self, body: bytes, headers: dict[str, str]) -> tuple[int, bytes]:
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request_headers = {
+            "Host": f"{self.host}:{self.port}",
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive",
+            **headers,
+        }
+        head = f"POST {self.path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in request_headers.items())
+        self.writer.write(head.encode() + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("Connection closed by the server.")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if "content-length" in response_headers:
+            content = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            content = await self.reader.read()
+        if response_headers.get("connection", "").lower() == "close" or "content-length" not in response_headers:
+            await self.close()
+        return status, content
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.writer = None
+
+
+@dataclass
+class OperationStats:
+    name: str
+    requests: int = 0
+    errors: int = 0
+    latencies_ms: list[float] = field(default_factory=list, repr=False)
+
+    @staticmethod
+    def percentile(values: list[float], q: int) -> float:
+        if len(values) < 2:
+            return round(values[0], 3) if values else 0.0
+        return round(statistics.quantiles(values, n=100, method="inclusive")[q - 1], 3)
+
+    def to_dict(self, elapsed: float) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "throughput_rps": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": self.percentile(self.latencies_ms, 50),
+            "p95_ms": self.percentile(self.latencies_ms, 95),
+            "p99_ms": self.percentile(self.latencies_ms, 99),
+        }
+
+
+@dataclass
+class ReplayResult:
+    url: str
+    concurrency: int
+    elapsed_s: float
+    operations: dict[str, OperationStats]
+
+    def to_dict(self) -> dict[str, Any]:
+        total = OperationStats("total")
+        for stats in self.operations.values():
+            total.requests += stats.requests
+            total.errors += stats.errors
+            total.latencies_ms += stats.latencies_ms
+        return {
+            "url": self.url,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "total": total.to_dict(self.elapsed_s),
+            "operations": {name: stats.to_dict(self.elapsed_s) for name, stats in sorted(self.operations.items())},
+        }
+
+
+async def obtain_token(url: str, context: ReplayContext) -> str:
+    connection = HttpConnection(url)
+    try:
+        status, content = await connection.post(
+            json.dumps(
+                {
+                    "query": TOKEN_AUTH_MUTATION,
+                    "variables": {"input": {"username": context.username, "password": context.password}},
+                }
+            ).encode(),
+            {},
+        )
+    finally:
+        await connection.close()
+    token = (json.loads(content).get("data") or {}).get("tokenAuth") if status == 200 else None
+    if not token:
+        raise RuntimeError(f"Unable to obtain JWT for {context.username}: {content[:200]!r}")
+    return token["token"]
+
+
+async def replay(
+    url: str,
+    mix: list[ReplayOperation],
+    context: ReplayContext,
+    concurrency: int = 10,
+    requests: int | None = None,
+    duration: float | None = None,
+) -> ReplayResult:
+    """
+    Sends operations picked from the weighted `mix` by `concurrency` workers, each with its own keep-alive
+    connection, until `requests` are sent or `duration` seconds pass. An operation fails on a non-200
+    status, a connection error or `errors` in the GraphQL response.
+    """
+    auth_header = {"Authorization": f"JWT {await obtain_token(url, context)}"}
+    stats = {operation.name: OperationStats(operation.name) for operation in mix}
+    weights = [operation.weight for operation in mix]
+    counter = iter(range(requests) if requests is not None else range(2**62))
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker() -> None:
+        connection = HttpConnection(url)
+        try:
+            for i in counter:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                operation = context.rng.choices(mix, weights=weights)[0]
+                body = json.dumps({"query": operation.query, "variables": operation.variables(context, i)}).encode()
+                start = time.perf_counter()
+                try:
+                    status, content = await connection.post(body, auth_header if operation.authenticated else {})
+                    failed = status != 200 or bool(json.loads(content).get("errors"))
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    await connection.close()
+                    failed = True
+                operation_stats = stats[operation.name]
+                operation_stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+                operation_stats.requests += 1
+                operation_stats.errors += failed
+        finally:
+            await connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return ReplayResult(url=url, concurrency=concurrency, elapsed_s=time.perf_counter() - start, operations=stats)
+
+
+def compare_results(result: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    lines = []
+    for name, current in result["operations"].items():
+        if (previous := baseline.get("operations", {}).get(name)) is None:
+            continue
+        lines.append(
+            f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms, "
+            f"throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps, "
+            f"error rate {previous['error_rate']} -> {current['error_rate']}"
+        )
+    return lines
@@ -2,12 +2,20 @@ import datetime
 import re
 import secrets
 import string
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator, ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Any
+from unittest.mock import patch
 
-from django.db import models
+from django.db import connections, models
 
 from evidenta.common.enums import ApiErrorCode
 from evidenta.common.schemas.utils import get_error_message_from_error_code
+from evidenta.common.schemas.views import CustomGraphQLView
+from evidenta.common.utils import generate_company_identification_number
 from evidenta.core.user.enums import UserGender, UserRole
 
 
@@ -92,15 +100,6 @@ def generate_random_password() -> str:
     return "".join(secrets.choice(alphabet) for _ in range(12))
 
 
-def generate_company_identification_number() -> str:
-    partial_number = "".join(secrets.choice(string.digits) for _ in range(7))
-    sum_value = 0
-    for i, weight in zip(range(7), range(8, 1, -1), strict=False):
-        sum_value += int(partial_number[i]) * weight
-    control_digit = (11 - (sum_value % 11)) % 10
-    return partial_number + str(control_digit)
-
-
 def generate_birth_number() -> str:
     year = secrets.choice(range(1900, 2024))
     month = secrets.choice(range(1, 13))
@@ -184,3 +183,146 @@ def generate_mutation_query(mutation: str, **input: dict[str, Any]) -> str:
     input_str = " ".join([f'{key}: {f"\"{val}\"" if isinstance(val, str) else val}' for key, val in input.items()])
     # fmt: on
     return query_template.format(mutation=mutation, input=input_str)
+
+
+_resolver_path: ContextVar[str | None] = ContextVar("resolver_path", default=None)
+
+_SQL_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+_SQL_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER_LITERAL = re.compile(r"\b\d+\b")
+_SQL_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    sql = _SQL_IN_LIST.sub("IN (...)", sql)
+    sql = _SQL_STRING_LITERAL.sub("?", sql)
+    sql = _SQL_NUMBER_LITERAL.sub("?", sql)
+    return _SQL_WHITESPACE.sub(" ", sql).strip()
+
+
+def normalize_resolver_path(path: list[str | int]) -> str:
+    return ".".join("*" if isinstance(key, int) else key for key in path)
+
+
+class ResolverPathMiddleware:
+    """
+    Graphene middleware remembering the path of the currently running resolver, so every captured
+    SQL statement can be attributed to the field which triggered it.
+    """
+
+    def resolve(self, next_, root, info, **kwargs):
+        token = _resolver_path.set(normalize_resolver_path(info.path.as_list()))
+        try:
+            return next_(root, info, **kwargs)
+        finally:
+            _resolver_path.reset(token)
+
+
+@dataclass
+class CapturedQuery:
+    sql: str
+    shape: str
+    resolver_path: str | None
+    duration: float
+
+
+class GraphQLQueryCapture(ContextDecorator):
+    """
+    Captures SQL executed inside the block (e.g. `graphql_query` call) and groups it by normalized shape.
+    Usable as a context manager or a decorator:
+
+        with GraphQLQueryCapture(max_queries=5) as captured:
+            graphql_query(query, client=django_client)
+
+    On exit it asserts the query budget and that no statement shape was repeated from a resolver inside a list
+    (N+1 pattern, e.g. `users.edges.*.node.role`). `max_repeats` additionally limits repeats of any shape.
+    """
+
+    def __init__(
+        self,
+        max_queries: int | None = None,
+        allow_n_plus_one: bool = False,
+        max_repeats: int | None = None,
+        using: str = "default",
+    ):
+        self.max_queries = max_queries
+        self.allow_n_plus_one = allow_n_plus_one
+        self.max_repeats = max_repeats
+        self.using = using
+        self.queries: list[CapturedQuery] = []
+        self._stack: ExitStack | None = None
+
+    def __enter__(self) -> "GraphQLQueryCapture":
+        self.queries = []
+        get_middleware = CustomGraphQLView.get_middleware
+
+        def get_middleware_with_resolver_path(view, request):
+            return [*(get_middleware(view, request) or []), ResolverPathMiddleware()]
+
+        self._stack = ExitStack()
+        self._stack.enter_context(connections[self.using].execute_wrapper(self._record))
+        self._stack.enter_context(patch.object(CustomGraphQLView, "get_middleware", get_middleware_with_resolver_path))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._stack.close()
+        if exc_type is None:
+            self.assert_budget()
+
+    def _record(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                CapturedQuery(
+                    sql=sql,
+                    shape=normalize_sql(sql),
+                    resolver_path=_resolver_path.get(),
+                    duration=time.perf_counter() - start,
+                )
+            )
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def group_by_shape(self) -> dict[str, list[CapturedQuery]]:
+        groups = defaultdict(list)
+        for query in self.queries:
+            groups[query.shape].append(query)
+        return dict(groups)
+
+    def n_plus_one(self) -> dict[str, list[CapturedQuery]]:
+        return {
+            shape: queries
+            for shape, queries in self.group_by_shape().items()
+            if len(queries) > 1 and any(q.resolver_path and "*" in q.resolver_path for q in queries)
+        }
+
+    def repeated(self) -> dict[str, list[CapturedQuery]]:
+        if self.max_repeats is None:
+            return {}
+        return {shape: queries for shape, queries in self.group_by_shape().items() if len(queries) > self.max_repeats}
+
+    def report(self, groups: dict[str, list[CapturedQuery]] | None = None) -> str:
+        groups = self.group_by_shape() if groups is None else groups
+        lines = []
+        for shape, queries in sorted(groups.items(), key=lambda item: -len(item[1])):
+            paths = sorted({q.resolver_path or "<outside resolver>" for q in queries})
+            lines.append(f"{len(queries)}x {shape}\n    from: {', '.join(paths)}")
+        return "\n".join(lines)
+
+    def assert_budget(self) -> None:
+        if self.max_queries is not None:
+            assert (
+                self.count <= self.max_queries
+            ), f"Executed {self.count} SQL queries, budget is {self.max_queries}:\n{self.report()}"
+        if not self.allow_n_plus_one and (n_plus_one := self.n_plus_one()):
+            assert not n_plus_one, f"N+1 queries detected:\n{self.report(n_plus_one)}"
+        if repeated := self.repeated():
+            assert not repeated, f"SQL repeated more than {self.max_repeats} times:\n{self.report(repeated)}"
+
+
+def assert_max_queries(max_queries: int, **kwargs) -> GraphQLQueryCapture:
+    return GraphQLQueryCapture(max_queries=max_queries, **kwargs)
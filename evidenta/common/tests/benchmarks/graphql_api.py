@@ -0,0 +1,251 @@
+from django.conf import settings
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from graphql_relay import to_global_id
+
+from evidenta.common.schemas import encoding
+from evidenta.common.testing.benchmark import (
+    BENCHMARK_PASSWORD,
+    BenchmarkDataset,
+    BenchmarkReport,
+    run_function_benchmark,
+    run_graphql_benchmark,
+)
+
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+USERS_QUERY = """
+query Users($first: Int, $role: String, $orderBy: String, $lastNameStartswith: String) {
+  users(first: $first, role: $role, orderBy: $orderBy, lastNameStartswith: $lastNameStartswith) {
+    edges {
+      node {
+        id
+        username
+        firstName
+        lastName
+        email
+        phoneNumber
+        created
+        updated
+      }
+    }
+  }
+}
+"""
+
+ME_QUERY = """
+query Me {
+  me {
+    id
+    username
+    firstName
+    lastName
+    email
+  }
+}
+"""
+
+ALL_ROLES_QUERY = """
+query AllRoles {
+  allRoles {
+    edges {
+      node {
+        id
+        name
+      }
+    }
+  }
+}
+"""
+
+CREATE_USER_MUTATION = """
+mutation CreateUser($input: CreateUserInput!) {
+  createUser(input: $input) {
+    user {
+      id
+    }
+  }
+}
+"""
+
+UPDATE_USER_MUTATION = """
+mutation UpdateUser($input: UpdateUserInput!) {
+  updateUser(input: $input) {
+    clientMutationId
+  }
+}
+"""
+
+TOKEN_AUTH_MUTATION = """
+mutation TokenAuth($input: ObtainJSONWebTokenInput!) {
+  tokenAuth(input: $input) {
+    token
+  }
+}
+"""  # noqa: S105
+
+SEND_INVITATION_LINK_MUTATION = """
+mutation SendInvitationLink($input: SendInvitationLinkInput!) {
+  sendInvitationLink(input: $input) {
+    clientMutationId
+  }
+}
+"""
+
+SEND_RESET_PASSWORD_LINK_MUTATION = """
+mutation SendResetPasswordLink($input: SendResetPasswordLinkInput!) {
+  sendResetPasswordLink(input: $input) {
+    clientMutationId
+  }
+}
+"""  # noqa: S105
+
+SEND_CHANGE_PASSWORD_OTP_TOKEN_MUTATION = """
+mutation SendChangePasswordOtpToken($input: SendChangePasswordOTPTokenInput!) {
+  sendChangePasswordOtpToken(input: $input) {
+    clientMutationId
+  }
+}
+"""  # noqa: S105
+
+
+@pytest.fixture
+def logged_client(request, benchmark_dataset: BenchmarkDataset) -> Client:
+    client = Client()
+    client.force_login(getattr(benchmark_dataset, request.param))
+    return client
+
+
+def _benchmark(report: BenchmarkReport, operation: str, client: Client, query, query_budget: int) -> None:
+    report.record(run_graphql_benchmark(operation, client, query, rounds=settings.BENCHMARK_ROUNDS), query_budget)
+
+
+@pytest.mark.parametrize(
+    "operation,logged_client,variables,query_budget",
+    [
+        ("users_first_page_as_admin", "admin", {"first": 100}, 5),
+        ("users_filtered_ordered_as_admin", "admin", {"first": 50, "role": "client", "orderBy": "-last_name"}, 5),
+        ("users_filtered_by_last_name_as_admin", "admin", {"first": 100, "lastNameStartswith": "bench"}, 5),
+    ],
+    indirect=["logged_client"],
+)
+def test_benchmark_users_query(
+    benchmark_report: BenchmarkReport, logged_client: Client, operation: str, variables: dict, query_budget: int
+) -> None:
+    _benchmark(benchmark_report, operation, logged_client, lambda _: (USERS_QUERY, variables), query_budget)
+
+
+@pytest.mark.parametrize("logged_client", ["accountant"], indirect=True)
+def test_benchmark_me_query(benchmark_report: BenchmarkReport, logged_client: Client) -> None:
+    _benchmark(benchmark_report, "me", logged_client, lambda _: (ME_QUERY, None), 2)
+
+
+@pytest.mark.parametrize("logged_client", ["admin"], indirect=True)
+def test_benchmark_all_roles_query(benchmark_report: BenchmarkReport, logged_client: Client) -> None:
+    _benchmark(benchmark_report, "all_roles", logged_client, lambda _: (ALL_ROLES_QUERY, None), 4)
+
+
+@pytest.mark.parametrize("logged_client", ["admin"], indirect=True)
+def test_benchmark_create_user_mutation(benchmark_report: BenchmarkReport, logged_client: Client) -> None:
+    def query(i: int):
+        return CREATE_USER_MUTATION, {
+            "input": {
+                "username": f"bench_created_{i}",
+                "firstName": "Created",
+                "lastName": "User",
+                "email": f"bench_created_{i}@benchmark.cz",
+                "role": "guest",
+            }
+        }
+
+    # including the update of the role's users counter
+    _benchmark(benchmark_report, "create_user", logged_client, query, 13)
+
+
+@pytest.mark.parametrize("logged_client", ["admin"], indirect=True)
+def test_benchmark_update_user_mutation(
+    benchmark_report: BenchmarkReport, benchmark_dataset: BenchmarkDataset, logged_client: Client
+) -> None:
+    user_id = to_global_id("UserNode", benchmark_dataset.accountant.pk)
+
+    def query(i: int):
+        return UPDATE_USER_MUTATION, {"input": {"userId": user_id, "firstName": f"Updated{i}", "role": "accountant"}}
+
+    _benchmark(benchmark_report, "update_user", logged_client, query, 11)
+
+
+def test_benchmark_token_auth_mutation(benchmark_report: BenchmarkReport, benchmark_dataset: BenchmarkDataset) -> None:
+    variables = {"input": {"username": benchmark_dataset.accountant.username, "password": BENCHMARK_PASSWORD}}
+    _benchmark(benchmark_report, "token_auth", Client(), lambda _: (TOKEN_AUTH_MUTATION, variables), 1)
+
+
+@pytest.mark.parametrize("logged_client", ["admin"], indirect=True)
+def test_benchmark_send_invitation_link_mutation(
+    benchmark_report: BenchmarkReport, benchmark_dataset: BenchmarkDataset, logged_client: Client
+) -> None:
+    variables = {"input": {"email": benchmark_dataset.accountant.email}}
+    _benchmark(
+        benchmark_report, "send_invitation_link", logged_client, lambda _: (SEND_INVITATION_LINK_MUTATION, variables), 7
+    )
+
+
+def test_benchmark_send_reset_password_link_mutation(
+    benchmark_report: BenchmarkReport, benchmark_dataset: BenchmarkDataset
+) -> None:
+    variables = {"input": {"email": benchmark_dataset.accountant.email}}
+    _benchmark(
+        benchmark_report,
+        "send_reset_password_link",
+        Client(),
+        lambda _: (SEND_RESET_PASSWORD_LINK_MUTATION, variables),
+        6,
+    )
+
+
+@pytest.mark.parametrize("logged_client", ["accountant"], indirect=True)
+def test_benchmark_send_change_password_otp_token_mutation(
+    benchmark_report: BenchmarkReport, benchmark_dataset: BenchmarkDataset, logged_client: Client
+) -> None:
+    variables = {"input": {"email": benchmark_dataset.accountant.email}}
+    _benchmark(
+        benchmark_report,
+        "send_change_password_otp_token",
+        logged_client,
+        lambda _: (SEND_CHANGE_PASSWORD_OTP_TOKEN_MUTATION, variables),
+        8,
+    )
+
+
+@pytest.mark.parametrize(
+    "operation,serializer_class,content_encoding",
+    [
+        ("encode_users_json", encoding.JSONSerializer, None),
+        ("encode_users_orjson", encoding.OrjsonSerializer, None),
+        ("encode_users_orjson_gzip", encoding.OrjsonSerializer, "gzip"),
+        ("encode_users_orjson_br", encoding.OrjsonSerializer, "br"),
+    ],
+)
+@pytest.mark.parametrize("logged_client", ["admin"], indirect=True)
+def test_benchmark_users_connection_encoding(
+    benchmark_report: BenchmarkReport,
+    logged_client: Client,
+    operation: str,
+    serializer_class: type[encoding.JSONSerializer],
+    content_encoding: str | None,
+) -> None:
+    if serializer_class is encoding.OrjsonSerializer and encoding.orjson is None:
+        pytest.skip("orjson is not installed")
+    if content_encoding == "br" and encoding.brotli is None:
+        pytest.skip("brotli is not installed")
+
+    data = graphql_query(USERS_QUERY, variables={"first": 100}, client=logged_client).json()
+    serializer = serializer_class()
+
+    def encode() -> bytes:
+        content = serializer.dumps(data).encode()
+        return encoding.compress(content, content_encoding) if content_encoding else content
+
+    benchmark_report.record(run_function_benchmark(operation, encode, rounds=settings.BENCHMARK_ROUNDS), 0)
@@ -0,0 +1,118 @@
+from django.core.management import call_command
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+
+from evidenta.common.counters import reconcile_counters
+from evidenta.common.deletion import process_deletion_tasks
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.company.models import Company
+from evidenta.core.company.service import CompanyService
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import Role, User
+
+
+ALL_ROLES_QUERY = """
+query AllRoles {
+  allRoles {
+    edges {
+      node {
+        name
+        usersCount
+      }
+    }
+  }
+}
+"""
+
+
+def _role_counts() -> dict[str, int]:
+    return dict(Role.objects.values_list("name", "users_count"))
+
+
+def _actual_role_counts() -> dict[str, int]:
+    return {role.name: role.user_set.count() for role in Role.objects.all()}
+
+
+def _company_count(company: Company) -> int:
+    company.refresh_from_db(fields=["users_count"])
+    return company.users_count
+
+
+@pytest.mark.django_db
+def test_role_counter_should_follow_saves_and_deletes(random_user: User) -> None:
+    assert_equal(_role_counts(), _actual_role_counts())
+
+    random_user.role = Role.objects.get(name=UserRole.SUPERVISOR)
+    random_user.save()
+    assert_equal(_role_counts(), _actual_role_counts())
+
+    User.objects.get(pk=random_user.pk).delete()
+    assert_equal(_role_counts(), _actual_role_counts())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_company_counter_should_follow_membership_changes(random_company: Company, random_users: list[User]) -> None:
+    random_company.users.add(*random_users)
+    assert_equal(_company_count(random_company), 3)
+
+    random_company.users.remove(random_users[0])
+    assert_equal(_company_count(random_company), 2)
+
+    random_users[1].companies.clear()
+    assert_equal(_company_count(random_company), 1)
+
+    random_users[2].delete()
+    assert_equal(_company_count(random_company), 0)
+
+    random_users[0].companies.set([random_company])
+    assert_equal(_company_count(random_company), 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(3, 2)], indirect=True)
+def test_counters_should_follow_bulk_operations(
+    admin: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    first, second = random_companies
+    first.users.set(random_users)
+    CompanyService().assign_memberships(
+        as_user=admin, add=[(user.pk, second.pk) for user in random_users], remove=[(random_users[0].pk, first.pk)]
+    )
+    assert_equal([_company_count(first), _company_count(second)], [2, 3])
+
+    User.objects.update_many(
+        [user.pk for user in random_users[:2]], as_user=admin, role=UserRole.ACCOUNTANT, companies=[first.pk]
+    )
+    assert_equal([_company_count(first), _company_count(second)], [3, 1])
+    assert_equal(_role_counts(), _actual_role_counts())
+
+    User.objects.delete_many([user.pk for user in random_users], as_user=admin)
+    process_deletion_tasks()
+    assert_equal([_company_count(first), _company_count(second)], [0, 0])
+    assert_equal(_role_counts(), _actual_role_counts())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_reconcile_counters_should_repair_drift(random_company: Company, random_users: list[User]) -> None:
+    random_company.users.set(random_users)
+    Company.objects.filter(pk=random_company.pk).update(users_count=42)
+    Role.objects.filter(name=UserRole.GUEST).update(users_count=0)
+
+    repaired = reconcile_counters(chunk_size=1)
+
+    assert_equal(repaired, {"user.Role": 1, "company.Company": 1})
+    assert_equal(_company_count(random_company), 2)
+    assert_equal(_role_counts(), _actual_role_counts())
+    call_command("reconcile_counters", stdout=None)
+    assert_equal(reconcile_counters(), {"user.Role": 0, "company.Company": 0})
+
+
+@pytest.mark.django_db
+def test_roles_should_expose_users_count(admin_client: Client, random_user: User) -> None:
+    response = graphql_query(ALL_ROLES_QUERY, client=admin_client)
+    counts = {edge["node"]["name"]: edge["node"]["usersCount"] for edge in response.json()["data"]["allRoles"]["edges"]}
+    assert_equal(counts, {name.upper(): count for name, count in _actual_role_counts().items()})
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.db import connection
+
+import pytest
+
+from evidenta.common.testing.database import get_snapshot_key
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import Role
+
+
+def test_snapshot_key_should_change_with_seed_data(tmp_path: Path) -> None:
+    seed_file = tmp_path / "seed.json"
+    seed_file.write_text("[]")
+    key = get_snapshot_key([seed_file])
+
+    assert_equal(get_snapshot_key([seed_file]), key)
+    seed_file.write_text('[{"model": "user.role"}]')
+    assert get_snapshot_key([seed_file]) != key
+
+
+@pytest.mark.django_db
+def test_test_database_should_be_migrated_and_seeded() -> None:
+    assert_equal(set(Role.objects.values_list("name", flat=True)), set(UserRole.values))
+    assert connection.introspection.django_table_names(only_existing=True)
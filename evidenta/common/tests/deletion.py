@@ -0,0 +1,205 @@
+import datetime
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from graphql_relay import to_global_id
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common import deletion
+from evidenta.common.counters import reconcile_counters
+from evidenta.common.deletion import claim_next_task, process_deletion_tasks, run_deletion_task
+from evidenta.common.enums import ApiErrorCode, DeletionStatus
+from evidenta.common.models import DeletionTask, Tombstone
+from evidenta.common.statistics import get_firm_statistics, rebuild_firm_statistics
+from evidenta.common.testing.utils import assert_equal, extract_error_code_from_graphql_error_response
+from evidenta.core.auth.models import Token
+from evidenta.core.auth.service import AuthService
+from evidenta.core.company.models import Company, FirmStatistics
+from evidenta.core.user.models import Role, User
+
+
+DELETE_USER_MUTATION = """
+mutation DeleteUser($input: DeleteUserInput!) {
+  deleteUser(input: $input) {
+    deletionTaskId
+  }
+}
+"""
+
+DELETION_TASK_QUERY = """
+query DeletionTask($id: Int!) {
+  deletionTask(id: $id) {
+    status
+    deleted {
+      model
+      count
+    }
+  }
+}
+"""
+
+
+def _task(task: DeletionTask) -> DeletionTask:
+    task.refresh_from_db()
+    return task
+
+
+@pytest.mark.django_db
+def test_requested_user_should_be_hidden_until_deleted(admin: User, random_company: Company, random_user: User) -> None:
+    random_company.users.add(random_user)
+    AuthService.create_token_for_user(random_user, 10)
+
+    task = User.objects.delete(user_id=random_user.pk, as_user=admin)
+
+    random_user.refresh_from_db()
+    assert_equal([random_user.is_deleting, random_user.is_active, task.status], [True, False, DeletionStatus.PENDING])
+    assert not User.objects.get_all_related_users(as_user=admin).filter(pk=random_user.pk).exists()
+    assert_equal(Token.objects.filter(user=random_user).count(), 1)
+    with pytest.raises(User.DoesNotExist):
+        User.objects.delete(user_id=random_user.pk, as_user=admin)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_requested_user_should_not_be_counted(
+    admin: User, random_company: Company, random_users: list[User], django_capture_on_commit_callbacks
+) -> None:
+    deleted, kept = random_users
+    with django_capture_on_commit_callbacks(execute=True):
+        random_company.users.set(random_users)
+    role_count = Role.objects.get(pk=deleted.role_id).users_count
+
+    with django_capture_on_commit_callbacks(execute=True):
+        User.objects.delete(user_id=deleted.pk, as_user=admin)
+    [statistics] = get_firm_statistics(as_user=admin, days=7)
+    assert_equal(statistics["users"], 1)
+    assert_equal(Company.objects.get(pk=random_company.pk).users_count, 1)
+    assert_equal(Role.objects.get(pk=deleted.role_id).users_count, role_count - 1)
+
+    # the worker deleting the user doesn't subtract the user again
+    with django_capture_on_commit_callbacks(execute=True):
+        process_deletion_tasks()
+    assert_equal(Company.objects.get(pk=random_company.pk).users_count, 1)
+    assert_equal(Role.objects.get(pk=deleted.role_id).users_count, role_count - 1)
+    assert_equal(reconcile_counters(), {"user.Role": 0, "company.Company": 0})
+
+
+@pytest.mark.django_db
+def test_requested_company_should_be_left_out_of_statistics(
+    admin: User, random_company: Company, random_user: User, django_capture_on_commit_callbacks
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        random_company.users.add(random_user)
+    Company.objects.delete(company_id=random_company.pk, as_user=admin)
+    assert_equal(get_firm_statistics(as_user=admin, days=7), [])
+
+
+@pytest.mark.django_db
+def test_worker_should_delete_dependents_in_chunks(admin: User, random_company: Company, random_user: User) -> None:
+    random_company.users.add(random_user)
+    for _ in range(5):
+        AuthService.create_token_for_user(random_user, 10)
+    task = User.objects.delete(user_id=random_user.pk, as_user=admin)
+
+    with patch.object(deletion, "_save_progress", wraps=deletion._save_progress) as save:
+        assert_equal(process_deletion_tasks(chunk_size=2), 1)
+
+    # 3 chunks of tokens, 1 of memberships and the final delete
+    assert_equal(save.call_count, 5)
+    assert_equal(_task(task).status, DeletionStatus.DONE)
+    assert_equal(task.progress["custom_auth.Token"], 5)
+    assert_equal(task.progress["user.User"], 1)
+    assert not User.objects.filter(pk=random_user.pk).exists()
+    random_company.refresh_from_db()
+    assert_equal(random_company.users_count, 0)
+    assert Tombstone.objects.filter(model="user.User", object_id=random_user.pk, company_id=random_company.pk).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_worker_should_delete_company_with_memberships(
+    admin: User, random_company: Company, random_users: list[User]
+) -> None:
+    random_company.users.set(random_users)
+    rebuild_firm_statistics()
+
+    task = Company.objects.delete(company_id=random_company.pk, as_user=admin)
+    assert not Company.objects.get_all_related_companies(as_user=admin).filter(pk=random_company.pk).exists()
+    process_deletion_tasks(chunk_size=2)
+
+    assert_equal(_task(task).status, DeletionStatus.DONE)
+    assert_equal(task.progress["company.Company_users"], 3)
+    assert not Company.objects.filter(pk=random_company.pk).exists()
+    assert not FirmStatistics.objects.filter(company_id=random_company.pk).exists()
+    assert_equal(User.objects.filter(pk__in=[user.pk for user in random_users]).count(), 3)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_failed_task_should_continue_where_it_stopped(
+    admin: User, random_company: Company, random_users: list[User]
+) -> None:
+    random_company.users.set(random_users)
+    task = Company.objects.delete(company_id=random_company.pk, as_user=admin)
+    original = Company.objects.memberships_changed
+
+    def _fail_second_chunk(*args, **kwargs):
+        if not Company.users.through.objects.filter(company=random_company).exists():
+            raise RuntimeError("connection lost")
+        original(*args, **kwargs)
+
+    with patch.object(Company.objects, "memberships_changed", side_effect=_fail_second_chunk):
+        run_deletion_task(claim_next_task(), chunk_size=1)
+    assert_equal(_task(task).status, DeletionStatus.FAILED)
+    assert_equal([task.error, task.progress], ["connection lost", {"company.Company_users": 1}])
+
+    run_deletion_task(task, chunk_size=1)
+    assert_equal(_task(task).status, DeletionStatus.DONE)
+    assert_equal(task.progress, {"company.Company_users": 2, "company.Company": 1})
+
+
+@pytest.mark.django_db
+def test_stale_running_task_should_be_claimed_again(admin: User, random_user: User) -> None:
+    task = User.objects.delete(user_id=random_user.pk, as_user=admin)
+    assert_equal(claim_next_task().pk, task.pk)
+    assert_equal(claim_next_task(), None)
+
+    DeletionTask.objects.filter(pk=task.pk).update(updated=timezone.now() - datetime.timedelta(hours=1))
+    assert_equal(claim_next_task().pk, task.pk)
+
+
+@pytest.mark.django_db
+def test_deletion_task_query_should_report_progress(admin_client: Client, random_user: User, client: User) -> None:
+    variables = {"input": {"userId": to_global_id("UserNode", random_user.pk)}}
+    task_id = graphql_query(DELETE_USER_MUTATION, variables=variables, client=admin_client).json()["data"][
+        "deleteUser"
+    ]["deletionTaskId"]
+    call_command("run_deletion_worker", "--once", stdout=None)
+
+    response = graphql_query(DELETION_TASK_QUERY, variables={"id": task_id}, client=admin_client).json()
+    assert_equal(response["data"]["deletionTask"], {"status": "DONE", "deleted": [{"model": "user.User", "count": 1}]})
+
+    other_client = Client()
+    other_client.force_login(client)
+    response = graphql_query(DELETION_TASK_QUERY, variables={"id": task_id}, client=other_client).json()
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.OBJECT_NOT_FOUND.value)
+
+
+@pytest.mark.django_db
+def test_deletion_task_query_should_not_be_cached(
+    admin: User, admin_client: Client, random_user: User, settings: SettingsWrapper
+) -> None:
+    settings.GRAPHQL_RESPONSE_CACHE = {**settings.GRAPHQL_RESPONSE_CACHE, "ENABLED": True}
+    task = User.objects.delete(user_id=random_user.pk, as_user=admin)
+    response = graphql_query(DELETION_TASK_QUERY, variables={"id": task.pk}, client=admin_client).json()
+    assert_equal(response["data"]["deletionTask"]["status"], "PENDING")
+
+    # the worker writes status and progress by update(), without bumping the versions of cached responses
+    claim_next_task()
+    response = graphql_query(DELETION_TASK_QUERY, variables={"id": task.pk}, client=admin_client).json()
+    assert_equal(response["data"]["deletionTask"]["status"], "RUNNING")
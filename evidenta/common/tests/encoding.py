@@ -0,0 +1,90 @@
+import gzip
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.utils.translation import gettext_lazy
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.schemas.encoding import JSONSerializer, OrjsonSerializer, compress_response, get_accepted_encodings
+from evidenta.common.testing.utils import assert_equal
+
+
+DATA = {
+    "date": date(2024, 1, 31),
+    "datetime": datetime(2024, 1, 31, 12, 30, tzinfo=timezone.utc),
+    "decimal": Decimal("10.50"),
+    "lazy": gettext_lazy("Admin"),
+}
+
+USERS_QUERY = """
+query Users {
+  users {
+    edges {
+      node {
+        username
+        email
+      }
+    }
+  }
+}
+"""
+
+
+def test_json_serializer_should_handle_django_types() -> None:
+    assert_equal(
+        json.loads(JSONSerializer().dumps(DATA)),
+        {"date": "2024-01-31", "datetime": "2024-01-31T12:30:00Z", "decimal": "10.50", "lazy": "Admin"},
+    )
+
+
+def test_orjson_serializer_should_handle_django_types() -> None:
+    pytest.importorskip("orjson")
+    assert_equal(
+        json.loads(OrjsonSerializer().dumps(DATA)),
+        {"date": "2024-01-31", "datetime": "2024-01-31T12:30:00+00:00", "decimal": "10.50", "lazy": "Admin"},
+    )
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [("gzip, deflate, br", {"gzip", "deflate", "br"}), ("gzip;q=0, br;q=0.5", {"br"}), ("", {""})],
+)
+def test_get_accepted_encodings_should_skip_refused_encodings(accept_encoding: str, expected: set[str]) -> None:
+    request = RequestFactory().get("/graphql", HTTP_ACCEPT_ENCODING=accept_encoding)
+    assert_equal(get_accepted_encodings(request), expected)
+
+
+def test_small_response_should_not_be_compressed(settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_RESPONSE_ENCODING = {**settings.GRAPHQL_RESPONSE_ENCODING, "COMPRESSION_MIN_SIZE": 100}
+    request = RequestFactory().get("/graphql", HTTP_ACCEPT_ENCODING="gzip")
+    response = compress_response(request, HttpResponse(b"{}"))
+    assert not response.has_header("Content-Encoding")
+    assert_equal(response["Vary"], "Accept-Encoding")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [20], indirect=True)
+def test_large_response_should_be_compressed_with_negotiated_encoding(
+    settings: SettingsWrapper, admin_client: Client, random_users
+) -> None:
+    settings.GRAPHQL_RESPONSE_ENCODING = {**settings.GRAPHQL_RESPONSE_ENCODING, "COMPRESSION_MIN_SIZE": 100}
+    response = graphql_query(USERS_QUERY, client=admin_client, headers={"Accept-Encoding": "gzip"})
+
+    assert_equal(response["Content-Encoding"], "gzip")
+    assert_equal(len(json.loads(gzip.decompress(response.content))["data"]["users"]["edges"]), 21)
+
+
+@pytest.mark.django_db
+def test_brotli_should_be_preferred_when_installed(settings: SettingsWrapper, admin_client: Client) -> None:
+    brotli = pytest.importorskip("brotli")
+    settings.GRAPHQL_RESPONSE_ENCODING = {**settings.GRAPHQL_RESPONSE_ENCODING, "COMPRESSION_MIN_SIZE": 10}
+    response = graphql_query(USERS_QUERY, client=admin_client, headers={"Accept-Encoding": "gzip, br"})
+
+    assert_equal(response["Content-Encoding"], "br")
+    assert "users" in json.loads(brotli.decompress(response.content))["data"]
@@ -0,0 +1,120 @@
+import csv
+import io
+import zipfile
+from datetime import date
+from xml.etree import ElementTree
+
+from django.test import Client
+
+import pytest
+
+from evidenta.common.export import stream_csv, stream_xlsx
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.company.models import Company
+from evidenta.core.user.models import User
+
+
+SHEET_NAMESPACE = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+ROWS = [(1, "Novák", date(2000, 1, 2)), (2, "<Svoboda & syn>\x01", None), (3, "Dvořák", date(1990, 5, 6))]
+
+
+def _read_csv(content: bytes) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(content.decode("utf-8-sig"))))
+
+
+def _read_xlsx(content: bytes) -> list[list[str]]:
+    with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+        assert workbook.testzip() is None
+        sheet = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))  # noqa: S314
+    return [
+        ["".join(cell.itertext()) for cell in row.findall("s:c", SHEET_NAMESPACE)]
+        for row in sheet.iterfind("s:sheetData/s:row", SHEET_NAMESPACE)
+    ]
+
+
+def test_csv_should_be_streamed_by_chunks() -> None:
+    chunks = list(stream_csv(["id", "name", "birthday"], iter(ROWS), chunk_size=2))
+
+    assert_equal(len(chunks), 3)
+    assert_equal(
+        _read_csv(b"".join(chunks)),
+        [
+            ["id", "name", "birthday"],
+            ["1", "Novák", "2000-01-02"],
+            ["2", "<Svoboda & syn>\x01", ""],
+            ["3", "Dvořák", "1990-05-06"],
+        ],
+    )
+
+
+def test_csv_should_not_contain_formulas() -> None:
+    rows = [(1, '=HYPERLINK("http://x")', "+420 123", "-1", "@SUM(A1)", "\tx", -1, "a=b")]
+    content = b"".join(stream_csv(["id", "a", "b", "c", "d", "e", "f", "g"], iter(rows), chunk_size=10))
+
+    assert_equal(
+        _read_csv(content)[1],
+        ["1", '\'=HYPERLINK("http://x")', "'+420 123", "'-1", "'@SUM(A1)", "'\tx", "-1", "a=b"],
+    )
+
+
+def test_xlsx_should_be_streamed_by_chunks() -> None:
+    chunks = list(stream_xlsx(["id", "name", "birthday"], iter(ROWS), chunk_size=2))
+
+    assert_equal(len(chunks), 3)
+    assert_equal(
+        _read_xlsx(b"".join(chunks)),
+        [
+            ["id", "name", "birthday"],
+            ["1", "Novák", "2000-01-02"],
+            ["2", "<Svoboda & syn>", ""],
+            ["3", "Dvořák", "1990-05-06"],
+        ],
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_users_export_should_contain_all_related_users(admin_client: Client, random_users: list[User]) -> None:
+    response = admin_client.get("/export/users.csv")
+
+    assert response.streaming
+    assert_equal(response["Content-Disposition"], 'attachment; filename="users.csv"')
+    rows = _read_csv(b"".join(response.streaming_content))
+    assert_equal([row[1] for row in rows[1:]], list(User.objects.order_by("pk").values_list("username", flat=True)))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_users_export_should_contain_only_visible_users(
+    django_client: Client, guest: User, random_users: list[User]
+) -> None:
+    guest.add_permission("view_user")
+    django_client.force_login(guest)
+    rows = _read_csv(b"".join(django_client.get("/export/users.csv").streaming_content))
+    assert_equal([row[:2] for row in rows[1:]], [[str(guest.pk), guest.username]])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_companies", [2], indirect=True)
+def test_companies_export_should_be_xlsx(admin_client: Client, random_companies: list[Company]) -> None:
+    response = admin_client.get("/export/companies.xlsx")
+
+    rows = _read_xlsx(b"".join(response.streaming_content))
+    assert_equal([row[1] for row in rows[1:]], [company.name for company in random_companies])
+
+
+@pytest.mark.django_db
+def test_export_should_require_login(django_client: Client) -> None:
+    assert_equal(django_client.get("/export/users.csv").status_code, 401)
+
+
+@pytest.mark.django_db
+def test_export_should_require_view_permission(django_client: Client, guest: User) -> None:
+    django_client.force_login(guest)
+    assert_equal(django_client.get("/export/companies.csv").status_code, 403)
+    assert_equal(django_client.get("/export/users.csv").status_code, 403)
+
+
+@pytest.mark.django_db
+def test_unknown_export_format_should_not_be_found(admin_client: Client) -> None:
+    assert_equal(admin_client.get("/export/users.pdf").status_code, 404)
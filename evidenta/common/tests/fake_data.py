@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+import pytest
+
+from evidenta.common.counters import reconcile_counters
+from evidenta.common.management.data.fake_data import FAKE_ADMIN_USERNAME, FAKE_DATA_PASSWORD, delete_fake_data
+from evidenta.common.models import Tombstone
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.auth.models import Token
+from evidenta.core.company.models import Company
+from evidenta.core.company.validators import CompanyIdentificationNumberValidator
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import User
+
+
+def _generate(**options) -> None:
+    call_command("generate_fake_data", companies=6, users_per_company=30, chunk_size=50, stdout=StringIO(), **options)
+
+
+def _snapshot() -> list[tuple]:
+    return list(
+        User.objects.filter(username__startswith="fake_")
+        .order_by("username")
+        .values_list("username", "first_name", "last_name", "role__name", "birthday")
+    )
+
+
+@pytest.mark.django_db
+def test_generate_fake_data_should_create_valid_dataset() -> None:
+    _generate()
+
+    companies = Company.objects.filter(name__startswith="fake_")
+    users = User.objects.filter(username__startswith="fake_").exclude(username=FAKE_ADMIN_USERNAME)
+    assert_equal(companies.count(), 6)
+    assert_equal(users.count(), 180)
+    for company in companies:
+        CompanyIdentificationNumberValidator(None)(company.company_identification_number)
+        assert company.users.exists()
+    assert_equal(set(users.values_list("role__name", flat=True)), set(UserRole.values))
+    assert_equal(Token.objects.filter(user__in=users).count(), users.filter(role__name=UserRole.GUEST).count())
+    assert not users.filter(companies=None).exists()
+    assert User.objects.get(username=FAKE_ADMIN_USERNAME).check_password(FAKE_DATA_PASSWORD)
+
+
+@pytest.mark.django_db
+def test_generate_fake_data_should_be_reproducible() -> None:
+    _generate(seed=42)
+    first = _snapshot()
+    _generate(seed=42, clear=True)
+    assert_equal(_snapshot(), first)
+
+    delete_fake_data()
+    _generate(seed=43)
+    assert _snapshot() != first
+
+
+@pytest.mark.django_db
+def test_delete_fake_data_should_delete_in_chunks_and_keep_counters_consistent() -> None:
+    _generate()
+    user_ids = set(User.objects.filter(username__startswith="fake_").values_list("pk", flat=True))
+
+    delete_fake_data(chunk_size=7)
+
+    assert not User.objects.filter(username__startswith="fake_").exists()
+    assert not Company.objects.filter(name__startswith="fake_").exists()
+    assert not Company.users.through.objects.filter(user_id__in=user_ids).exists()
+    assert not Token.objects.filter(user_id__in=user_ids).exists()
+    assert_equal(reconcile_counters(), {"user.Role": 0, "company.Company": 0})
+    assert_equal(set(Tombstone.objects.filter(model="user.User").values_list("object_id", flat=True)), user_ids)
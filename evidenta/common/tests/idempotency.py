@@ -0,0 +1,146 @@
+import threading
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.exceptions import MutationInProgressAPIException
+from evidenta.common.testing.utils import assert_equal, extract_error_code_from_graphql_error_response
+from evidenta.core.user.models import User
+from evidenta.core.user.service import UserService
+from evidenta.middleware.idempotency import IdempotentExecution, _warn_process_local_cache
+
+
+CREATE_USER_MUTATION = """
+mutation CreateUser($input: CreateUserInput!) {
+  createUser(input: $input) {
+    clientMutationId
+    user {
+      id
+      username
+    }
+  }
+}
+"""
+
+
+@pytest.fixture(autouse=True)
+def idempotency(settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_IDEMPOTENCY = {**settings.GRAPHQL_IDEMPOTENCY, "ENABLED": True, "POLL_INTERVAL": 0.01}
+    cache.clear()
+
+
+def _create_user(client: Client, client_mutation_id: str | None, username: str = "retried"):
+    variables = {
+        "input": {
+            "username": username,
+            "firstName": "Retried",
+            "lastName": "User",
+            "email": f"{username}@evidenta.cz",
+            "role": "client",
+            "clientMutationId": client_mutation_id,
+        }
+    }
+    return graphql_query(CREATE_USER_MUTATION, variables=variables, client=client).json()
+
+
+@pytest.mark.django_db
+def test_retried_mutation_should_return_stored_payload(admin_client: Client) -> None:
+    with patch.object(UserService, "invite_user") as mock_invite:
+        first = _create_user(admin_client, "1")
+        retry = _create_user(admin_client, "1")
+
+    assert_equal(retry, first)
+    assert_equal(first["data"]["createUser"]["clientMutationId"], "1")
+    assert_equal(User.objects.filter(username="retried").count(), 1)
+    mock_invite.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_reused_client_mutation_id_with_another_input_should_be_rejected(admin_client: Client) -> None:
+    with patch.object(UserService, "invite_user"):
+        _create_user(admin_client, "0")
+        response = _create_user(admin_client, "0", username="restarted")
+
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.IDEMPOTENCY_KEY_REUSED.value)
+    assert not User.objects.filter(username="restarted").exists()
+
+
+@pytest.mark.django_db
+def test_mutation_without_client_mutation_id_should_run_every_time(admin_client: Client) -> None:
+    with patch.object(UserService, "invite_user"):
+        _create_user(admin_client, None)
+        response = _create_user(admin_client, None)
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.INVALID_VALUES.value)
+
+
+@pytest.mark.django_db
+def test_mutations_of_different_users_should_not_share_payload(admin_client: Client, client: User) -> None:
+    other_client = Client()
+    other_client.force_login(client)
+    with patch.object(UserService, "invite_user"):
+        _create_user(admin_client, "1")
+        response = _create_user(other_client, "1", username="other")
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.PERMISSION_REQUIRED.value)
+
+
+@pytest.mark.django_db
+def test_failed_mutation_should_not_be_stored(admin_client: Client) -> None:
+    with patch.object(UserService, "invite_user", side_effect=[ValueError("smtp down"), None]):
+        failed = _create_user(admin_client, "1")
+        retry = _create_user(admin_client, "1")
+    assert_equal(extract_error_code_from_graphql_error_response(failed), ApiErrorCode.UNEXPECTED_ERROR.value)
+    assert_equal(retry["data"]["createUser"]["user"]["username"], "retried")
+
+
+def test_concurrent_duplicate_should_wait_for_first_execution() -> None:
+    started, release = threading.Event(), threading.Event()
+
+    def _slow_mutation():
+        started.set()
+        release.wait(5)
+        return "payload"
+
+    execute = Mock(side_effect=_slow_mutation)
+    results = []
+    first = threading.Thread(target=lambda: results.append(IdempotentExecution("key").run(execute, "m", "1")))
+    first.start()
+    started.wait(5)
+    duplicate = threading.Thread(target=lambda: results.append(IdempotentExecution("key").run(execute, "m", "1")))
+    duplicate.start()
+    # the duplicate is polling for the payload of the first execution meanwhile
+    duplicate.join(0.1)
+    release.set()
+    first.join(5)
+    duplicate.join(5)
+
+    assert_equal(results, ["payload", "payload"])
+    execute.assert_called_once()
+
+
+def test_duplicate_should_fail_when_first_execution_runs_too_long(settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_IDEMPOTENCY = {**settings.GRAPHQL_IDEMPOTENCY, "WAIT_TIMEOUT": 0}
+    cache.add(IdempotentExecution("key").lock_key, "other execution")
+    with pytest.raises(MutationInProgressAPIException):
+        IdempotentExecution("key").run(Mock(), "m", "1")
+
+
+@pytest.mark.django_db
+def test_mutations_should_run_without_deduplication_without_shared_cache(
+    admin_client: Client, settings: SettingsWrapper, caplog: pytest.LogCaptureFixture
+) -> None:
+    settings.ALLOW_PROCESS_LOCAL_CACHE = False
+    _warn_process_local_cache.cache_clear()
+    with patch.object(UserService, "invite_user"):
+        first = _create_user(admin_client, "1")
+        retry = _create_user(admin_client, "1")
+
+    assert_equal(first["data"]["createUser"]["user"]["username"], "retried")
+    # executed again, the username is taken already
+    assert_equal(extract_error_code_from_graphql_error_response(retry), ApiErrorCode.INVALID_VALUES.value)
+    assert_equal(caplog.text.count("Idempotent mutations need a cache shared"), 1)
@@ -0,0 +1,60 @@
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.management.data.enums import BASE_USERS_DATA, ROLES_AND_PERMISSIONS
+from evidenta.common.management.data.init_data import create_base_users, create_roles_and_permissions
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import Role, User
+
+
+def _role_permissions() -> set[tuple[str, str]]:
+    return set(Role.objects.values_list("name", "permissions__codename").exclude(permissions=None))
+
+
+@pytest.mark.django_db
+def test_roles_and_permissions_should_be_created_by_constant_number_of_queries(drop_all_roles) -> None:
+    with CaptureQueriesContext(connection) as ctx:
+        create_roles_and_permissions()
+
+    assert len(ctx.captured_queries) <= 8
+    assert_equal(set(Role.objects.values_list("name", flat=True)), set(ROLES_AND_PERMISSIONS))
+    assert_equal(
+        _role_permissions(),
+        {(role, codename) for role, codenames in ROLES_AND_PERMISSIONS.items() for codename in codenames},
+    )
+
+
+@pytest.mark.django_db
+def test_roles_and_permissions_should_be_idempotent() -> None:
+    supervisor = Role.objects.get(name=UserRole.SUPERVISOR)
+    extra = Permission.objects.get(codename="view_permission")
+    supervisor.permissions.add(extra)
+    supervisor.permissions.remove(Permission.objects.get(codename="add_user"))
+    before = _role_permissions()
+
+    with CaptureQueriesContext(connection) as ctx:
+        create_roles_and_permissions()
+        create_roles_and_permissions()
+
+    assert_equal(_role_permissions(), before | {(UserRole.SUPERVISOR, "add_user")})
+    # permissions assigned manually are kept, only missing rows are inserted
+    assert ("supervisor", "view_permission") in _role_permissions()
+    assert_equal(sum("INSERT" in query["sql"] for query in ctx.captured_queries), 1)
+
+
+@pytest.mark.django_db
+def test_base_users_should_be_created_once(settings: SettingsWrapper) -> None:
+    settings.DEBUG = True
+    create_base_users()
+    create_base_users()
+
+    users = User.objects.filter(username__in=[user_data["username"] for user_data in BASE_USERS_DATA])
+    assert_equal(users.count(), len(BASE_USERS_DATA))
+    admin = users.get(username="admin")
+    assert admin.is_superuser
+    assert admin.check_password("evidentaadmin123")
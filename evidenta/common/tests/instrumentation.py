@@ -0,0 +1,132 @@
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.metrics import Counter, Histogram, MetricsRegistry, registry
+from evidenta.common.testing.utils import assert_equal
+from evidenta.middleware.instrumentation import (
+    OPERATION_DURATION,
+    RESOLVER_DURATION,
+    RESOLVER_SQL_QUERIES,
+    get_operation_label,
+)
+
+
+USERS_QUERY = """
+query UsersWithRoles {
+  users {
+    edges {
+      node {
+        username
+        role {
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def sample_all_requests(settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "SAMPLE_RATE": 1.0}
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_histogram_should_render_cumulative_buckets() -> None:
+    histogram = Histogram("duration_seconds", "Some duration.", ("operation",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, operation="me")
+    histogram.observe(0.5, operation="me")
+    histogram.observe(5, operation="me")
+    assert_equal(
+        histogram.render(),
+        [
+            "# HELP duration_seconds Some duration.",
+            "# TYPE duration_seconds histogram",
+            'duration_seconds_bucket{operation="me",le="0.1"} 1',
+            'duration_seconds_bucket{operation="me",le="1.0"} 2',
+            'duration_seconds_bucket{operation="me",le="+Inf"} 3',
+            'duration_seconds_sum{operation="me"} 5.55',
+            'duration_seconds_count{operation="me"} 3',
+        ],
+    )
+
+
+def test_counter_should_escape_label_values() -> None:
+    counter = Counter("hits_total", "Some hits.", ("operation",))
+    counter.inc(operation='say "hi"')
+    assert_equal(counter.render()[-1], 'hits_total{operation="say \\"hi\\""} 1.0')
+
+
+def test_registry_should_return_existing_metric() -> None:
+    metrics = MetricsRegistry()
+    assert metrics.counter("hits_total", "Some hits.") is metrics.counter("hits_total", "Some hits.")
+
+
+def test_get_operation_label_should_limit_number_of_operations(settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "MAX_OPERATIONS": 0}
+    assert_equal(get_operation_label(None), "anonymous")
+    assert_equal(get_operation_label("SomeNeverSeenOperation"), "other")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_instrumentation_should_record_resolver_timings_and_sql_per_schema_field(
+    sample_all_requests, admin_client: Client, random_users
+) -> None:
+    graphql_query(USERS_QUERY, operation_name="UsersWithRoles", client=admin_client)
+
+    assert_equal(OPERATION_DURATION.count(operation="UsersWithRoles"), 1)
+    assert_equal(RESOLVER_DURATION.count(operation="UsersWithRoles", path="Query.users"), 1)
+    assert_equal(RESOLVER_DURATION.count(operation="UsersWithRoles", path="UserNode.role"), 1)
+    assert RESOLVER_SQL_QUERIES.sum(operation="UsersWithRoles", path="Query.users") > 0
+    assert_equal(RESOLVER_SQL_QUERIES.sum(operation="UsersWithRoles", path="UserNode.role"), 0)
+
+
+@pytest.mark.django_db
+def test_instrumentation_labels_should_not_depend_on_aliases(sample_all_requests, admin_client: Client) -> None:
+    for i in range(3):
+        graphql_query(f"query Aliased {{ alias{i}: me {{ username }} }}", operation_name="Aliased", client=admin_client)
+    assert_equal(RESOLVER_DURATION.count(operation="Aliased", path="Query.me"), 3)
+
+
+@pytest.mark.django_db
+def test_instrumentation_should_skip_requests_which_are_not_sampled(
+    settings: SettingsWrapper, admin_client: Client
+) -> None:
+    settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "SAMPLE_RATE": 0}
+    registry.reset()
+    graphql_query(USERS_QUERY, operation_name="UsersWithRoles", client=admin_client)
+    assert_equal(OPERATION_DURATION.count(operation="UsersWithRoles"), 0)
+
+
+@pytest.mark.django_db
+def test_metrics_view_should_expose_collected_metrics(
+    sample_all_requests, settings: SettingsWrapper, admin_client: Client
+) -> None:
+    settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "METRICS_TOKEN": "secret"}
+    graphql_query(USERS_QUERY, operation_name="UsersWithRoles", client=admin_client)
+    response = Client().get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert_equal(response.status_code, 200)
+    assert (
+        'graphql_resolver_duration_seconds_count{operation="UsersWithRoles",path="Query.users"} 1'
+        in response.content.decode()
+    )
+
+
+def test_metrics_view_should_deny_access_without_configured_token() -> None:
+    assert_equal(Client().get("/metrics", headers={"Authorization": "Bearer "}).status_code, 403)
+
+
+@pytest.mark.parametrize("authorization,status_code", [(None, 403), ("Bearer wrong", 403), ("Bearer secret", 200)])
+def test_metrics_view_should_require_token(
+    settings: SettingsWrapper, authorization: str | None, status_code: int
+) -> None:
+    settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "METRICS_TOKEN": "secret"}
+    headers = {"Authorization": authorization} if authorization else {}
+    assert_equal(Client().get("/metrics", headers=headers).status_code, status_code)
@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from graphql import get_introspection_query, print_schema
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.schemas import introspection
+from evidenta.common.schemas.introspection import DEFAULT_INTROSPECTION_QUERY, introspection_cache
+from evidenta.common.testing.utils import assert_equal, assert_none
+from evidenta.schema import schema
+
+
+GRAPHIQL_QUERY = get_introspection_query(descriptions=True, specified_by_url=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_introspection_cache() -> None:
+    introspection_cache.clear()
+    yield
+    introspection_cache.clear()
+
+
+@pytest.fixture
+def snapshot_file(tmp_path: Path, settings: SettingsWrapper) -> Path:
+    call_command("export_schema", sdl=tmp_path / "schema.graphql", introspection=tmp_path / "schema.json")
+    settings.GRAPHQL_INTROSPECTION_CACHE = {
+        **settings.GRAPHQL_INTROSPECTION_CACHE,
+        "SNAPSHOT_FILE": str(tmp_path / "schema.json"),
+    }
+    return tmp_path / "schema.json"
+
+
+def test_introspection_should_be_executed_once_per_schema() -> None:
+    with patch.object(introspection, "execute", wraps=introspection.execute) as execute:
+        first = introspection_cache.lookup(schema.graphql_schema, GRAPHIQL_QUERY, None, "IntrospectionQuery")
+        second = introspection_cache.lookup(schema.graphql_schema, GRAPHIQL_QUERY, None, "IntrospectionQuery")
+
+    assert_equal(execute.call_count, 1)
+    assert second is first
+
+
+@pytest.mark.parametrize("query", ["query Me { me { username } }", "query Me { me { __typename } }"])
+def test_other_operations_should_not_be_cached(query: str) -> None:
+    assert_none(introspection_cache.lookup(schema.graphql_schema, query, None, None))
+
+
+def test_snapshot_should_be_served_without_execution(snapshot_file: Path) -> None:
+    with patch.object(introspection, "execute") as execute:
+        result = introspection_cache.lookup(schema.graphql_schema, DEFAULT_INTROSPECTION_QUERY, None, None)
+
+    execute.assert_not_called()
+    assert_equal(result.data, json.loads(snapshot_file.read_text())["data"])
+    assert_equal(snapshot_file.with_suffix(".graphql").read_text(), print_schema(schema.graphql_schema))
+
+
+def test_outdated_snapshot_should_be_ignored(snapshot_file: Path) -> None:
+    snapshot_file.write_text(json.dumps({**json.loads(snapshot_file.read_text()), "schema_hash": "outdated"}))
+    with patch.object(introspection, "execute", wraps=introspection.execute) as execute:
+        introspection_cache.lookup(schema.graphql_schema, DEFAULT_INTROSPECTION_QUERY, None, None)
+    assert_equal(execute.call_count, 1)
+
+
+@pytest.mark.django_db
+def test_introspection_should_be_served_by_graphql_view(admin_client: Client) -> None:
+    response = graphql_query(GRAPHIQL_QUERY, operation_name="IntrospectionQuery", client=admin_client)
+    types = {graphql_type["name"] for graphql_type in response.json()["data"]["__schema"]["types"]}
+    assert "UserNode" in types
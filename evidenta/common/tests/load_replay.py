@@ -0,0 +1,90 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from evidenta.common.testing.load_replay import (
+    DEFAULT_MIX,
+    HttpConnection,
+    OperationStats,
+    ReplayContext,
+    load_recorded_mix,
+    replay,
+)
+from evidenta.common.testing.utils import assert_equal
+
+
+async def _graphql_server(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Keep-alive server answering like the GraphQL view, `createUser` fails and `me` needs the JWT."""
+    while request_line := await reader.readline():
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = json.loads(await reader.readexactly(int(headers["content-length"])))
+        if "tokenAuth" in body["query"]:
+            data = {"data": {"tokenAuth": {"token": "jwt"}}}
+        elif "createUser" in body["query"]:
+            data = {"errors": [{"message": "Permission denied"}], "data": {"createUser": None}}
+        elif "me" in body["query"] and headers.get("authorization") != "JWT jwt":
+            data = {"errors": [{"message": "Login required"}], "data": {"me": None}}
+        else:
+            data = {"data": {}}
+        content = json.dumps(data).encode()
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n".encode()
+            + content
+        )
+        await writer.drain()
+        assert request_line.startswith(b"POST /graphql")
+    writer.close()
+
+
+async def _replay(**kwargs):
+    server = await asyncio.start_server(_graphql_server, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        context = ReplayContext(username="admin", password="admin", companies=2, users_per_company=2)  # noqa: S106
+        return await replay(f"http://127.0.0.1:{port}/graphql", DEFAULT_MIX, context, **kwargs)
+
+
+def test_replay_should_report_stats_per_operation() -> None:
+    result = asyncio.run(_replay(concurrency=4, requests=200)).to_dict()
+
+    assert_equal(result["total"]["requests"], 200)
+    assert_equal(set(result["operations"]), {operation.name for operation in DEFAULT_MIX})
+    assert_equal(result["operations"]["me"]["errors"], 0)
+    assert_equal(result["operations"]["createUser"]["error_rate"], 1.0)
+    assert_equal(result["total"]["errors"], result["operations"]["createUser"]["requests"])
+    assert result["operations"]["users"]["p50_ms"] <= result["operations"]["users"]["p99_ms"]
+
+
+def test_replay_should_stop_after_duration() -> None:
+    result = asyncio.run(_replay(concurrency=2, duration=0.2)).to_dict()
+    assert result["total"]["requests"] > 0
+    assert result["elapsed_s"] < 2
+
+
+@pytest.mark.parametrize("url", ["https://127.0.0.1/graphql", "http://evidenta.cz/graphql"])
+def test_replay_should_run_only_against_local_server(url: str) -> None:
+    with pytest.raises(ValueError):
+        HttpConnection(url)
+
+
+def test_recorded_operations_should_get_unique_variables(tmp_path: Path) -> None:
+    path = tmp_path / "operations.json"
+    path.write_text(
+        json.dumps([{"name": "createUser", "query": "mutation", "variables": {"input": {"username": "user_{i}"}}}])
+    )
+    (operation,) = load_recorded_mix(str(path))
+    assert_equal(
+        [operation.variables(None, i) for i in range(2)], [{"input": {"username": f"user_{i}"}} for i in range(2)]
+    )
+    assert_equal(operation.weight, 1)
+
+
+def test_percentiles() -> None:
+    latencies = [float(i) for i in range(1, 101)]
+    assert_equal([OperationStats.percentile(latencies, q) for q in (50, 95, 99)], [50.5, 95.05, 99.01])
+    assert_equal(OperationStats.percentile([], 95), 0.0)
@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+
+from evidenta.common.testing.utils import (
+    GraphQLQueryCapture,
+    assert_equal,
+    assert_max_queries,
+    normalize_resolver_path,
+    normalize_sql,
+)
+from evidenta.core.user.models import User
+from evidenta.core.user.service import UserService
+
+
+USERS_WITH_ROLE_QUERY = """
+{
+  users {
+    edges {
+      node {
+        id,
+        role {
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.mark.parametrize(
+    "sql,shape",
+    [
+        (
+            'SELECT "user"."id" FROM "user" WHERE "user"."id" = %s LIMIT 21',
+            'SELECT "user"."id" FROM "user" WHERE "user"."id" = %s LIMIT ?',
+        ),
+        ('SELECT "id" FROM "user" WHERE "id" IN (%s, %s, %s)', 'SELECT "id" FROM "user" WHERE "id" IN (...)'),
+        ('SELECT "id" FROM "user" WHERE "id" IN (%s)', 'SELECT "id" FROM "user" WHERE "id" IN (...)'),
+        ("SELECT  'abc'\n  FROM  \"user\"", 'SELECT ? FROM "user"'),
+    ],
+)
+def test_normalize_sql_should_group_statements_of_same_shape(sql: str, shape: str) -> None:
+    assert_equal(normalize_sql(sql), shape)
+
+
+def test_normalize_resolver_path_should_replace_list_indexes() -> None:
+    assert_equal(normalize_resolver_path(["users", "edges", 3, "node", "role"]), "users.edges.*.node.role")
+
+
+@pytest.mark.django_db
+def test_query_capture_should_fail_when_query_budget_is_exceeded(admin: User) -> None:
+    with pytest.raises(AssertionError, match="Executed 2 SQL queries, budget is 1"):
+        with assert_max_queries(1):
+            User.objects.get(pk=admin.pk)
+            User.objects.get(pk=admin.pk)
+
+
+@pytest.mark.django_db
+def test_query_capture_should_fail_when_statement_is_repeated_more_than_allowed(admin: User) -> None:
+    with pytest.raises(AssertionError, match="SQL repeated more than 1 times"):
+        with GraphQLQueryCapture(max_repeats=1):
+            User.objects.get(pk=admin.pk)
+            User.objects.get(pk=admin.pk)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_query_capture_should_detect_n_plus_one_with_resolver_path(admin_client: Client, random_users) -> None:
+    queryset = MagicMock()
+    queryset.select_related.return_value = User.objects.all()
+    with patch.object(UserService, "get_all_related", return_value=queryset):
+        with pytest.raises(AssertionError, match=r"N\+1 queries detected:\n4x .*\n    from: users.edges.\*.node.role"):
+            with GraphQLQueryCapture():
+                graphql_query(USERS_WITH_ROLE_QUERY, client=admin_client)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_query_capture_should_attribute_queries_to_resolvers(admin_client: Client, random_users) -> None:
+    with GraphQLQueryCapture() as captured:
+        graphql_query(USERS_WITH_ROLE_QUERY, client=admin_client)
+    assert_equal({query.resolver_path for query in captured.queries}, {"users"})
+    assert_equal(captured.n_plus_one(), {})
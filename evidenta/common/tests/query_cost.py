@@ -0,0 +1,131 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from graphql import parse
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.schemas.cost import QueryCostAnalyzer
+from evidenta.common.testing.utils import assert_equal
+from evidenta.schema import schema
+
+
+USERS_QUERY = """
+query Users($first: Int) {
+  users(first: $first) {
+    edges {
+      node {
+        username
+        role {
+          name
+        }
+        tokenSet {
+          token
+        }
+      }
+    }
+  }
+}
+"""
+
+ROLES_WITH_USERS_QUERY = """
+query RolesWithUsers {
+  allRoles {
+    edges {
+      node {
+        ...RoleUsers
+      }
+    }
+  }
+}
+
+fragment RoleUsers on RoleType {
+  userSet(first: 50) {
+    edges {
+      node {
+        role {
+          userSet {
+            edges {
+              node {
+                username
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def analyze(query: str, variables: dict | None = None):
+    document = parse(query)
+    operation = document.definitions[0]
+    fragments = {definition.name.value: definition for definition in document.definitions[1:]}
+    return QueryCostAnalyzer(schema.graphql_schema, fragments, variables or {}).analyze(operation)
+
+
+@pytest.mark.parametrize("variables,cost", [({"first": 10}, 1 + 10 * 3), ({}, 1 + 100 * 3)])
+def test_cost_should_be_multiplied_by_connection_size(variables: dict, cost: int) -> None:
+    # users (1) + first * (node (1) + role (0) + tokenSet (2) + DEFAULT_LIST_SIZE * token (0))
+    query_cost = analyze(USERS_QUERY, variables)
+    assert_equal(query_cost.cost, cost)
+    assert_equal(query_cost.depth, 3)
+
+
+def test_cost_should_include_fragments_and_field_weights() -> None:
+    # allRoles (1) + 100 * (node (1) + userSet (5) + 50 * (node (1) + role (0) + userSet (5) + 100 * node (1)))
+    query_cost = analyze(ROLES_WITH_USERS_QUERY)
+    assert_equal(query_cost.cost, 1 + 100 * (1 + 5 + 50 * (1 + 5 + 100)))
+    assert_equal(query_cost.depth, 5)
+
+
+def test_fragments_reused_at_every_level_should_be_analyzed_once() -> None:
+    # every level spreads the fragment of the next one twice, 2^30 spreads when walked without memoization
+    levels = 30
+    fragments = "".join(
+        f"fragment F{level} on RoleType {{ a: userSet(first: 1) {{ edges {{ node {{ role {{ ...F{level + 1} }} }} }} }}"
+        f" b: userSet(first: 1) {{ edges {{ node {{ role {{ ...F{level + 1} }} }} }} }} }}\n"
+        for level in range(levels)
+    )
+    fragments += f"fragment F{levels} on RoleType {{ name }}"
+    query = f"query Deep {{ allRoles(first: 1) {{ edges {{ node {{ ...F0 }} }} }} }}\n{fragments}"
+
+    query_cost = analyze(query)
+    assert query_cost.cost > 2**levels
+    assert_equal(query_cost.depth, 2 + 2 * levels)
+
+
+def test_introspection_should_be_free() -> None:
+    assert_equal(analyze("{ __schema { types { name fields { name } } } }").cost, 0)
+
+
+@pytest.mark.django_db
+def test_cost_should_be_reported_in_response_extensions(admin_client: Client) -> None:
+    response = graphql_query(USERS_QUERY, operation_name="Users", variables={"first": 10}, client=admin_client)
+    assert_equal(response.status_code, 200)
+    assert_equal(response.json()["extensions"]["cost"]["requested"], 31)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "limits,error_code",
+    [
+        ({"MAX_COST": 20}, ApiErrorCode.QUERY_TOO_COMPLEX),
+        ({"MAX_DEPTH": 2}, ApiErrorCode.QUERY_TOO_DEEP),
+    ],
+)
+def test_operation_over_limits_should_be_rejected_before_execution(
+    settings: SettingsWrapper, admin_client: Client, limits: dict, error_code: ApiErrorCode
+) -> None:
+    settings.GRAPHQL_QUERY_COST = {**settings.GRAPHQL_QUERY_COST, **limits}
+    with CaptureQueriesContext(connection) as queries:
+        response = graphql_query(USERS_QUERY, operation_name="Users", variables={"first": 10}, client=admin_client)
+
+    assert_equal(response.status_code, 400)
+    assert_equal(response.json()["errors"][0]["error_code"], error_code.value)
+    assert_equal(len(queries), 0)
@@ -0,0 +1,152 @@
+import math
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.testing.utils import assert_equal
+from evidenta.middleware.rate_limit import TokenBucket
+
+
+USERS_QUERY = """
+query Users($first: Int) {
+  users(first: $first) {
+    edges {
+      node {
+        username
+      }
+    }
+  }
+}
+"""
+
+ME_QUERY = """
+query Me {
+  me {
+    username
+  }
+}
+"""
+
+
+@pytest.fixture
+def rate_limited_client(settings: SettingsWrapper, admin_client: Client) -> Client:
+    settings.GRAPHQL_RATE_LIMIT = {
+        **settings.GRAPHQL_RATE_LIMIT,
+        "ENABLED": True,
+        "CAPACITY": 100,
+        "REFILL_RATE": 1,
+        "DB_MS_PRICE": 0,
+    }
+    cache.clear()
+    yield admin_client
+    cache.clear()
+
+
+def test_token_bucket_should_refill_over_time_up_to_capacity() -> None:
+    cache.clear()
+    with patch("evidenta.middleware.rate_limit.time.time", return_value=0):
+        TokenBucket("user:1", capacity=100, refill_rate=5).charge(120)
+    with patch("evidenta.middleware.rate_limit.time.time", return_value=10):
+        bucket = TokenBucket("user:1", capacity=100, refill_rate=5)
+    assert_equal(bucket.tokens, 30)
+    cache.clear()
+
+
+def test_token_bucket_should_not_lose_concurrent_charges() -> None:
+    cache.clear()
+    with patch("evidenta.middleware.rate_limit.time.time", return_value=0):
+        # both requests loaded the bucket before any of them was charged
+        first, second = TokenBucket("user:1", capacity=100, refill_rate=5), TokenBucket(
+            "user:1", capacity=100, refill_rate=5
+        )
+        first.charge(30)
+        second.charge(30)
+        assert_equal(TokenBucket("user:1", capacity=100, refill_rate=5).tokens, 40)
+    cache.clear()
+
+
+def test_token_bucket_should_wait_for_lock_held_by_another_charge() -> None:
+    cache.clear()
+    bucket = TokenBucket("user:1", capacity=100, refill_rate=0.001)
+    cache.add(bucket.lock_key, "other charge")
+
+    def _other_charge():
+        time.sleep(0.1)
+        cache.set(bucket.cache_key, (50, time.time()))
+        cache.delete(bucket.lock_key)
+
+    other = threading.Thread(target=_other_charge)
+    other.start()
+    # the other charge holds the lock longer than the lock timeout
+    with patch.object(TokenBucket, "LOCK_TIMEOUT", 0.05):
+        bucket.charge(10)
+    other.join()
+
+    # the charge waited for the other one instead of overwriting its state
+    assert_equal(math.floor(TokenBucket("user:1", capacity=100, refill_rate=0.001).tokens), 40)
+    cache.clear()
+
+
+def test_token_bucket_in_debt_should_compute_retry_after() -> None:
+    cache.clear()
+    with patch("evidenta.middleware.rate_limit.time.time", return_value=0):
+        bucket = TokenBucket("user:1", capacity=10, refill_rate=2)
+        bucket.charge(15)
+    assert_equal(bucket.retry_after, 3)
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_expensive_operations_should_be_throttled_while_cheap_ones_flow(rate_limited_client: Client) -> None:
+    for _ in range(20):
+        response = graphql_query(ME_QUERY, operation_name="Me", client=rate_limited_client)
+        assert_equal(response.status_code, 200)
+
+    # cost of users(first: 50) is 51, the second one puts the budget into debt
+    for status_code in (200, 200, 429):
+        response = graphql_query(
+            USERS_QUERY, operation_name="Users", variables={"first": 50}, client=rate_limited_client
+        )
+        assert_equal(response.status_code, status_code)
+    assert int(response["Retry-After"]) > 0
+
+
+@pytest.mark.django_db
+def test_field_price_should_be_charged_when_higher_than_cost(
+    settings: SettingsWrapper, rate_limited_client: Client
+) -> None:
+    settings.GRAPHQL_RATE_LIMIT = {**settings.GRAPHQL_RATE_LIMIT, "FIELD_PRICES": {"me": 30}}
+    response = graphql_query(ME_QUERY, operation_name="Me", client=rate_limited_client)
+    assert_equal(response["X-RateLimit-Remaining"], "70")
+
+    # the price follows the selected fields, not the client chosen operation name
+    response = graphql_query(
+        "query Renamed { first: me { username } second: me { username } }",
+        operation_name="Renamed",
+        client=rate_limited_client,
+    )
+    assert_equal(response["X-RateLimit-Remaining"], "10")
+
+
+@pytest.mark.django_db
+def test_get_requests_should_be_charged(rate_limited_client: Client) -> None:
+    response = rate_limited_client.get("/graphql", {"query": USERS_QUERY, "variables": '{"first": 50}'})
+    assert_equal(response.status_code, 200)
+    assert_equal(response["X-RateLimit-Remaining"], "49")
+
+
+@pytest.mark.django_db
+def test_jwt_users_should_be_identified_by_user(rate_limited_client: Client, admin) -> None:
+    client = Client()
+    with patch("evidenta.middleware.rate_limit.authenticate_request") as authenticate_request:
+        authenticate_request.side_effect = lambda request: setattr(request, "user", admin)
+        graphql_query(ME_QUERY, operation_name="Me", client=client, headers={"AUTHORIZATION": "JWT jwt-token"})
+    assert cache.get(f"rl:user:{admin.id}") is not None
+    assert cache.get("rl:ip:127.0.0.1") is None
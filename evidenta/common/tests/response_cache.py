@@ -0,0 +1,155 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.cache import bump_versions, get_versions
+from evidenta.common.metrics import registry
+from evidenta.common.schemas.response_cache import CACHE_REQUESTS, get_hit_ratio
+from evidenta.common.schemas.views import CustomGraphQLView
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.user.models import Role, User
+
+
+ROLES_QUERY = """
+query Roles {
+  allRoles {
+    edges {
+      node {
+        name
+      }
+    }
+  }
+}
+"""
+
+ME_QUERY = """
+query Me {
+  me {
+    username
+  }
+}
+"""
+
+
+@pytest.fixture
+def response_cache(settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_RESPONSE_CACHE = {**settings.GRAPHQL_RESPONSE_CACHE, "ENABLED": True}
+    cache.clear()
+    registry.reset()
+    yield
+    cache.clear()
+
+
+def test_bump_versions_should_increase_version_of_given_models_only(response_cache) -> None:
+    versions = get_versions()
+    bump_versions("user.Role")
+    assert_equal(get_versions(), {**versions, "user.Role": versions["user.Role"] + 1})
+
+
+@pytest.mark.django_db
+def test_repeated_query_should_be_served_from_cache(response_cache, admin_client: Client) -> None:
+    first = graphql_query(ROLES_QUERY, operation_name="Roles", client=admin_client)
+    second = graphql_query(ROLES_QUERY, operation_name="Roles", client=admin_client)
+
+    assert_equal(second.json(), first.json())
+    assert_equal(CACHE_REQUESTS.value(result="miss"), 1)
+    assert_equal(CACHE_REQUESTS.value(result="hit"), 1)
+    assert_equal(get_hit_ratio(), 0.5)
+
+
+@pytest.mark.django_db
+def test_committed_change_should_invalidate_cached_responses(
+    response_cache, admin_client: Client, django_capture_on_commit_callbacks
+) -> None:
+    graphql_query(ROLES_QUERY, operation_name="Roles", client=admin_client)
+    with django_capture_on_commit_callbacks(execute=True):
+        Role.objects.filter(name="guest").delete()
+    response = graphql_query(ROLES_QUERY, operation_name="Roles", client=admin_client)
+
+    assert "GUEST" not in [edge["node"]["name"] for edge in response.json()["data"]["allRoles"]["edges"]]
+    assert_equal(CACHE_REQUESTS.value(result="miss"), 2)
+
+
+@pytest.mark.django_db
+def test_me_should_not_be_shared_between_users(
+    response_cache, django_client: Client, accountant: User, client: User
+) -> None:
+    client.role = accountant.role
+    client.save()
+
+    for user in (accountant, client):
+        django_client.force_login(user)
+        response = graphql_query(ME_QUERY, operation_name="Me", client=django_client)
+        assert_equal(response.json()["data"]["me"]["username"], user.username)
+    assert_equal(CACHE_REQUESTS.value(result="hit"), 0)
+
+
+@pytest.mark.django_db
+def test_mutations_should_not_be_cached(response_cache, admin_client: Client) -> None:
+    graphql_query("mutation { deleteUser(id: 0) { success } }", client=admin_client)
+    assert_equal(CACHE_REQUESTS.value(result="miss"), 0)
+
+
+@pytest.mark.django_db
+def test_get_query_with_matching_etag_should_not_be_executed(
+    admin_client: Client, django_capture_on_commit_callbacks
+) -> None:
+    response = admin_client.get("/graphql", {"query": ROLES_QUERY}, HTTP_ACCEPT="application/json")
+    etag = response["ETag"]
+    assert_equal(response.status_code, 200)
+    assert_equal(response["Cache-Control"], "no-cache")
+
+    with patch.object(CustomGraphQLView, "execute_graphql_request") as execute_graphql_request:
+        response = admin_client.get(
+            "/graphql", {"query": ROLES_QUERY}, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag
+        )
+    assert_equal(response.status_code, 304)
+    execute_graphql_request.assert_not_called()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Role.objects.filter(name="guest").delete()
+    response = admin_client.get(
+        "/graphql", {"query": ROLES_QUERY}, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag
+    )
+    assert_equal(response.status_code, 200)
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_etag_should_not_be_computed_for_post_requests(admin_client: Client) -> None:
+    response = graphql_query(ROLES_QUERY, operation_name="Roles", client=admin_client)
+    assert not response.has_header("ETag")
+
+
+@pytest.mark.django_db
+def test_process_local_cache_should_disable_response_cache_and_etag(
+    response_cache, settings: SettingsWrapper, admin_client: Client
+) -> None:
+    settings.ALLOW_PROCESS_LOCAL_CACHE = False
+    for _ in range(2):
+        response = admin_client.get("/graphql", {"query": ROLES_QUERY}, HTTP_ACCEPT="application/json")
+        assert_equal(response.status_code, 200)
+        assert not response.has_header("ETag")
+    assert_equal(CACHE_REQUESTS.value(result="miss"), 0)
+    assert_equal(CACHE_REQUESTS.value(result="hit"), 0)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    [
+        "query Sync { ...Changes } fragment Changes on Query { changesSince { cursor } }",
+        "query Sync { ... on Query { changesSince { cursor } } }",
+    ],
+)
+def test_uncached_fields_selected_by_root_fragments_should_not_be_cached(
+    response_cache, admin_client: Client, query: str
+) -> None:
+    response = graphql_query(query, operation_name="Sync", client=admin_client)
+    assert "errors" not in response.json()
+    assert_equal(CACHE_REQUESTS.value(result="miss"), 0)
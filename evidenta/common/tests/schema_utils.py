@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock
+
+import pytest
+from graphql import parse
+
+from evidenta.common.schemas.utils import is_field_selected
+
+
+QUERY = """
+query Records {
+  walletRecords {
+    edges {
+      node {
+        username
+        ...Password
+      }
+    }
+  }
+}
+
+fragment Password on WalletRecordNode {
+  ... on WalletRecordNode {
+    decryptedPassword
+  }
+}
+"""
+
+
+@pytest.mark.parametrize(
+    "path,selected",
+    [
+        (("edges", "node", "decryptedPassword"), True),
+        (("edges", "node", "username"), True),
+        (("edges", "node", "description"), False),
+        (("pageInfo",), False),
+    ],
+)
+def test_is_field_selected_should_follow_fragments(path: tuple[str, ...], selected: bool) -> None:
+    document = parse(QUERY)
+    operation, fragment = document.definitions
+    info = MagicMock(field_nodes=[operation.selection_set.selections[0]], fragments={fragment.name.value: fragment})
+    assert is_field_selected(info, *path) is selected
@@ -0,0 +1,95 @@
+import json
+import logging
+from unittest.mock import MagicMock, patch
+
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.testing.utils import assert_equal, assert_none
+from evidenta.core.user.models import User
+from evidenta.middleware.slow_log import (
+    DROPPED_RECORDS,
+    SlowLogWriter,
+    StatementRecorder,
+    hash_variables,
+    slow_log_writer,
+)
+
+
+USERS_QUERY = """
+query Users($first: Int) {
+  users(first: $first) {
+    edges {
+      node {
+        username
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def slow_log_threshold(request, settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_SLOW_LOG = {**settings.GRAPHQL_SLOW_LOG, "THRESHOLD_MS": request.param}
+
+
+def test_hash_variables_should_not_depend_on_order_of_keys() -> None:
+    assert_equal(hash_variables({"a": 1, "b": 2}), hash_variables({"b": 2, "a": 1}))
+    assert_none(hash_variables(None))
+
+
+def test_statement_recorder_should_keep_parameters_of_slowest_statement_only() -> None:
+    recorder = StatementRecorder(max_statements=1)
+    execute = MagicMock()
+    with patch("evidenta.middleware.slow_log.time.perf_counter", side_effect=[0, 1, 1, 5]):
+        recorder(execute, "SELECT 1 WHERE id = %s", [1], False, {})
+        recorder(execute, "SELECT 2 WHERE id = %s", [2], False, {})
+    assert_equal(recorder.statements, [{"sql": "SELECT 1 WHERE id = %s", "duration_ms": 1000}])
+    assert_equal(recorder.truncated, 1)
+    assert_equal(recorder.slowest, (4, "SELECT 2 WHERE id = %s", [2]))
+
+
+def test_slow_log_writer_should_drop_records_when_queue_is_full() -> None:
+    writer = SlowLogWriter(queue_size=1)
+    dropped = DROPPED_RECORDS.value()
+    with patch.object(SlowLogWriter, "_ensure_worker"):
+        assert writer.enqueue({"operation_name": "first"}, None)
+        assert not writer.enqueue({"operation_name": "second"}, None)
+    assert_equal(DROPPED_RECORDS.value(), dropped + 1)
+
+
+def test_explain_should_be_skipped_for_other_databases_than_postgres() -> None:
+    assert_none(SlowLogWriter.explain("SELECT 1", []))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("slow_log_threshold", [0], indirect=True)
+def test_slow_operation_should_be_logged_with_captured_sql(
+    slow_log_threshold, admin: User, admin_client: Client, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level(logging.WARNING, logger="evidenta.graphql.slow"):
+        graphql_query(USERS_QUERY, operation_name="Users", variables={"first": 10}, client=admin_client)
+        slow_log_writer.join()
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert_equal(record["operation_name"], "Users")
+    assert_equal(record["variables_hash"], hash_variables({"first": 10}))
+    assert_equal(record["user_id"], admin.pk)
+    assert_equal(record["sql_count"], len(record["statements"]))
+    assert any('FROM "user"' in statement["sql"] for statement in record["statements"])
+    assert_none(record["explain"])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("slow_log_threshold", [60_000], indirect=True)
+def test_fast_operation_should_not_be_logged(
+    slow_log_threshold, admin_client: Client, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level(logging.WARNING, logger="evidenta.graphql.slow"):
+        graphql_query(USERS_QUERY, operation_name="Users", client=admin_client)
+        slow_log_writer.join()
+    assert_equal(caplog.records, [])
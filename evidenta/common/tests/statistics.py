@@ -0,0 +1,200 @@
+import datetime
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.statistics import get_firm_statistics, rebuild_firm_statistics
+from evidenta.common.testing.utils import assert_equal, extract_error_code_from_graphql_error_response
+from evidenta.core.company.models import Company, FirmStatistics
+from evidenta.core.company.service import CompanyService
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import Role, User
+
+
+FIRM_STATISTICS_QUERY = """
+query FirmStatistics($days: Int) {
+  firmStatistics(days: $days) {
+    companyId
+    companyName
+    users
+    roles {
+      role
+      users
+      created
+      updated
+    }
+  }
+}
+"""
+
+
+def _users_per_role(as_user: User, company: Company, days: int = 7) -> dict[str, int]:
+    statistics = {row["company_id"]: row for row in get_firm_statistics(as_user=as_user, days=days)}
+    return {role["role"]: role["users"] for role in statistics.get(company.pk, {"roles": []})["roles"]}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_statistics_should_follow_membership_and_role_changes(
+    admin: User, random_company: Company, random_users: list[User], django_capture_on_commit_callbacks
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        random_company.users.set(random_users)
+    assert_equal(sum(_users_per_role(admin, random_company).values()), 3)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        random_users[0].role = Role.objects.get(name=UserRole.SUPERVISOR)
+        random_users[0].save()
+        random_users[1].companies.clear()
+    assert_equal(_users_per_role(admin, random_company)[UserRole.SUPERVISOR], 1)
+    assert_equal(sum(_users_per_role(admin, random_company).values()), 2)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        User.objects.get(pk=random_users[2].pk).delete()
+    assert_equal(sum(_users_per_role(admin, random_company).values()), 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(4, 2)], indirect=True)
+def test_statistics_should_follow_bulk_operations(
+    admin: User, random_users: list[User], random_companies: list[Company], django_capture_on_commit_callbacks
+) -> None:
+    first, second = random_companies
+    with django_capture_on_commit_callbacks(execute=True):
+        CompanyService().assign_memberships(as_user=admin, add=[(user.pk, first.pk) for user in random_users])
+    with django_capture_on_commit_callbacks(execute=True):
+        User.objects.update_many(
+            [user.pk for user in random_users[:3]], as_user=admin, role=UserRole.ACCOUNTANT, companies=[second.pk]
+        )
+
+    assert_equal(_users_per_role(admin, first), {random_users[3].role.name: 1})
+    assert_equal(_users_per_role(admin, second), {UserRole.ACCOUNTANT: 3})
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_statistics_should_count_created_and_updated_in_window(
+    admin: User, random_company: Company, random_users: list[User]
+) -> None:
+    # adding the memberships updates the users
+    random_company.users.set(random_users)
+    old = timezone.now() - datetime.timedelta(days=10)
+    User.objects.filter(pk=random_users[0].pk).update(created=old, updated=old)
+    User.objects.filter(pk=random_users[1].pk).update(created=old)
+    rebuild_firm_statistics()
+
+    def _window(days: int) -> tuple[int, int]:
+        roles = get_firm_statistics(as_user=admin, days=days)[0]["roles"]
+        return sum(role["created"] for role in roles), sum(role["updated"] for role in roles)
+
+    assert_equal(_window(7), (1, 2))
+    assert_equal(_window(30), (3, 3))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_companies", [2], indirect=True)
+def test_accountant_should_see_own_companies_without_superusers(
+    accountant: User, admin: User, random_companies: list[Company], random_user: User
+) -> None:
+    own, other = random_companies
+    own.users.add(accountant, admin, random_user)
+    other.users.add(random_user)
+    rebuild_firm_statistics()
+
+    statistics = get_firm_statistics(as_user=accountant, days=7)
+
+    assert_equal([row["company_id"] for row in statistics], [own.pk])
+    assert_equal(statistics[0]["users"], 2)
+
+
+@pytest.mark.django_db
+def test_firm_statistics_query(admin_client: Client, random_company: Company, random_user: User) -> None:
+    random_company.users.add(random_user)
+    rebuild_firm_statistics()
+
+    response = graphql_query(FIRM_STATISTICS_QUERY, variables={"days": 7}, client=admin_client).json()
+
+    assert_equal(
+        response["data"]["firmStatistics"],
+        [
+            {
+                "companyId": random_company.pk,
+                "companyName": random_company.name,
+                "users": 1,
+                "roles": [{"role": random_user.role.name, "users": 1, "created": 1, "updated": 1}],
+            }
+        ],
+    )
+
+
+@pytest.mark.django_db
+def test_firm_statistics_query_should_not_be_cached(
+    admin_client: Client, settings: SettingsWrapper, random_company: Company, random_user: User
+) -> None:
+    settings.GRAPHQL_RESPONSE_CACHE = {**settings.GRAPHQL_RESPONSE_CACHE, "ENABLED": True}
+    random_company.users.add(random_user)
+    rebuild_firm_statistics()
+    graphql_query(FIRM_STATISTICS_QUERY, variables={"days": 7}, client=admin_client)
+
+    # the summary is refreshed by update() on commit, without bumping the versions of cached responses
+    FirmStatistics.objects.filter(company=random_company, day__isnull=True).update(users_count=2)
+    response = graphql_query(FIRM_STATISTICS_QUERY, variables={"days": 7}, client=admin_client).json()
+
+    assert_equal(response["data"]["firmStatistics"][0]["users"], 2)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("days", [0, 31])
+def test_firm_statistics_query_should_reject_days_out_of_window(admin_client: Client, days: int) -> None:
+    response = graphql_query(FIRM_STATISTICS_QUERY, variables={"days": days}, client=admin_client).json()
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.INVALID_VALUES.value)
+
+
+@pytest.mark.django_db
+def test_firm_statistics_query_should_require_permission(client: User) -> None:
+    logged_client = Client()
+    logged_client.force_login(client)
+    response = graphql_query(FIRM_STATISTICS_QUERY, client=logged_client).json()
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.PERMISSION_REQUIRED.value)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(20, 5)], indirect=True)
+def test_statistics_query_should_not_depend_on_number_of_users(
+    admin: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    def _count_queries() -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            get_firm_statistics(as_user=admin, days=7)
+        return len(ctx.captured_queries)
+
+    random_companies[0].users.add(*random_users[:2])
+    rebuild_firm_statistics()
+    few = _count_queries()
+    for company in random_companies:
+        company.users.add(*random_users)
+    rebuild_firm_statistics()
+    assert_equal(_count_queries(), few)
+
+
+@pytest.mark.django_db
+def test_rebuild_should_repair_summary(random_company: Company, random_user: User) -> None:
+    random_company.users.add(random_user)
+    FirmStatistics.objects.all().delete()
+
+    call_command("rebuild_firm_statistics", "--chunk-size=1", stdout=None)
+
+    assert_equal(
+        FirmStatistics.objects.filter(company=random_company, day__isnull=True)
+        .values_list("users_count", flat=True)
+        .get(),
+        1,
+    )
@@ -0,0 +1,224 @@
+import datetime
+
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.models import Tombstone
+from evidenta.common.schemas.response_cache import response_cache
+from evidenta.common.sync import Changes, get_changes_since
+from evidenta.common.testing.utils import assert_equal, extract_error_code_from_graphql_error_response
+from evidenta.core.company.models import Company
+from evidenta.core.company.service import CompanyService
+from evidenta.core.user.enums import UserRole
+from evidenta.core.user.models import User
+
+
+CHANGES_SINCE_QUERY = """
+query ChangesSince($cursor: String, $first: Int) {
+  changesSince(cursor: $cursor, first: $first) {
+    users {
+      id
+      username
+      roleId
+      companyIds
+    }
+    companies {
+      id
+      name
+    }
+    roles {
+      name
+    }
+    deleted {
+      model
+      pk
+    }
+    cursor
+    hasMore
+  }
+}
+"""
+
+USER = User._meta.label
+COMPANY = Company._meta.label
+
+
+def _sync(as_user: User, cursor: str | None = None, first: int = 1000) -> Changes:
+    return get_changes_since(as_user=as_user, cursor=cursor, first=first)
+
+
+def _pks(objects: list) -> set[int]:
+    return {obj.pk for obj in objects}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_sync_should_return_only_changes_since_cursor(
+    admin: User, random_company: Company, random_users: list[User]
+) -> None:
+    full = _sync(admin)
+    assert _pks(random_users) <= _pks(full.users)
+    assert_equal(_pks(full.companies), {random_company.pk})
+    assert_equal(full.has_more, False)
+
+    assert_equal(_sync(admin, full.cursor).users, [])
+
+    random_users[0].first_name = "Changed"
+    random_users[0].save()
+    changes = _sync(admin, full.cursor)
+    assert_equal(_pks(changes.users), {random_users[0].pk})
+    assert_equal([changes.companies, changes.roles, changes.deleted], [[], [], []])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [5], indirect=True)
+def test_sync_should_page_through_rows_changed_at_once(admin: User, random_users: list[User]) -> None:
+    User.objects.filter(pk__in=_pks(random_users)).update(updated=timezone.now())
+    synced, cursor, has_more = set(), None, True
+    while has_more:
+        changes = _sync(admin, cursor, first=2)
+        assert len(changes.users) <= 2
+        synced |= _pks(changes.users)
+        cursor, has_more = changes.cursor, changes.has_more
+    assert_equal(synced, set(User.objects.values_list("pk", flat=True)))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(3, 2)], indirect=True)
+def test_accountant_should_sync_only_visible_users_and_memberships(
+    accountant: User, admin: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    own, other = random_companies
+    own.users.add(accountant, admin, *random_users[:2])
+    other.users.add(*random_users[1:])
+
+    changes = _sync(accountant)
+
+    assert_equal(_pks(changes.users), {accountant.pk, *_pks(random_users[:2])})
+    assert_equal(_pks(changes.companies), {own.pk})
+    assert_equal(
+        {user.pk: [c.pk for c in user.companies.all()] for user in changes.users}[random_users[1].pk], [own.pk]
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize("random_companies", [2], indirect=True)
+def test_existing_company_should_be_synced_to_newly_added_member(
+    accountant: User, admin: User, random_companies: list[Company], bulk: bool
+) -> None:
+    own, other = random_companies
+    Company.objects.filter(pk=other.pk).update(updated=timezone.now() - datetime.timedelta(hours=1))
+    own.users.add(accountant)
+    cursor = _sync(accountant).cursor
+
+    if bulk:
+        Company.objects.assign_memberships(as_user=admin, add=[(accountant.pk, other.pk)])
+    else:
+        other.users.add(accountant)
+
+    changes = _sync(accountant, cursor)
+    assert other.pk in _pks(changes.companies)
+    assert accountant.pk in _pks(changes.users)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(2, 2)], indirect=True)
+def test_removed_membership_should_be_synced_as_deleted_while_not_visible(
+    accountant: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    own, other = random_companies
+    accountant.companies.add(own, other)
+    own.users.add(*random_users)
+    other.users.add(random_users[1])
+    cursor = _sync(accountant).cursor
+
+    own.users.remove(*random_users)
+    changes = _sync(accountant, cursor)
+    # the second user is still visible through the other company
+    assert_equal(changes.deleted, [(USER, random_users[0].pk)])
+    assert_equal(_pks(changes.users), {random_users[1].pk})
+
+    own.users.add(random_users[0])
+    changes = _sync(accountant, cursor)
+    assert_equal(changes.deleted, [])
+    assert_equal(_pks(changes.users), _pks(random_users))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_deleted_objects_should_be_synced_to_their_audience(
+    accountant: User, admin: User, random_company: Company, random_users: list[User]
+) -> None:
+    random_company.users.add(accountant, *random_users)
+    cursors = {user.pk: _sync(user).cursor for user in (accountant, admin, random_users[1])}
+
+    User.objects.get(pk=random_users[0].pk).delete()
+    assert_equal(_sync(accountant, cursors[accountant.pk]).deleted, [(USER, random_users[0].pk)])
+    assert_equal(_sync(admin, cursors[admin.pk]).deleted, [(USER, random_users[0].pk)])
+
+    Company.objects.filter(pk=random_company.pk).delete()
+    assert_equal(_sync(random_users[1], cursors[random_users[1].pk]).deleted, [(COMPANY, random_company.pk)])
+    assert_equal(_sync(admin, cursors[admin.pk]).deleted, [(USER, random_users[0].pk), (COMPANY, random_company.pk)])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(2, 2)], indirect=True)
+def test_bulk_operations_should_record_removed_memberships(
+    admin: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    first, second = random_companies
+    first.users.add(*random_users)
+    CompanyService().assign_memberships(as_user=admin, remove=[(random_users[0].pk, first.pk)])
+    User.objects.update_many([random_users[1].pk], as_user=admin, companies=[second.pk])
+
+    removed = set(Tombstone.objects.filter(model=USER).values_list("object_id", "company_id"))
+    assert_equal(removed, {(random_users[0].pk, first.pk), (random_users[1].pk, first.pk)})
+
+
+@pytest.mark.django_db
+def test_purged_tombstones_should_expire_old_cursors(admin: User, random_user: User) -> None:
+    cursor = _sync(admin).cursor
+    User.objects.get(pk=random_user.pk).delete()
+    old = timezone.now() - datetime.timedelta(days=365)
+    Tombstone.objects.update(deleted=old)
+    expired = _sync(admin, cursor).cursor
+
+    call_command("purge_tombstones", stdout=None)
+
+    assert_equal(Tombstone.objects.count(), 0)
+    with pytest.raises(ValueError):
+        _sync(admin, expired)
+
+
+@pytest.mark.django_db
+def test_changes_since_query(admin_client: Client, admin: User, random_company: Company) -> None:
+    random_company.users.add(admin)
+    response = graphql_query(CHANGES_SINCE_QUERY, client=admin_client).json()["data"]["changesSince"]
+
+    assert_equal({user["username"]: user["companyIds"] for user in response["users"]}["admin"], [random_company.pk])
+    assert_equal(response["companies"], [{"id": str(random_company.pk), "name": random_company.name}])
+    assert {role["name"] for role in response["roles"]} >= {UserRole.ADMIN.upper(), UserRole.GUEST.upper()}
+
+    response = graphql_query(CHANGES_SINCE_QUERY, variables={"cursor": response["cursor"]}, client=admin_client)
+    assert_equal(response.json()["data"]["changesSince"]["users"], [])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("variables", [{"cursor": "not a cursor"}, {"first": 0}])
+def test_changes_since_query_should_reject_invalid_arguments(admin_client: Client, variables: dict) -> None:
+    response = graphql_query(CHANGES_SINCE_QUERY, variables=variables, client=admin_client).json()
+    assert_equal(extract_error_code_from_graphql_error_response(response), ApiErrorCode.INVALID_VALUES.value)
+
+
+@pytest.mark.django_db
+def test_changes_since_should_not_be_cached(admin_client: Client, settings: SettingsWrapper) -> None:
+    settings.GRAPHQL_RESPONSE_CACHE = {**settings.GRAPHQL_RESPONSE_CACHE, "ENABLED": True}
+    request = admin_client.get("/").wsgi_request
+    assert_equal(response_cache.get_request_key(request, CHANGES_SINCE_QUERY, None, None), None)
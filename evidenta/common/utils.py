@@ -1,3 +1,5 @@
+import secrets
+import string
 from urllib.parse import urljoin
 
 
@@ -5,3 +7,12 @@ def create_url(base: str, resource_path, **kwargs) -> str:
     if kwargs:
         resource_path = resource_path.format(**kwargs)
     return urljoin(base, resource_path)
+
+
+def generate_company_identification_number(partial_number: str | None = None) -> str:
+    partial_number = partial_number or "".join(secrets.choice(string.digits) for _ in range(7))
+    sum_value = 0
+    for i, weight in zip(range(7), range(8, 1, -1), strict=False):
+        sum_value += int(partial_number[i]) * weight
+    control_digit = (11 - (sum_value % 11)) % 10
+    return partial_number + str(control_digit)
@@ -0,0 +1,16 @@
+import secrets
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from evidenta.common.metrics import registry
+
+
+@require_GET
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    # without a configured token the metrics are not exposed at all
+    token = settings.GRAPHQL_INSTRUMENTATION.get("METRICS_TOKEN")
+    if not token or not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
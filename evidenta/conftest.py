@@ -6,13 +6,19 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.management import call_command
 from django.test import Client
+from django.test.utils import setup_databases, teardown_databases
 
 import pytest
 import pytest_django
 from _pytest.fixtures import SubRequest
+from pytest_django.fixtures import _disable_migrations
 
 from evidenta.common.enums import ApiErrorCode
+from evidenta.common.management.data import enums as init_data_enums
+from evidenta.common.management.data import init_data
 from evidenta.common.management.data.init_data import create_roles_and_permissions
+from evidenta.common.testing.benchmark import BenchmarkDataset, BenchmarkReport, seed_benchmark_data
+from evidenta.common.testing.database import setup_snapshot_databases
 from evidenta.common.testing.utils import (
     generate_mutation_query,
     generate_random_company_data,
@@ -24,12 +30,68 @@ from evidenta.core.user.enums import UserRole
 from evidenta.core.user.models import Role, User
 
 
+def seed_test_database() -> None:
+    for fixture in settings.TEST_FIXTURES_FILES:
+        call_command("loaddata", fixture)
+    create_roles_and_permissions()
+
+
 @pytest.fixture(scope="session")
-def django_db_setup(django_db_setup, django_db_blocker: pytest_django.plugin.DjangoDbBlocker) -> None:
+def django_db_setup(
+    request: pytest.FixtureRequest,
+    django_test_environment: None,
+    django_db_blocker: pytest_django.plugin.DjangoDbBlocker,
+    django_db_use_migrations: bool,
+    django_db_keepdb: bool,
+    django_db_modify_db_settings: None,
+) -> None:
+    """
+    Replaces pytest-django's fixture - the migrated and seeded database is restored from a snapshot (see
+    TEST_DB_SNAPSHOT), with --reuse-db, --nomigrations or disabled snapshots it's built the usual way.
+    """
+    verbosity = request.config.option.verbose
+    with django_db_blocker.unblock():
+        if settings.TEST_DB_SNAPSHOT["ENABLED"] and django_db_use_migrations and not django_db_keepdb:
+            db_cfg = setup_snapshot_databases(
+                seed_test_database,
+                [*settings.TEST_FIXTURES_FILES, init_data.__file__, init_data_enums.__file__],
+                settings.TEST_DB_SNAPSHOT["CACHE_DIR"],
+                verbosity,
+            )
+        else:
+            if not django_db_use_migrations:
+                _disable_migrations()
+            db_cfg = setup_databases(verbosity=verbosity, interactive=False, keepdb=django_db_keepdb)
+            seed_test_database()
+
+    yield
+
+    if not django_db_keepdb:
+        with django_db_blocker.unblock():
+            teardown_databases(db_cfg, verbosity=verbosity)
+
+
+@pytest.fixture(scope="module")
+def benchmark_dataset(django_db_setup, django_db_blocker: pytest_django.plugin.DjangoDbBlocker) -> BenchmarkDataset:
+    with django_db_blocker.unblock():
+        dataset = seed_benchmark_data(settings.BENCHMARK_COMPANIES, settings.BENCHMARK_USERS_PER_COMPANY)
+    yield dataset
     with django_db_blocker.unblock():
-        for fixture in settings.TEST_FIXTURES_FILES:
-            call_command("loaddata", fixture)
-        create_roles_and_permissions()
+        dataset.delete()
+
+
+@pytest.fixture(scope="session")
+def benchmark_report() -> BenchmarkReport:
+    report = BenchmarkReport()
+    report.metadata.update(
+        {
+            "companies": settings.BENCHMARK_COMPANIES,
+            "users_per_company": settings.BENCHMARK_USERS_PER_COMPANY,
+            "rounds": settings.BENCHMARK_ROUNDS,
+        }
+    )
+    yield report
+    report.dump()
 
 
 @pytest.fixture
@@ -116,6 +178,12 @@ def admin() -> User:
     return User.objects.create_superuser(**user_data)
 
 
+@pytest.fixture
+def admin_client(admin: User, django_client: Client) -> Client:
+    django_client.force_login(admin)
+    return django_client
+
+
 @pytest.fixture
 def supervisor() -> User:
     user_data = generate_random_user_data()
@@ -6,6 +6,7 @@ from graphene_django import DjangoObjectType
 from graphql_jwt import relay
 
 from evidenta.common.enums import ApiErrorCode
+from evidenta.common.schemas.mutations import ClientIDMutation
 from evidenta.common.schemas.utils import (
     InvalidDataAPIException,
     get_error_message_from_error_code,
@@ -26,7 +27,7 @@ class TokenType(DjangoObjectType):
         fields = "__all__"
 
 
-class SendInvitationLink(graphene.relay.ClientIDMutation):
+class SendInvitationLink(ClientIDMutation):
     class Input:
         email = graphene.String(required=True)
 
@@ -47,7 +48,7 @@ class SendInvitationLink(graphene.relay.ClientIDMutation):
         return SendInvitationLink()
 
 
-class SetPassword(graphene.relay.ClientIDMutation):
+class SetPassword(ClientIDMutation):
     class Input:
         token = graphene.String(required=True)
         password = graphene.String(required=True)
@@ -79,7 +80,7 @@ class SetPassword(graphene.relay.ClientIDMutation):
         return SetPassword()
 
 
-class SendChangePasswordOTPToken(graphene.relay.ClientIDMutation):
+class SendChangePasswordOTPToken(ClientIDMutation):
     class Input:
         email = graphene.String(required=True)
 
@@ -100,7 +101,7 @@ class SendChangePasswordOTPToken(graphene.relay.ClientIDMutation):
         return SendChangePasswordOTPToken()
 
 
-class ChangePassword(graphene.relay.ClientIDMutation):
+class ChangePassword(ClientIDMutation):
     class Input:
         old_password = graphene.String(required=True)
         new_password = graphene.String(required=True)
@@ -140,7 +141,7 @@ class ChangePassword(graphene.relay.ClientIDMutation):
         return ChangePassword()
 
 
-class SendResetPasswordLink(graphene.relay.ClientIDMutation):
+class SendResetPasswordLink(ClientIDMutation):
     class Input:
         email = graphene.String(required=True)
 
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.14 on 2026-10-19 12:55
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_users(apps, schema_editor):
+    Company = apps.get_model("company", "Company")
+    memberships = (
+        Company.users.through.objects.filter(company_id=models.OuterRef("pk"))
+        .values("company_id")
+        .annotate(count=models.Count("*"))
+        .values("count")
+    )
+    Company.objects.update(users_count=Coalesce(models.Subquery(memberships), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="users_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.14 on 2026-10-19 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0003_role_users_count"),
+        ("company", "0003_company_users_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FirmStatistics",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("is_superuser", models.BooleanField(default=False)),
+                ("day", models.DateField(null=True)),
+                ("users_count", models.PositiveIntegerField(default=0)),
+                ("created_count", models.PositiveIntegerField(default=0)),
+                ("updated_count", models.PositiveIntegerField(default=0)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="statistics", to="company.company"
+                    ),
+                ),
+                ("role", models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to="user.role")),
+            ],
+            options={
+                "verbose_name_plural": "Firm statistics",
+                "db_table": "firm_statistics",
+                "indexes": [models.Index(fields=["company", "day"], name="firm_statis_company_7008a6_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0004_firm_statistics"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(fields=["updated", "id"], name="company_updated_7595e0_idx"),
+        ),
+    ]
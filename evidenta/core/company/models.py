@@ -1,9 +1,17 @@
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import Iterable
+
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.utils import IntegrityError
 
+from evidenta.common.cache import bump_versions_on_commit
+from evidenta.common.enums import ApiErrorCode
 from evidenta.common.exceptions import IntegrityException, NonUniqueErrorException
+from evidenta.common.models import DeletionTask
 from evidenta.common.models.base import BaseModel
 from evidenta.core.user.enums import UserRole
 from evidenta.core.user.models.user import User
@@ -11,6 +19,12 @@ from evidenta.core.user.models.user import User
 from .validators import CompanyIdentificationNumberValidator
 
 
+@dataclass(frozen=True)
+class MembershipChanges:
+    added: int = 0
+    removed: int = 0
+
+
 class CompanyManager(models.Manager):
     def create(self, **company_data: dict[str, any]) -> "Company":
         users: list[int] = company_data.pop("users", [])
@@ -24,11 +38,12 @@ class CompanyManager(models.Manager):
         return company
 
     def get_all_related_companies(self, as_user: User) -> models.QuerySet["Company"]:
+        # companies being deleted by the deletion worker are hidden
         match as_user.role:
             case UserRole.ADMIN | UserRole.SUPERVISOR:
-                return self.all()
+                return self.filter(is_deleting=False)
             case _:
-                return as_user.companies.all()
+                return as_user.companies.filter(is_deleting=False)
 
     def update(self, company_id: int, as_user: User, **company_data) -> None:
         self.clean_and_validate_data(company_data)
@@ -41,9 +56,106 @@ class CompanyManager(models.Manager):
         except IntegrityError as e:
             raise IntegrityException(str(e), {"users:": company_data.get("users")}) from e
 
-    def delete(self, company_id, as_user: "User") -> None:
-        if not self.get_all(as_user=as_user).filter(id=company_id).delete()[0]:
+    def delete(self, company_id, as_user: "User") -> DeletionTask:
+        """Hides the company right away, the company and its memberships are deleted by the deletion worker."""
+        from evidenta.common.deletion import request_deletion
+
+        if not (
+            tasks := request_deletion(self.get_all_related_companies(as_user=as_user).filter(id=company_id), as_user)
+        ):
             raise Company.DoesNotExist(f"Does not exist: company id={company_id} does not exist.")
+        return tasks[0]
+
+    def assign_memberships(
+        self, as_user: User, add: list[tuple[int, int]] = (), remove: list[tuple[int, int]] = ()
+    ) -> MembershipChanges:
+        """
+        Adds and removes (user id, company id) memberships. Unlike `set_users`/`set_companies`, which rewrite
+        the whole membership of one object, only the difference against the current state is written - one
+        SELECT of the affected pairs, one bulk INSERT and one DELETE, whatever the number of pairs.
+        """
+        add, remove = set(add), set(remove)
+        if add & remove:
+            raise ValidationError(
+                "Membership can't be added and removed at once.",
+                params={"field": "memberships", "value": sorted(add & remove)},
+                code=ApiErrorCode.INVALID_VALUE,
+            )
+        if not (pairs := add | remove):
+            return MembershipChanges()
+        self.check_if_memberships_are_related(pairs, as_user)
+
+        through = self.model.users.through
+        user_ids, company_ids = {user_id for user_id, _ in pairs}, {company_id for _, company_id in pairs}
+        existing = set(
+            through.objects.filter(user_id__in=user_ids, company_id__in=company_ids).values_list(
+                "user_id", "company_id"
+            )
+        )
+        added = add - existing
+        while added:
+            try:
+                with transaction.atomic(using=self.db):
+                    through.objects.bulk_create(
+                        [through(user_id=user_id, company_id=company_id) for user_id, company_id in added]
+                    )
+                break
+            except IntegrityError:
+                # the same memberships were assigned concurrently, they are not added by this call
+                assigned = added & set(
+                    through.objects.filter(user_id__in=user_ids, company_id__in=company_ids).values_list(
+                        "user_id", "company_id"
+                    )
+                )
+                if not assigned:
+                    raise
+                added -= assigned
+        removed = 0
+        if to_remove := remove & existing:
+            companies_by_user: dict[int, list[int]] = {}
+            for user_id, company_id in to_remove:
+                companies_by_user.setdefault(user_id, []).append(company_id)
+            removed, _ = through.objects.filter(
+                reduce(or_, (models.Q(user_id=u, company_id__in=c) for u, c in companies_by_user.items()))
+            ).delete()
+        if added or removed:
+            self.memberships_changed(added=added, removed=to_remove)
+        return MembershipChanges(added=len(added), removed=removed)
+
+    def memberships_changed(
+        self, added: Iterable[tuple[int, int]] = (), removed: Iterable[tuple[int, int]] = ()
+    ) -> None:
+        """
+        Bulk writes of the through table skip m2m_changed, so their callers update counters, statistics,
+        synced changes and cached responses by this.
+        """
+        from evidenta.common.counters import refresh_company_users_count
+        from evidenta.common.statistics import refresh_firm_statistics_on_commit
+        from evidenta.common.sync import record_removed_memberships, touch_memberships
+
+        added, removed = set(added), set(removed)
+        changed_company_ids = {company_id for _, company_id in added | removed}
+        refresh_company_users_count(changed_company_ids)
+        refresh_firm_statistics_on_commit(changed_company_ids)
+        touch_memberships(added)
+        record_removed_memberships(removed)
+        bump_versions_on_commit(User._meta.label, self.model._meta.label, using=self.db)
+
+    def check_if_memberships_are_related(self, pairs: set[tuple[int, int]], as_user: User) -> None:
+        user_ids, company_ids = {user_id for user_id, _ in pairs}, {company_id for _, company_id in pairs}
+        if missing_users := user_ids - User.objects.get_related_ids(list(user_ids), as_user=as_user):
+            raise ValidationError(
+                "Some of the user id does not exist.",
+                params={"field": "users", "value": sorted(missing_users)},
+                code=ApiErrorCode.INVALID_VALUE,
+            )
+        related_companies = self.get_all_related_companies(as_user=as_user).filter(pk__in=company_ids)
+        if missing_companies := company_ids - set(related_companies.values_list("pk", flat=True)):
+            raise ValidationError(
+                "Some of the company id does not exist.",
+                params={"field": "companies", "value": sorted(missing_companies)},
+                code=ApiErrorCode.COMPANY_DOES_NOT_EXIST,
+            )
 
 
 class Company(BaseModel):
@@ -66,13 +178,43 @@ class Company(BaseModel):
     zip_code = models.CharField(max_length=5, validators=[MinLengthValidator(5)])
 
     users = models.ManyToManyField("user.User", related_name="companies", blank=True)
+    # set by the deletion request, the company is deleted by the deletion worker (evidenta.common.deletion)
+    is_deleting = models.BooleanField(default=False, editable=False)
+    # maintained by evidenta.common.counters, repaired by the reconcile_counters command
+    users_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name_plural = "Companies"
         db_table = "company"
+        # keyset of the delta sync (evidenta.common.sync)
+        indexes = [models.Index(fields=["updated", "id"])]
 
     def set_users(self, users: list[int]) -> None:
         self.users.set(users)
 
     def __str__(self) -> str:
         return self.name
+
+
+class FirmStatistics(models.Model):
+    """
+    Summary of company members per role, maintained by `evidenta.common.statistics`. The row without `day` holds
+    the number of members, rows with `day` the number of members created and last updated on that day.
+    """
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="statistics")
+    role = models.ForeignKey("user.Role", on_delete=models.CASCADE, null=True)
+    # superusers are counted separately, clients and accountants don't see them (see `get_all_related_users`)
+    is_superuser = models.BooleanField(default=False)
+    day = models.DateField(null=True)
+    users_count = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Firm statistics"
+        db_table = "firm_statistics"
+        indexes = [models.Index(fields=["company", "day"])]
+
+    def __str__(self) -> str:
+        return f"{self.company_id}:{self.role_id}:{self.day or 'total'}"
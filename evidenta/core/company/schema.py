@@ -16,6 +16,9 @@ class CompanyNode(DjangoObjectType):
         }
         interfaces = (graphene.relay.Node,)
 
+    # query cost weights (see evidenta.common.schemas.cost)
+    field_costs = {"users": 5}
+
     pk = graphene.Int()
 
     @classmethod
@@ -0,0 +1,16 @@
+from django.db import transaction
+
+from evidenta.common.services.base import BaseService
+from evidenta.core.user.models import User
+
+from .models import Company, MembershipChanges
+
+
+class CompanyService(BaseService):
+    manager = Company.objects
+
+    def assign_memberships(
+        self, as_user: User, add: list[tuple[int, int]] = (), remove: list[tuple[int, int]] = ()
+    ) -> MembershipChanges:
+        with transaction.atomic():
+            return self.manager.assign_memberships(as_user=as_user, add=add, remove=remove)
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.company.models import Company, MembershipChanges
+from evidenta.core.company.service import CompanyService
+from evidenta.core.user.models import User
+
+
+SERVICE = CompanyService()
+
+
+def _memberships(users: list[User]) -> set[tuple[int, int]]:
+    through = Company.users.through
+    return set(through.objects.filter(user__in=users).values_list("user_id", "company_id"))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(3, 2)], indirect=True)
+def test_assign_memberships_should_write_only_the_difference(
+    admin: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    first, second = random_companies
+    first.users.set(random_users[:2])
+
+    changes = SERVICE.assign_memberships(
+        as_user=admin,
+        add=[(random_users[0].pk, first.pk), (random_users[2].pk, first.pk), (random_users[0].pk, second.pk)],
+        remove=[(random_users[1].pk, first.pk), (random_users[2].pk, second.pk)],
+    )
+
+    assert_equal(changes, MembershipChanges(added=2, removed=1))
+    assert_equal(
+        _memberships(random_users),
+        {(random_users[0].pk, first.pk), (random_users[2].pk, first.pk), (random_users[0].pk, second.pk)},
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_assign_memberships_should_not_count_existing_memberships_as_added(
+    admin: User, random_users: list[User], random_company: Company
+) -> None:
+    pairs = [(user.pk, random_company.pk) for user in random_users]
+    through = Company.users.through
+
+    def _atomic(**kwargs):
+        # the first pair is assigned by another request between the SELECT and the INSERT
+        if not through.objects.filter(user_id=pairs[0][0]).exists():
+            through.objects.create(user_id=pairs[0][0], company_id=pairs[0][1])
+        return transaction.atomic(**kwargs)
+
+    with patch("evidenta.core.company.models.transaction", SimpleNamespace(atomic=_atomic)):
+        changes = SERVICE.assign_memberships(as_user=admin, add=pairs)
+    assert_equal(changes, MembershipChanges(added=1))
+    assert_equal(SERVICE.assign_memberships(as_user=admin, add=pairs), MembershipChanges())
+    assert_equal(_memberships(random_users), set(pairs))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(20, 5)], indirect=True)
+def test_assign_memberships_should_not_depend_on_number_of_pairs(
+    admin: User, random_users: list[User], random_companies: list[Company]
+) -> None:
+    def _count_queries(users: list[User]) -> int:
+        pairs = [(user.pk, company.pk) for user in users for company in random_companies]
+        with CaptureQueriesContext(connection) as ctx:
+            SERVICE.assign_memberships(as_user=admin, add=pairs)
+            SERVICE.assign_memberships(as_user=admin, remove=pairs[::2])
+        return len(ctx.captured_queries)
+
+    assert_equal(_count_queries(random_users[:2]), _count_queries(random_users[2:]))
+    assert_equal(len(_memberships(random_users)), 50)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_assign_memberships_should_reject_companies_not_related_to_user(
+    accountant: User, random_company: Company, random_users: list[User]
+) -> None:
+    with pytest.raises(ValidationError):
+        SERVICE.assign_memberships(as_user=accountant, add=[(random_users[0].pk, random_company.pk)])
+    assert_equal(_memberships(random_users), set())
+
+
+@pytest.mark.django_db
+def test_assign_memberships_should_reject_pair_added_and_removed(admin: User, random_company: Company) -> None:
+    with pytest.raises(ValidationError):
+        SERVICE.assign_memberships(
+            as_user=admin, add=[(admin.pk, random_company.pk)], remove=[(admin.pk, random_company.pk)]
+        )
@@ -0,0 +1,23 @@
+from django.http import HttpRequest, StreamingHttpResponse
+
+from evidenta.common.export import export_response, export_view
+from evidenta.core.company.models import Company
+
+
+COMPANY_EXPORT_COLUMNS = [
+    ("id", "ID"),
+    ("name", "Name"),
+    ("description", "Description"),
+    ("company_identification_number", "Company identification number"),
+    ("tax_identification_number", "Tax identification number"),
+    ("address_1", "Address 1"),
+    ("address_2", "Address 2"),
+    ("city", "City"),
+    ("zip_code", "ZIP code"),
+]
+
+
+@export_view(["company.view_company"])
+def companies_export_view(request: HttpRequest, export_format: str) -> StreamingHttpResponse:
+    companies = Company.objects.get_all_related_companies(as_user=request.user).order_by("pk")
+    return export_response(companies, COMPANY_EXPORT_COLUMNS, "companies", export_format)
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.14 on 2026-10-19 12:55
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_users(apps, schema_editor):
+    Role = apps.get_model("user", "Role")
+    User = apps.get_model("user", "User")
+    holders = (
+        User.objects.filter(role_id=models.OuterRef("pk"))
+        .values("role_id")
+        .annotate(count=models.Count("*"))
+        .values("count")
+    )
+    Role.objects.update(users_count=Coalesce(models.Subquery(holders), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0002_role_created_role_updated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="role",
+            name="users_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.14 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0003_role_users_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="role",
+            index=models.Index(fields=["updated", "id"], name="user_role_updated_95c702_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["updated", "id"], name="user_updated_eb3fb2_idx"),
+        ),
+    ]
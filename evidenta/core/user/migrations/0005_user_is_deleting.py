@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_updated_id_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="is_deleting",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -8,6 +8,12 @@ from evidenta.core.user.enums import UserRole
 class Role(BaseModel):
     name = models.CharField(choices=UserRole.choices, unique=True, max_length=20)
     permissions = models.ManyToManyField(Permission, blank=True)
+    # maintained by evidenta.common.counters, repaired by the reconcile_counters command
+    users_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # keyset of the delta sync (evidenta.common.sync)
+        indexes = [models.Index(fields=["updated", "id"])]
 
     def __str__(self) -> str:
         return self.name
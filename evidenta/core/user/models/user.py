@@ -1,10 +1,14 @@
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, Permission, UserManager
-from django.core.exceptions import ValidationError
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from evidenta.common.cache import bump_versions_on_commit
 from evidenta.common.enums import ApiErrorCode
+from evidenta.common.models import DeletionTask
 from evidenta.common.models.base import BaseModel
 from evidenta.core.user.enums import UserGender, UserRole
 from evidenta.core.user.models import Role
@@ -13,6 +17,9 @@ from evidenta.core.user.models import Role
 class CustomUserManager(UserManager):
     def create(self, **user_data) -> "User":
         user_data["role"] = self.get_role_object(user_data.get("role"))
+        if not user_data.get("password"):
+            # invited users set their password later through the invitation link
+            user_data["password"] = make_password(None)
         companies: list[int] = user_data.pop("companies", [])
         user = super().create(**user_data)
         if companies:
@@ -21,13 +28,16 @@ class CustomUserManager(UserManager):
         return user
 
     def get_all_related_users(self, as_user: "User") -> models.QuerySet["User"]:
+        # users and companies being deleted by the deletion worker are hidden
+        users = self.filter(is_deleting=False)
         match as_user.role.name:
             case UserRole.GUEST:
-                return self.filter(id=as_user.id)
+                return users.filter(id=as_user.id)
             case UserRole.CLIENT | UserRole.ACCOUNTANT:
-                return self.filter(companies__in=as_user.companies.filter(), is_superuser=False).distinct()
+                companies = as_user.companies.filter(is_deleting=False)
+                return users.filter(companies__in=companies, is_superuser=False).distinct()
             case UserRole.SUPERVISOR | UserRole.ADMIN:
-                return self.filter()
+                return users
 
     def update(self, user_id: int, as_user: "User", **user_data) -> None:
         if "role" in user_data:
@@ -40,9 +50,92 @@ class CustomUserManager(UserManager):
         user.update(**user_data)
         user.save()
 
-    def delete(self, user_id: int, as_user: "User"):
-        if not self.get_all_related_users(as_user=as_user).filter(id=user_id).delete()[0]:
+    def delete(self, user_id: int, as_user: "User") -> DeletionTask:
+        """Hides the user right away, the user and its dependents are deleted by the deletion worker."""
+        from evidenta.common.deletion import request_deletion
+
+        if not (tasks := request_deletion(self.get_all_related_users(as_user=as_user).filter(id=user_id), as_user)):
             raise User.DoesNotExist(f"Does not exist: user id={user_id} does not exist.")
+        return tasks[0]
+
+    def get_related_ids(self, user_ids: list[int], as_user: "User") -> set[int]:
+        return set(self.get_all_related_users(as_user=as_user).filter(pk__in=user_ids).values_list("pk", flat=True))
+
+    def update_many(self, user_ids: list[int], as_user: "User", **user_data) -> set[int]:
+        """
+        Set-based `update` of all the users visible to `as_user`, the data are validated once and written by
+        a single UPDATE. Returns ids of the updated users.
+        """
+        companies: list[int] | None = user_data.pop("companies", None)
+        if "role" in user_data:
+            user_data["role"] = self.get_role_object(user_data.get("role"))
+        if companies is not None:
+            # a repeated id would violate the unique membership constraint of the through table
+            companies = list(dict.fromkeys(companies))
+            self.check_if_companies_exists(companies)
+        self.clean_patch(user_data)
+
+        if not (ids := self.get_related_ids(user_ids, as_user)):
+            return ids
+        from evidenta.common.counters import refresh_company_users_count, refresh_role_users_count
+        from evidenta.common.statistics import refresh_firm_statistics_on_commit
+        from evidenta.common.sync import record_removed_memberships
+        from evidenta.core.company.models import Company
+
+        through = Company.users.through
+        memberships = through.objects.filter(user_id__in=ids)
+        old_memberships = set(memberships.values_list("user_id", "company_id"))
+        changed_company_ids = {*(companies or ()), *(company_id for _, company_id in old_memberships)}
+        if "role" in user_data:
+            changed_role_ids = {user_data["role"].pk, *self.filter(pk__in=ids).values_list("role_id", flat=True)}
+        # update() skips save(), so neither auto_now nor the signals maintaining counters, statistics and
+        # invalidating cached responses run
+        self.filter(pk__in=ids).update(**user_data, updated=timezone.now())
+        labels = [self.model._meta.label]
+        if "role" in user_data:
+            refresh_role_users_count(changed_role_ids)
+        if companies is not None:
+            memberships.delete()
+            through.objects.bulk_create(through(user_id=user_id, company_id=c) for user_id in ids for c in companies)
+            record_removed_memberships(pair for pair in old_memberships if pair[1] not in companies)
+            refresh_company_users_count(changed_company_ids)
+            labels.append(Company._meta.label)
+        refresh_firm_statistics_on_commit(changed_company_ids)
+        bump_versions_on_commit(*labels, using=self.db)
+        return ids
+
+    def delete_many(self, user_ids: list[int], as_user: "User") -> set[int]:
+        from evidenta.common.deletion import request_deletion
+
+        if ids := self.get_related_ids(user_ids, as_user):
+            request_deletion(self.filter(pk__in=ids), as_user)
+        return ids
+
+    def clean_patch(self, user_data: dict[str, any]) -> None:
+        """Field validation of `full_clean` and `User.clean` normalization for data applied to many users."""
+        errors = {}
+        for field_name, value in user_data.items():
+            if field_name == "role":
+                continue
+            try:
+                user_data[field_name] = self.model._meta.get_field(field_name).clean(value, None)
+            except FieldDoesNotExist as e:
+                raise ValidationError(
+                    f"Field {field_name} does not exist",
+                    params={"field": field_name, "value": value},
+                    code=ApiErrorCode.FIELD_DOES_NOT_EXIST,
+                ) from e
+            except ValidationError as e:
+                errors[field_name] = e.error_list
+        if errors:
+            raise ValidationError(errors)
+        for field_name in ("first_name", "last_name"):
+            if isinstance(user_data.get(field_name), str):
+                user_data[field_name] = user_data[field_name].capitalize()
+        if isinstance(user_data.get("email"), str):
+            user_data["email"] = user_data["email"].lower()
+        if "gender" in user_data and not user_data["gender"]:
+            user_data["gender"] = None
 
     @staticmethod
     def get_role_object(role_name: str) -> Role:
@@ -120,9 +213,13 @@ class User(AbstractUser, BaseModel):
         null=True,
         blank=True,
     )
+    # set by the deletion request, the user is deleted by the deletion worker (evidenta.common.deletion)
+    is_deleting = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ["pk"]
+        # keyset of the delta sync (evidenta.common.sync)
+        indexes = [models.Index(fields=["updated", "id"])]
         permissions = [
             ("assign_company_user", "Can assign company to user"),
             ("assign_role", "Can assign role to user"),
@@ -130,6 +227,14 @@ class User(AbstractUser, BaseModel):
         ]
         db_table = "user"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # stored role, the role counters are moved when the role changes (see evidenta.common.counters)
+        if "role_id" in user.__dict__:
+            user._loaded_role_id = user.role_id
+        return user
+
     def clean(self):
         super().clean()
         self._clean_string_data()
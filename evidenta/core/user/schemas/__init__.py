@@ -1,5 +1,18 @@
+from .deletion import DeletionTaskQuery
 from .role import RoleQuery, RoleType
+from .statistics import FirmStatisticsQuery
+from .sync import SyncQuery
 from .user import MeQuery, UserMutation, UserNode, UserQuery
 
 
-__all__ = ("MeQuery", "UserQuery", "UserMutation", "UserNode", "RoleType", "RoleQuery")
+__all__ = (
+    "MeQuery",
+    "UserQuery",
+    "UserMutation",
+    "UserNode",
+    "RoleType",
+    "RoleQuery",
+    "FirmStatisticsQuery",
+    "SyncQuery",
+    "DeletionTaskQuery",
+)
@@ -0,0 +1,47 @@
+import graphene
+from graphene_django.types import DjangoObjectType
+
+from evidenta.common.deletion import get_deletion_task
+from evidenta.common.exceptions import ObjectDoesNotExist
+from evidenta.common.models import DeletionTask
+from evidenta.common.schemas.utils import login_required, raise_does_not_exist_error, raise_unexpected_error
+
+
+class DeletedRowsType(graphene.ObjectType):
+    model = graphene.String(required=True, description="Model label, e.g. `custom_auth.Token`.")
+    count = graphene.Int(required=True)
+
+
+class DeletionTaskType(DjangoObjectType):
+    class Meta:
+        model = DeletionTask
+        fields = ("id", "model", "object_id", "status", "error", "created", "updated")
+
+    deleted = graphene.List(graphene.NonNull(DeletedRowsType), required=True)
+
+    @staticmethod
+    def resolve_deleted(task: DeletionTask, _):
+        return [DeletedRowsType(model=model, count=count) for model, count in sorted(task.progress.items())]
+
+
+class DeletionTaskQuery(graphene.ObjectType):
+    deletion_task = graphene.Field(
+        DeletionTaskType,
+        id=graphene.Int(required=True),
+        description="Progress of a deletion requested by `deleteUser`.",
+    )
+
+    @classmethod
+    @login_required
+    def resolve_deletion_task(cls, _, info, id):
+        try:
+            return get_deletion_task(as_user=info.context.user, task_id=id)
+        except ObjectDoesNotExist as e:
+            raise_does_not_exist_error("DeletionTask", {"field": "pk", "value": id}, e)
+        except Exception as e:
+            raise_unexpected_error(
+                method="DeletionTaskQuery:resolve_deletion_task",
+                input_data={"id": id},
+                user=info.context.user,
+                original_error=e,
+            )
@@ -29,6 +29,9 @@ class RoleType(DjangoObjectType):
         interfaces = (relay.Node,)
         fields = "__all__"
 
+    # query cost weights (see evidenta.common.schemas.cost)
+    field_costs = {"user_set": 5}
+
 
 class RoleQuery(graphene.ObjectType):
     all_roles = DjangoFilterConnectionField(RoleType, filterset_class=RoleFilter)
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+import graphene
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.schemas.utils import (
+    login_required,
+    permissions_required,
+    raise_unexpected_error,
+    raise_validation_error,
+)
+from evidenta.common.statistics import get_firm_statistics
+
+
+class RoleStatisticsType(graphene.ObjectType):
+    role = graphene.String()
+    users = graphene.Int(required=True)
+    created = graphene.Int(required=True, description="Members created in the last `days` days.")
+    updated = graphene.Int(required=True, description="Members last updated in the last `days` days.")
+
+
+class CompanyStatisticsType(graphene.ObjectType):
+    company_id = graphene.Int(required=True)
+    company_name = graphene.String(required=True)
+    users = graphene.Int(required=True)
+    roles = graphene.List(graphene.NonNull(RoleStatisticsType), required=True)
+
+
+class FirmStatisticsQuery(graphene.ObjectType):
+    firm_statistics = graphene.List(
+        graphene.NonNull(CompanyStatisticsType),
+        days=graphene.Int(default_value=7),
+        description="Members of the visible companies per role, read from the pre-aggregated summary.",
+    )
+
+    @classmethod
+    @login_required
+    @permissions_required(["user.view_user"])
+    def resolve_firm_statistics(cls, _, info, days):
+        if not 1 <= days <= settings.FIRM_STATISTICS["DAYS"]:
+            error = ValidationError("Invalid number of days.", params={"value": days}, code=ApiErrorCode.INVALID_VALUE)
+            raise_validation_error(ValidationError({"days": error}), obj_name="FirmStatistics")
+        try:
+            return get_firm_statistics(as_user=info.context.user, days=days)
+        except Exception as e:
+            raise_unexpected_error(
+                method="FirmStatisticsQuery:resolve_firm_statistics",
+                input_data={"days": days},
+                user=info.context.user,
+                original_error=e,
+            )
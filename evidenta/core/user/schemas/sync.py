@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+import graphene
+from graphene_django.types import DjangoObjectType
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.schemas.utils import (
+    login_required,
+    permissions_required,
+    raise_unexpected_error,
+    raise_validation_error,
+)
+from evidenta.common.sync import get_changes_since
+from evidenta.core.company.models import Company
+from evidenta.core.user.models import Role, User
+
+
+class SyncedUserType(DjangoObjectType):
+    class Meta:
+        model = User
+        fields = (
+            "id",
+            "username",
+            "title",
+            "first_name",
+            "last_name",
+            "email",
+            "phone_number",
+            "gender",
+            "birthday",
+            "is_active",
+            "created",
+            "updated",
+        )
+        # plain ids instead of nested objects, the clients keep the related objects synced separately
+        skip_registry = True
+
+    role_id = graphene.Int()
+    company_ids = graphene.List(graphene.NonNull(graphene.Int), required=True)
+
+    @staticmethod
+    def resolve_company_ids(user: User, _):
+        # companies are prefetched, only the ones visible to the caller
+        return [company.pk for company in user.companies.all()]
+
+
+class SyncedCompanyType(DjangoObjectType):
+    class Meta:
+        model = Company
+        fields = (
+            "id",
+            "name",
+            "description",
+            "company_identification_number",
+            "tax_identification_number",
+            "address_1",
+            "address_2",
+            "city",
+            "zip_code",
+            "created",
+            "updated",
+        )
+        skip_registry = True
+
+
+class SyncedRoleType(DjangoObjectType):
+    class Meta:
+        model = Role
+        fields = ("id", "name", "created", "updated")
+        skip_registry = True
+
+
+class DeletedObjectType(graphene.ObjectType):
+    model = graphene.String(required=True, description="Model label, e.g. `user.User`.")
+    pk = graphene.Int(required=True)
+
+    @staticmethod
+    def resolve_model(deleted: tuple[str, int], _):
+        return deleted[0]
+
+    @staticmethod
+    def resolve_pk(deleted: tuple[str, int], _):
+        return deleted[1]
+
+
+class ChangesType(graphene.ObjectType):
+    users = graphene.List(graphene.NonNull(SyncedUserType), required=True)
+    companies = graphene.List(graphene.NonNull(SyncedCompanyType), required=True)
+    roles = graphene.List(graphene.NonNull(SyncedRoleType), required=True)
+    deleted = graphene.List(graphene.NonNull(DeletedObjectType), required=True)
+    cursor = graphene.String(required=True, description="Cursor of the next call.")
+    has_more = graphene.Boolean(required=True, description="Next call returns more changes right away.")
+
+
+class SyncQuery(graphene.ObjectType):
+    changes_since = graphene.Field(
+        graphene.NonNull(ChangesType),
+        cursor=graphene.String(description="Cursor returned by the previous call, none for the full sync."),
+        first=graphene.Int(description="Maximum number of users, companies, roles and deleted objects each."),
+        description="Users, companies and roles changed and deleted since the cursor, for offline clients.",
+    )
+
+    @classmethod
+    @login_required
+    @permissions_required(["user.view_user"])
+    def resolve_changes_since(cls, _, info, cursor=None, first=None):
+        config = settings.DELTA_SYNC
+        if first is None:
+            first = config["PAGE_SIZE"]
+        if not 1 <= first <= config["MAX_PAGE_SIZE"]:
+            error = ValidationError("Invalid page size.", params={"value": first}, code=ApiErrorCode.INVALID_VALUE)
+            raise_validation_error(ValidationError({"first": error}), obj_name="Changes")
+        try:
+            return get_changes_since(as_user=info.context.user, cursor=cursor, first=first)
+        except ValueError:
+            error = ValidationError("Invalid cursor.", params={"value": cursor}, code=ApiErrorCode.INVALID_VALUE)
+            raise_validation_error(ValidationError({"cursor": error}), obj_name="Changes")
+        except Exception as e:
+            raise_unexpected_error(
+                method="SyncQuery:resolve_changes_since",
+                input_data={"cursor": cursor, "first": first},
+                user=info.context.user,
+                original_error=e,
+            )
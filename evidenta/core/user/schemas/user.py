@@ -7,10 +7,13 @@ from graphene_django.filter.fields import DjangoFilterConnectionField
 from graphene_django.types import DjangoObjectType
 from graphql_relay import from_global_id
 
+from evidenta.common.enums import ApiErrorCode
 from evidenta.common.exceptions import ObjectDoesNotExist
+from evidenta.common.schemas.mutations import ClientIDMutation
 from evidenta.common.schemas.utils import (
     check_if_user_can_assign_companies,
     check_if_user_can_assign_role,
+    get_error_message_from_error_code,
     login_required,
     permissions_required,
     raise_does_not_exist_error,
@@ -73,6 +76,9 @@ class UserNode(DjangoObjectType):
         exclude = ["password", "is_superuser", "is_staff"]
         interfaces = (graphene.relay.Node,)
 
+    # query cost weights (see evidenta.common.schemas.cost), role is fetched by select_related
+    field_costs = {"role": 0, "token_set": 2}
+
     pk = graphene.Int()
 
     @classmethod
@@ -80,7 +86,7 @@ class UserNode(DjangoObjectType):
     @permissions_required(["user.view_user"])
     def get_queryset(cls, _, info):
         try:
-            return UserService().get_all_related(as_user=info.context.user)
+            return UserService().get_all_related(as_user=info.context.user).select_related("role")
         except Exception as e:
             raise_unexpected_error(
                 method="UserNode:get_queryset",
@@ -124,7 +130,7 @@ class MeQuery(graphene.ObjectType):
         return info.context.user
 
 
-class CreateUser(graphene.relay.ClientIDMutation):
+class CreateUser(ClientIDMutation):
     class Input:
         username = graphene.String(required=True)
         title = graphene.String()
@@ -159,7 +165,7 @@ class CreateUser(graphene.relay.ClientIDMutation):
             )
 
 
-class UpdateUser(graphene.relay.ClientIDMutation):
+class UpdateUser(ClientIDMutation):
     class Input:
         user_id = graphene.ID(required=True)
         username = graphene.String()
@@ -200,17 +206,19 @@ class UpdateUser(graphene.relay.ClientIDMutation):
         return UpdateUser()
 
 
-class DeleteUser(graphene.relay.ClientIDMutation):
+class DeleteUser(ClientIDMutation):
     class Input:
         user_id = graphene.ID()
 
+    deletion_task_id = graphene.Int(description="The user is deleted in background, see `deletionTask`.")
+
     @classmethod
     @login_required
     @permissions_required(["user.delete_user"])
     def mutate_and_get_payload(cls, _, info, user_id):
         _user_id = from_global_id(user_id).id
         try:
-            UserService().delete(user_id=_user_id, as_user=info.context.user)
+            task = UserService().delete(user_id=_user_id, as_user=info.context.user)
         except ObjectDoesNotExist as e:
             raise_does_not_exist_error("User", {"field": "pk", "value": user_id}, e)
         except Exception as e:
@@ -220,10 +228,169 @@ class DeleteUser(graphene.relay.ClientIDMutation):
                 user=info.context.user,
                 original_error=e,
             )
-        return DeleteUser()
+        return DeleteUser(deletion_task_id=task.pk)
+
+
+class UserPatchInput(graphene.InputObjectType):
+    """Fields of `UpdateUser` which can be set to the same value for many users (not the unique ones)."""
+
+    title = graphene.String()
+    first_name = graphene.String()
+    last_name = graphene.String()
+    role = graphene.String()
+    phone_number = graphene.String()
+    gender = graphene.Int()
+    birthday = graphene.Date()
+    companies = graphene.List(graphene.ID)
+
+
+class BulkUserResult(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    success = graphene.Boolean(required=True)
+    error_code = graphene.String()
+    message = graphene.String()
+
+
+def _parse_user_ids(ids: list[str]) -> dict[str, int | None]:
+    parsed = {}
+    for global_id in ids:
+        try:
+            node_type, pk = from_global_id(global_id)
+            parsed[global_id] = int(pk) if node_type == UserNode.__name__ else None
+        except (TypeError, ValueError, UnicodeDecodeError):
+            parsed[global_id] = None
+    return parsed
+
+
+def _bulk_results(ids: dict[str, int | None], done: set[int]) -> list[BulkUserResult]:
+    error_code = ApiErrorCode.OBJECT_NOT_FOUND
+    return [
+        (
+            BulkUserResult(id=global_id, success=True)
+            if pk in done
+            else BulkUserResult(
+                id=global_id,
+                success=False,
+                error_code=error_code.value,
+                message=get_error_message_from_error_code(error_code, obj_name="User", field="id", value=global_id),
+            )
+        )
+        for global_id, pk in ids.items()
+    ]
+
+
+class UpdateUsers(ClientIDMutation):
+    """Applies the same patch to all the users, ids which don't exist or aren't visible are reported in results."""
+
+    class Input:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+        patch = UserPatchInput(required=True)
+
+    results = graphene.List(graphene.NonNull(BulkUserResult))
+
+    @classmethod
+    @login_required
+    @permissions_required(["user.change_user"])
+    def mutate_and_get_payload(cls, _, info, ids, patch):
+        patch = dict(patch)
+        if "companies" in patch:
+            check_if_user_can_assign_companies(info.context.user)
+        if "role" in patch:
+            check_if_user_can_assign_role(info.context.user, patch.get("role"))
+
+        user_ids = _parse_user_ids(ids)
+        try:
+            updated = UserService().update_many(
+                user_ids=[pk for pk in user_ids.values() if pk is not None], as_user=info.context.user, **patch
+            )
+        except ValidationError as e:
+            raise_validation_error(e, obj_name="User")
+        except Exception as e:
+            raise_unexpected_error(
+                method="UpdateUsers:mutate_and_get_payload",
+                input_data={"ids": ids, **patch},
+                user=info.context.user,
+                original_error=e,
+            )
+        return UpdateUsers(results=_bulk_results(user_ids, updated))
+
+
+class DeleteUsers(ClientIDMutation):
+    class Input:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    results = graphene.List(graphene.NonNull(BulkUserResult))
+
+    @classmethod
+    @login_required
+    @permissions_required(["user.delete_user"])
+    def mutate_and_get_payload(cls, _, info, ids):
+        user_ids = _parse_user_ids(ids)
+        try:
+            deleted = UserService().delete_many(
+                user_ids=[pk for pk in user_ids.values() if pk is not None], as_user=info.context.user
+            )
+        except Exception as e:
+            raise_unexpected_error(
+                method="DeleteUsers:mutate_and_get_payload",
+                input_data={"ids": ids},
+                user=info.context.user,
+                original_error=e,
+            )
+        return DeleteUsers(results=_bulk_results(user_ids, deleted))
+
+
+class MembershipInput(graphene.InputObjectType):
+    user_id = graphene.ID(required=True)
+    company_id = graphene.ID(required=True)
+
+
+def _parse_memberships(memberships: list[MembershipInput]) -> list[tuple[int, int]]:
+    try:
+        return [(int(from_global_id(m.user_id).id), int(m.company_id)) for m in memberships]
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValidationError(
+            "Invalid membership id.",
+            params={"field": "memberships", "value": [(m.user_id, m.company_id) for m in memberships]},
+            code=ApiErrorCode.INVALID_VALUE,
+        ) from e
+
+
+class AssignMemberships(ClientIDMutation):
+    """Adds and removes memberships of users in companies at once, only the counts of the changes are returned."""
+
+    class Input:
+        add = graphene.List(graphene.NonNull(MembershipInput))
+        remove = graphene.List(graphene.NonNull(MembershipInput))
+
+    added = graphene.Int()
+    removed = graphene.Int()
+
+    @classmethod
+    @login_required
+    @permissions_required(["user.change_user"])
+    def mutate_and_get_payload(cls, _, info, add=(), remove=()):
+        check_if_user_can_assign_companies(info.context.user)
+        try:
+            changes = UserService.assign_memberships(
+                as_user=info.context.user, add=_parse_memberships(add), remove=_parse_memberships(remove)
+            )
+        except ValidationError as e:
+            raise_validation_error(e, obj_name="User")
+        except Exception as e:
+            raise_unexpected_error(
+                method="AssignMemberships:mutate_and_get_payload",
+                input_data={"add": add, "remove": remove},
+                user=info.context.user,
+                original_error=e,
+            )
+        return AssignMemberships(added=changes.added, removed=changes.removed)
 
 
 class UserMutation(graphene.ObjectType):
     create_user = CreateUser.Field()
     update_user = UpdateUser.Field()
     delete_user = DeleteUser.Field()
+    update_users = UpdateUsers.Field()
+    delete_users = DeleteUsers.Field()
+    assign_memberships = AssignMemberships.Field()
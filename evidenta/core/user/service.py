@@ -4,9 +4,12 @@ from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.db import models, transaction
 
+from evidenta.common.models import DeletionTask
 from evidenta.common.services.base import BaseService
 from evidenta.common.utils import create_url
 from evidenta.core.auth.service import AuthService
+from evidenta.core.company.models import MembershipChanges
+from evidenta.core.company.service import CompanyService
 from evidenta.core.notifications.service import NotificationService
 
 from .enums import ResourcePath
@@ -33,8 +36,22 @@ class UserService(BaseService):
             self.manager.update(user_id=user_id, as_user=as_user, **user_data)
             # todo: mozna nejake dalsi notifikace
 
-    def delete(self, user_id: str, **kwargs) -> None:
-        self.manager.delete(user_id=user_id, **kwargs)
+    def delete(self, user_id: str, **kwargs) -> DeletionTask:
+        return self.manager.delete(user_id=user_id, **kwargs)
+
+    def update_many(self, user_ids: list[int], as_user: User, **user_data) -> set[int]:
+        with transaction.atomic():
+            return self.manager.update_many(user_ids=user_ids, as_user=as_user, **user_data)
+
+    def delete_many(self, user_ids: list[int], as_user: User) -> set[int]:
+        with transaction.atomic():
+            return self.manager.delete_many(user_ids=user_ids, as_user=as_user)
+
+    @staticmethod
+    def assign_memberships(
+        as_user: User, add: list[tuple[int, int]] = (), remove: list[tuple[int, int]] = ()
+    ) -> MembershipChanges:
+        return CompanyService().assign_memberships(as_user=as_user, add=add, remove=remove)
 
     @staticmethod
     def set_user_password(user: User, password: str) -> None:
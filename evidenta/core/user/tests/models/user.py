@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError
 
 import pytest
 
+from evidenta.common.deletion import process_deletion_tasks
 from evidenta.common.testing.utils import (
     assert_count,
     assert_exists,
@@ -209,6 +210,8 @@ def test_update_non_existing_user_should_fail_with_does_not_exist_error(admin):
 def test_delete_user_successfully(admin, random_user: User) -> None:
     assert_count(User.objects.filter(), 2)
     User.objects.delete(user_id=random_user.pk, as_user=admin)
+    assert_count(User.objects.get_all_related_users(as_user=admin), 1)
+    process_deletion_tasks()
     assert_count(User.objects.filter(), 1)
     with pytest.raises(User.DoesNotExist):
         User.objects.get(pk=random_user.pk)
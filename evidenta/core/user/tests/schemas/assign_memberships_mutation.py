@@ -0,0 +1,62 @@
+from django.test import Client
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from graphql_relay import to_global_id
+
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.testing.utils import assert_equal, extract_error_code_from_graphql_error_response
+from evidenta.core.company.models import Company
+from evidenta.core.user.models import User
+
+
+ASSIGN_MEMBERSHIPS_MUTATION = """
+mutation AssignMemberships($input: AssignMembershipsInput!) {
+  assignMemberships(input: $input) {
+    added
+    removed
+  }
+}
+"""
+
+
+def _membership(user: User, company: Company) -> dict[str, str]:
+    return {"userId": to_global_id("UserNode", user.pk), "companyId": str(company.pk)}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users,random_companies", [(2, 2)], indirect=True)
+def test_assign_memberships_mutation_should_return_counts(
+    admin_client: Client, random_users: list[User], random_companies: list[Company]
+) -> None:
+    random_companies[0].users.set(random_users)
+    variables = {
+        "input": {
+            "add": [_membership(user, random_companies[1]) for user in random_users],
+            "remove": [_membership(random_users[0], random_companies[0])],
+        }
+    }
+    response = graphql_query(ASSIGN_MEMBERSHIPS_MUTATION, variables=variables, client=admin_client)
+
+    assert_equal(response.json()["data"]["assignMemberships"], {"added": 2, "removed": 1})
+    assert_equal(list(random_companies[0].users.all()), [random_users[1]])
+    assert_equal(set(random_companies[1].users.all()), set(random_users))
+
+
+@pytest.mark.django_db
+def test_assign_memberships_mutation_should_fail_with_invalid_ids(admin_client: Client, random_company) -> None:
+    variables = {"input": {"add": [{"userId": "invalid", "companyId": str(random_company.pk)}]}}
+    response = graphql_query(ASSIGN_MEMBERSHIPS_MUTATION, variables=variables, client=admin_client)
+    assert_equal(extract_error_code_from_graphql_error_response(response.json()), ApiErrorCode.INVALID_VALUES.value)
+
+
+@pytest.mark.django_db
+def test_assign_memberships_mutation_should_fail_without_permission(
+    django_client: Client, client: User, random_company: Company
+) -> None:
+    django_client.force_login(client)
+    variables = {"input": {"add": [_membership(client, random_company)]}}
+    response = graphql_query(ASSIGN_MEMBERSHIPS_MUTATION, variables=variables, client=django_client)
+    assert_equal(
+        extract_error_code_from_graphql_error_response(response.json()), ApiErrorCode.PERMISSION_REQUIRED.value
+    )
@@ -0,0 +1,150 @@
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+from graphene_django.utils.testing import graphql_query
+from graphql_relay import to_global_id
+
+from evidenta.common.deletion import process_deletion_tasks
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.testing.utils import assert_equal, extract_error_code_from_graphql_error_response
+from evidenta.core.company.models import Company
+from evidenta.core.user.models import User
+
+
+UPDATE_USERS_MUTATION = """
+mutation UpdateUsers($input: UpdateUsersInput!) {
+  updateUsers(input: $input) {
+    results {
+      id
+      success
+      errorCode
+      message
+    }
+  }
+}
+"""
+
+DELETE_USERS_MUTATION = """
+mutation DeleteUsers($input: DeleteUsersInput!) {
+  deleteUsers(input: $input) {
+    results {
+      id
+      success
+      errorCode
+    }
+  }
+}
+"""
+
+MISSING_ID = to_global_id("UserNode", 999999)
+
+
+def _ids(users: list[User]) -> list[str]:
+    return [to_global_id("UserNode", user.pk) for user in users]
+
+
+def _results(response) -> dict[str, bool]:
+    data = response.json()["data"]
+    return {result["id"]: result["success"] for result in next(iter(data.values()))["results"]}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_update_users_should_patch_visible_users(admin_client: Client, random_users: list[User]) -> None:
+    updated_before = {user.pk: user.updated for user in random_users}
+    variables = {"input": {"ids": [*_ids(random_users), MISSING_ID, "invalid"], "patch": {"lastName": "novák"}}}
+    response = graphql_query(UPDATE_USERS_MUTATION, variables=variables, client=admin_client)
+
+    assert_equal(_results(response), {**dict.fromkeys(_ids(random_users), True), MISSING_ID: False, "invalid": False})
+    for user in User.objects.filter(pk__in=updated_before):
+        assert_equal(user.last_name, "Novák")
+        assert user.updated > updated_before[user.pk]
+    missing = response.json()["data"]["updateUsers"]["results"][3]
+    assert_equal(missing["errorCode"], ApiErrorCode.OBJECT_NOT_FOUND.value)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [20], indirect=True)
+def test_update_users_should_not_depend_on_number_of_users(admin_client: Client, random_users: list[User]) -> None:
+    def _count_queries(users: list[User]) -> int:
+        variables = {"input": {"ids": _ids(users), "patch": {"title": "Ing.", "companies": []}}}
+        with CaptureQueriesContext(connection) as ctx:
+            graphql_query(UPDATE_USERS_MUTATION, variables=variables, client=admin_client)
+        return len(ctx.captured_queries)
+
+    assert_equal(_count_queries(random_users[:2]), _count_queries(random_users))
+    assert_equal(User.objects.filter(title="Ing.").count(), 20)
+
+
+@pytest.mark.django_db
+def test_update_users_should_ignore_repeated_companies(
+    admin_client: Client, random_user: User, random_company: Company
+) -> None:
+    patch = {"companies": [str(random_company.pk), str(random_company.pk)]}
+    response = graphql_query(
+        UPDATE_USERS_MUTATION, variables={"input": {"ids": _ids([random_user]), "patch": patch}}, client=admin_client
+    )
+
+    assert_equal(_results(response), {_ids([random_user])[0]: True})
+    assert_equal(list(random_user.companies.values_list("pk", flat=True)), [random_company.pk])
+
+
+def test_clean_patch_should_normalize_like_user_clean() -> None:
+    patch = {"email": "John.Doe@Example.COM", "last_name": "novák"}
+    User.objects.clean_patch(patch)
+    assert_equal(patch, {"email": "john.doe@example.com", "last_name": "Novák"})
+
+
+@pytest.mark.django_db
+def test_update_users_should_validate_patch(admin_client: Client, random_user: User) -> None:
+    variables = {"input": {"ids": _ids([random_user]), "patch": {"phoneNumber": "not a number"}}}
+    response = graphql_query(UPDATE_USERS_MUTATION, variables=variables, client=admin_client)
+
+    assert_equal(extract_error_code_from_graphql_error_response(response.json()), ApiErrorCode.INVALID_VALUES.value)
+    random_user.refresh_from_db()
+    assert random_user.phone_number != "not a number"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [2], indirect=True)
+def test_update_users_should_skip_users_not_visible_to_accountant(
+    django_client: Client, accountant: User, random_company: Company, random_users: list[User]
+) -> None:
+    visible, hidden = random_users
+    random_company.users.set([accountant, visible])
+    accountant.user_permissions.add(Permission.objects.get(codename="change_user"))
+    django_client.force_login(accountant)
+
+    variables = {"input": {"ids": _ids(random_users), "patch": {"firstName": "renamed"}}}
+    response = graphql_query(UPDATE_USERS_MUTATION, variables=variables, client=django_client)
+
+    assert_equal(_results(response), {_ids([visible])[0]: True, _ids([hidden])[0]: False})
+    assert_equal(list(User.objects.filter(first_name="Renamed").values_list("pk", flat=True)), [visible.pk])
+
+
+@pytest.mark.django_db
+def test_update_users_should_check_role_permission(django_client: Client, accountant: User) -> None:
+    accountant.user_permissions.add(Permission.objects.get(codename="change_user"))
+    django_client.force_login(accountant)
+    variables = {"input": {"ids": _ids([accountant]), "patch": {"role": "supervisor"}}}
+    response = graphql_query(UPDATE_USERS_MUTATION, variables=variables, client=django_client)
+    assert_equal(
+        extract_error_code_from_graphql_error_response(response.json()), ApiErrorCode.PERMISSION_REQUIRED.value
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [3], indirect=True)
+def test_delete_users_should_delete_visible_users(admin_client: Client, random_users: list[User]) -> None:
+    variables = {"input": {"ids": [*_ids(random_users[:2]), MISSING_ID]}}
+    response = graphql_query(DELETE_USERS_MUTATION, variables=variables, client=admin_client)
+
+    assert_equal(_results(response), {**dict.fromkeys(_ids(random_users[:2]), True), MISSING_ID: False})
+    process_deletion_tasks()
+    assert_equal(
+        set(User.objects.filter(pk__in=[user.pk for user in random_users]).values_list("pk", flat=True)),
+        {random_users[2].pk},
+    )
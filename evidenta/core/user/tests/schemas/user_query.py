@@ -8,6 +8,7 @@ from graphene_django.utils.testing import graphql_query
 from evidenta.common.enums import ApiErrorCode
 from evidenta.common.testing.utils import (
     assert_equal,
+    assert_max_queries,
     assert_obj_equal,
     extract_error_code_from_graphql_error_response,
     extract_message_from_graphql_error_response,
@@ -123,6 +124,32 @@ def test_get_queryset_should_fail_with_graphql_error_for_non_existing_fields(fie
     )
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("random_users", [1, 5, 20], indirect=True)
+def test_get_queryset_should_not_exceed_query_budget(admin: User, django_client: Client, random_users) -> None:
+    query = """
+    {
+      users {
+        edges {
+          node {
+            id,
+            username,
+            role {
+              name
+            }
+          }
+        }
+      }
+    }
+    """
+    django_client.force_login(admin)
+    # session, logged user, admin role, count and users page with roles
+    with assert_max_queries(5):
+        response = graphql_query(query, client=django_client)
+    assert_equal(response.status_code, 200)
+    assert_equal(len(response.json()["data"]["users"]["edges"]), len(random_users) + 1)
+
+
 @pytest.mark.django_db
 def test_get_node_should_not_fail_when_user_is_logged_and_has_permission(
     admin: User, django_client: Client, empty_filter_mock: MagicMock
@@ -242,6 +269,23 @@ def test_resolve_me_should_return_current_user(
         assert_obj_equal(MeQuery.resolve_me(None, info), admin)
 
 
+@pytest.mark.django_db
+@assert_max_queries(3)
+def test_resolve_me_should_not_exceed_query_budget(admin: User, admin_client: Client) -> None:
+    query = """
+    {
+      me {
+        username
+        role {
+          name
+        }
+      }
+    }
+    """
+    response = graphql_query(query, client=admin_client)
+    assert_equal(response.json()["data"]["me"]["username"], admin.username)
+
+
 def test_resolve_me_should_fail_with_permission_denied_when_user_is_not_logged_in(django_client: Client) -> None:
     query = """
     {
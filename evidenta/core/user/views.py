@@ -0,0 +1,24 @@
+from django.http import HttpRequest, StreamingHttpResponse
+
+from evidenta.common.export import export_response, export_view
+from evidenta.core.user.service import UserService
+
+
+USER_EXPORT_COLUMNS = [
+    ("id", "ID"),
+    ("username", "Username"),
+    ("title", "Title"),
+    ("first_name", "First name"),
+    ("last_name", "Last name"),
+    ("email", "Email"),
+    ("role__name", "Role"),
+    ("phone_number", "Phone number"),
+    ("birthday", "Birthday"),
+    ("date_joined", "Date joined"),
+]
+
+
+@export_view(["user.view_user"])
+def users_export_view(request: HttpRequest, export_format: str) -> StreamingHttpResponse:
+    users = UserService().get_all_related(as_user=request.user).order_by("pk")
+    return export_response(users, USER_EXPORT_COLUMNS, "users", export_format)
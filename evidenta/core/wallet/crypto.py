@@ -0,0 +1,81 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+
+KEY_SIZE = 32
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+
+def get_wallet_salt(wallet) -> bytes:
+    # bound to the wallet password hash, so the key changes together with the master password
+    return hashlib.sha256(f"evidenta-wallet:{wallet.pk}:{wallet.password}".encode()).digest()[:16]
+
+
+def derive_key(master_password: str, salt: bytes, iterations: int | None = None) -> bytes:
+    """Deliberately slow PBKDF2 derivation of the wallet key, it should run once per unlock."""
+    return hashlib.pbkdf2_hmac(
+        "sha256",
+        master_password.encode(),
+        salt,
+        iterations or settings.WALLET["KDF_ITERATIONS"],
+        dklen=KEY_SIZE,
+    )
+
+
+def encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b"") -> bytes:
+    """AES-256-GCM, the output is nonce + ciphertext + tag."""
+    nonce = get_random_bytes(NONCE_SIZE)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(associated_data)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+    return nonce + ciphertext + tag
+
+
+def decrypt(key: bytes, token: bytes, associated_data: bytes = b"") -> bytes:
+    """Raises `ValueError` when the token was not encrypted by the key or it was modified."""
+    nonce, ciphertext, tag = token[:NONCE_SIZE], token[NONCE_SIZE:-TAG_SIZE], token[-TAG_SIZE:]
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(associated_data)
+    return cipher.decrypt_and_verify(ciphertext, tag)
+
+
+def decrypt_many(key: bytes, tokens: list[bytes], associated_data: bytes = b"") -> list[bytes]:
+    """
+    Decrypts a page of tokens in one pass. GCM needs a cipher per nonce, but the key, the cipher factory
+    and the token buffers are set up once instead of per token.
+    """
+    new_cipher = partial(AES.new, key, AES.MODE_GCM)
+    plaintexts = []
+    for token in tokens:
+        view = memoryview(token)
+        cipher = new_cipher(nonce=view[:NONCE_SIZE])
+        if associated_data:
+            cipher.update(associated_data)
+        plaintexts.append(cipher.decrypt_and_verify(view[NONCE_SIZE:-TAG_SIZE], view[-TAG_SIZE:]))
+    return plaintexts
+
+
+class WalletRecordDecryptor:
+    """Per request cache of decrypted passwords, filled by pages of records."""
+
+    def __init__(self, key: bytes):
+        self.key = key
+        self.passwords: dict[int, str] = {}
+
+    def prefetch(self, records: list) -> None:
+        records = [record for record in records if record.pk not in self.passwords]
+        plaintexts = decrypt_many(self.key, [bytes(record.password) for record in records])
+        self.passwords.update(
+            (record.pk, plaintext.decode()) for record, plaintext in zip(records, plaintexts, strict=True)
+        )
+
+    def get(self, record) -> str:
+        if record.pk not in self.passwords:
+            self.prefetch([record])
+        return self.passwords[record.pk]
@@ -0,0 +1,70 @@
+import hashlib
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpRequest
+
+from graphql_jwt.utils import get_http_authorization
+
+from evidenta.common.cache import is_shared_cache
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.exceptions import InvalidTokenAPIException
+from evidenta.core.wallet.crypto import decrypt, encrypt
+
+
+SESSION_KEY_PREFIX = "wallet:session:"
+
+
+def get_request_binding(request: HttpRequest) -> bytes:
+    """Fingerprint of the JWT (or the django session) the wallet session is bound to."""
+    credentials = get_http_authorization(request) or getattr(getattr(request, "session", None), "session_key", "")
+    return hashlib.sha256(f"{request.user.pk}:{credentials}".encode()).digest()
+
+
+def _cache_key(handle: str) -> str:
+    return SESSION_KEY_PREFIX + hashlib.sha256(f"id:{handle}".encode()).hexdigest()
+
+
+def _wrapping_key(handle: str) -> bytes:
+    return hashlib.sha256(f"key:{handle}".encode()).digest()
+
+
+def open_wallet_session(request: HttpRequest, wallet_key: bytes) -> str:
+    """
+    Stores the derived wallet key server-side and returns an opaque handle for it. The cache holds the key
+    encrypted by a key derived from the handle, so the cache content alone can't decrypt the wallet.
+    The session is used by requests handled by any worker, so the cache has to be shared by all of them.
+    """
+    if not is_shared_cache("default"):
+        raise ImproperlyConfigured("Wallet sessions need a cache shared by all server processes, set REDIS_URL.")
+    handle = secrets.token_urlsafe(32)
+    binding = get_request_binding(request)
+    cache.set(
+        _cache_key(handle),
+        {"key": encrypt(_wrapping_key(handle), wallet_key, binding), "created": time.time()},
+        timeout=settings.WALLET["SESSION_IDLE_TIMEOUT"],
+    )
+    return handle
+
+
+def get_wallet_key(request: HttpRequest, handle: str) -> bytes:
+    """Key of an unlocked wallet, every use extends the session by the idle timeout up to its max lifetime."""
+    config = settings.WALLET
+    key = _cache_key(handle)
+    session = cache.get(key)
+    if session is None or time.time() - session["created"] > config["SESSION_MAX_LIFETIME"]:
+        raise InvalidTokenAPIException(message="Wallet session expired.", error_code=ApiErrorCode.INVALID_TOKEN)
+    try:
+        wallet_key = decrypt(_wrapping_key(handle), session["key"], get_request_binding(request))
+    except ValueError as e:
+        # valid handle used with another JWT
+        raise InvalidTokenAPIException(message="Invalid wallet session.", error_code=ApiErrorCode.INVALID_TOKEN) from e
+    cache.touch(key, config["SESSION_IDLE_TIMEOUT"])
+    return wallet_key
+
+
+def close_wallet_session(handle: str) -> None:
+    cache.delete(_cache_key(handle))
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from django.conf import settings
+
+import pytest
+
+from evidenta.common.testing.benchmark import BenchmarkReport, run_function_benchmark
+from evidenta.core.wallet.crypto import WalletRecordDecryptor, decrypt, encrypt
+from evidenta.core.wallet.tests.crypto import WALLET_KEY
+
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("page_size", [10, 100, 1000])
+def test_benchmark_wallet_page_decryption(benchmark_report: BenchmarkReport, page_size: int) -> None:
+    records = [SimpleNamespace(pk=i, password=encrypt(WALLET_KEY, f"password-{i}".encode())) for i in range(page_size)]
+
+    def decrypt_per_record() -> bytes:
+        return b"".join(decrypt(WALLET_KEY, bytes(record.password)) for record in records)
+
+    def decrypt_page() -> bytes:
+        decryptor = WalletRecordDecryptor(WALLET_KEY)
+        decryptor.prefetch(records)
+        return "".join(decryptor.get(record) for record in records).encode()
+
+    assert decrypt_page() == decrypt_per_record()
+    for operation, function in (("per_record", decrypt_per_record), ("batch", decrypt_page)):
+        benchmark_report.record(
+            run_function_benchmark(
+                f"decrypt_wallet_page_{page_size}_{operation}", function, rounds=settings.BENCHMARK_ROUNDS
+            ),
+            0,
+        )
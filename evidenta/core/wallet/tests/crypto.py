@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.wallet import crypto
+from evidenta.core.wallet.crypto import WalletRecordDecryptor, decrypt, decrypt_many, derive_key, encrypt
+
+
+WALLET_KEY = bytes(range(32))
+
+
+def _records(count: int) -> list[SimpleNamespace]:
+    return [SimpleNamespace(pk=i, password=encrypt(WALLET_KEY, f"password-{i}".encode())) for i in range(count)]
+
+
+def test_encrypted_token_should_be_authenticated() -> None:
+    token = encrypt(WALLET_KEY, b"secret", b"record:1")
+    assert_equal(decrypt(WALLET_KEY, token, b"record:1"), b"secret")
+    with pytest.raises(ValueError):
+        decrypt(WALLET_KEY, token, b"record:2")
+
+
+def test_derive_key_should_depend_on_salt() -> None:
+    assert derive_key("master", b"salt-1", iterations=10) != derive_key("master", b"salt-2", iterations=10)
+
+
+def test_decrypt_many_should_match_decrypt() -> None:
+    tokens = [encrypt(WALLET_KEY, f"password-{i}".encode(), b"wallet") for i in range(5)]
+    assert_equal(decrypt_many(WALLET_KEY, tokens, b"wallet"), [decrypt(WALLET_KEY, t, b"wallet") for t in tokens])
+
+
+def test_decrypt_many_should_reject_modified_token() -> None:
+    token = bytearray(encrypt(WALLET_KEY, b"secret"))
+    token[-1] ^= 1
+    with pytest.raises(ValueError):
+        decrypt_many(WALLET_KEY, [bytes(token)])
+
+
+def test_decryptor_should_decrypt_page_once() -> None:
+    records = _records(3)
+    decryptor = WalletRecordDecryptor(WALLET_KEY)
+    with patch.object(crypto, "decrypt_many", wraps=crypto.decrypt_many) as decrypt_many_mock:
+        decryptor.prefetch(records)
+        passwords = [decryptor.get(record) for record in records]
+
+    assert_equal(passwords, ["password-0", "password-1", "password-2"])
+    assert_equal(decrypt_many_mock.call_count, 1)
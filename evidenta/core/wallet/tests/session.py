@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory
+
+import pytest
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.exceptions import InvalidTokenAPIException
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.wallet.session import _cache_key, close_wallet_session, get_wallet_key, open_wallet_session
+
+
+WALLET_KEY = bytes(range(32))
+
+
+def _request(jwt: str = "jwt-token", user_id: int = 1):
+    request = RequestFactory().post("/graphql", HTTP_AUTHORIZATION=f"JWT {jwt}")
+    request.user = SimpleNamespace(pk=user_id)
+    return request
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_unlocked_wallet_key_should_be_returned_without_kdf() -> None:
+    handle = open_wallet_session(_request(), WALLET_KEY)
+    with patch("evidenta.core.wallet.crypto.hashlib.pbkdf2_hmac") as pbkdf2_hmac:
+        assert_equal(get_wallet_key(_request(), handle), WALLET_KEY)
+    pbkdf2_hmac.assert_not_called()
+
+
+def test_cache_should_not_contain_plain_wallet_key() -> None:
+    handle = open_wallet_session(_request(), WALLET_KEY)
+    assert WALLET_KEY not in cache.get(_cache_key(handle))["key"]
+
+
+@pytest.mark.parametrize("request_", [_request(jwt="other-jwt-token"), _request(user_id=2)])
+def test_wallet_session_should_be_bound_to_jwt_and_user(request_) -> None:
+    handle = open_wallet_session(_request(), WALLET_KEY)
+    with pytest.raises(InvalidTokenAPIException):
+        get_wallet_key(request_, handle)
+
+
+def test_closed_wallet_session_should_be_invalid() -> None:
+    handle = open_wallet_session(_request(), WALLET_KEY)
+    close_wallet_session(handle)
+    with pytest.raises(InvalidTokenAPIException):
+        get_wallet_key(_request(), handle)
+
+
+def test_wallet_session_should_expire_after_max_lifetime(settings: SettingsWrapper) -> None:
+    settings.WALLET = {**settings.WALLET, "SESSION_MAX_LIFETIME": -1}
+    handle = open_wallet_session(_request(), WALLET_KEY)
+    with pytest.raises(InvalidTokenAPIException):
+        get_wallet_key(_request(), handle)
+
+
+def test_wallet_session_should_not_be_opened_in_process_local_cache(settings: SettingsWrapper) -> None:
+    settings.ALLOW_PROCESS_LOCAL_CACHE = False
+    with pytest.raises(ImproperlyConfigured):
+        open_wallet_session(_request(), WALLET_KEY)
@@ -0,0 +1,118 @@
+import io
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from django.core.cache import cache
+from django.test import RequestFactory
+
+import pytest
+from pytest_django.fixtures import SettingsWrapper
+
+from evidenta.common.testing.utils import assert_equal
+from evidenta.core.wallet.crypto import decrypt, encrypt
+from evidenta.core.wallet.session import open_wallet_session
+from evidenta.core.wallet.transfer import HEADER_SIZE, export_wallet_records, import_wallet_records, read_wallet_export
+from evidenta.core.wallet.views import wallet_export_view
+
+
+WALLET_KEY = bytes(range(32))
+EXPORT_PASSWORD = "export-password"  # noqa: S105
+
+
+class FakeRecords(list):
+    def iterator(self, chunk_size: int):
+        return iter(self)
+
+    def order_by(self, *fields):
+        return self
+
+
+@pytest.fixture(autouse=True)
+def fast_kdf(settings: SettingsWrapper) -> None:
+    settings.WALLET = {**settings.WALLET, "KDF_ITERATIONS": 10}
+
+
+def _records(count: int) -> FakeRecords:
+    return FakeRecords(
+        SimpleNamespace(
+            pk=i, username=f"user-{i}", password=encrypt(WALLET_KEY, f"password-{i}".encode()), description=f"#{i}"
+        )
+        for i in range(count)
+    )
+
+
+def _export(count: int, chunk_size: int = 2) -> bytes:
+    return b"".join(export_wallet_records(_records(count), WALLET_KEY, EXPORT_PASSWORD, chunk_size=chunk_size))
+
+
+def _split_chunks(export: bytes) -> tuple[bytes, list[bytes]]:
+    header, chunks, offset = export[:HEADER_SIZE], [], HEADER_SIZE
+    while offset < len(export):
+        size = int.from_bytes(export[offset : offset + 4], "big")
+        chunks.append(export[offset : offset + 4 + size])
+        offset += 4 + size
+    return header, chunks
+
+
+def test_export_should_be_read_chunk_by_chunk() -> None:
+    chunks = list(read_wallet_export(io.BytesIO(_export(5)), EXPORT_PASSWORD))
+
+    assert_equal([len(chunk) for chunk in chunks], [2, 2, 1])
+    assert_equal(chunks[2], [{"username": "user-4", "password": "password-4", "description": "#4"}])
+
+
+def test_empty_wallet_should_be_exported_as_empty_final_chunk() -> None:
+    assert_equal(list(read_wallet_export(io.BytesIO(_export(0)), EXPORT_PASSWORD)), [[]])
+
+
+def test_export_should_not_be_read_with_wrong_password() -> None:
+    with pytest.raises(ValueError):
+        list(read_wallet_export(io.BytesIO(_export(3)), "wrong"))
+
+
+@pytest.mark.parametrize(
+    "modify",
+    [
+        pytest.param(lambda header, chunks: header + b"".join(chunks[:-1]), id="truncated"),
+        pytest.param(lambda header, chunks: header + chunks[1] + chunks[0] + chunks[2], id="reordered"),
+        pytest.param(lambda header, chunks: header + chunks[0] + chunks[2], id="dropped"),
+        pytest.param(lambda header, chunks: header + b"".join(chunks) + chunks[2], id="appended"),
+    ],
+)
+def test_modified_export_should_be_rejected(modify) -> None:
+    header, chunks = _split_chunks(_export(5))
+    with pytest.raises(ValueError):
+        list(read_wallet_export(io.BytesIO(modify(header, chunks)), EXPORT_PASSWORD))
+
+
+@pytest.mark.django_db
+def test_import_should_create_records_by_batches() -> None:
+    model = MagicMock(side_effect=lambda **kwargs: SimpleNamespace(**kwargs))
+    wallet = SimpleNamespace(records=SimpleNamespace(model=model))
+
+    chunks = read_wallet_export(io.BytesIO(_export(5)), EXPORT_PASSWORD)
+    assert_equal(import_wallet_records(wallet, WALLET_KEY, chunks, batch_size=3), 5)
+
+    batches = [call.args[0] for call in model.objects.bulk_create.call_args_list]
+    assert_equal([len(batch) for batch in batches], [3, 2])
+    assert_equal(decrypt(WALLET_KEY, batches[1][1].password), b"password-4")
+
+
+def test_export_view_should_stream_unlocked_wallet() -> None:
+    cache.clear()
+    user = SimpleNamespace(pk=1, is_anonymous=False, is_authenticated=True, wallet=SimpleNamespace(records=_records(3)))
+    request = RequestFactory().post("/wallet/export", HTTP_AUTHORIZATION="JWT jwt-token")
+    request.user = user
+    handle = open_wallet_session(request, WALLET_KEY)
+
+    request = RequestFactory().post(
+        "/wallet/export",
+        {"wallet_session": handle, "export_password": EXPORT_PASSWORD},
+        HTTP_AUTHORIZATION="JWT jwt-token",
+    )
+    request.user = user
+    response = wallet_export_view(request)
+
+    assert response.streaming
+    chunks = read_wallet_export(io.BytesIO(b"".join(response.streaming_content)), EXPORT_PASSWORD)
+    assert_equal(sum(len(chunk) for chunk in chunks), 3)
@@ -0,0 +1,145 @@
+"""
+Portable wallet export, encrypted by a key derived from an export password (not the wallet key, so it can
+be imported into another wallet). The records are written in chunks, every chunk is authenticated on its own
+and its nonce contains the chunk index and the final flag, so the import detects reordered, dropped or
+truncated chunks without reading the whole file first.
+
+    header: MAGIC | kdf iterations (4B) | salt (16B) | nonce prefix (7B)
+    chunk:  length (4B) | AES-GCM(json list of records) + tag, nonce = prefix | index (4B) | final (1B)
+"""
+
+import json
+import struct
+from itertools import batched
+from typing import BinaryIO, Iterable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+from evidenta.core.wallet.crypto import TAG_SIZE, decrypt_many, derive_key, encrypt
+
+
+MAGIC = b"EVWX\x01"
+SALT_SIZE = 16
+NONCE_PREFIX_SIZE = 7
+HEADER_SIZE = len(MAGIC) + 4 + SALT_SIZE + NONCE_PREFIX_SIZE
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _chunk_cipher(key: bytes, header: bytes, index: int, final: bool):
+    nonce = header[-NONCE_PREFIX_SIZE:] + struct.pack(">IB", index, final)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(header)
+    return cipher
+
+
+def _seal_chunk(key: bytes, header: bytes, index: int, final: bool, records: list[dict]) -> bytes:
+    ciphertext, tag = _chunk_cipher(key, header, index, final).encrypt_and_digest(json.dumps(records).encode())
+    return struct.pack(">I", len(ciphertext) + TAG_SIZE) + ciphertext + tag
+
+
+def export_wallet_records(
+    records: QuerySet, wallet_key: bytes, export_password: str, chunk_size: int | None = None
+) -> Iterator[bytes]:
+    """
+    Yields the export of `records` chunk by chunk. The queryset is read by `iterator()`, so only one chunk
+    of records is held in memory, which allows to stream the export directly to the response.
+    """
+    chunk_size = chunk_size or settings.WALLET["EXPORT_CHUNK_SIZE"]
+    iterations = settings.WALLET["KDF_ITERATIONS"]
+    salt = get_random_bytes(SALT_SIZE)
+    header = MAGIC + struct.pack(">I", iterations) + salt + get_random_bytes(NONCE_PREFIX_SIZE)
+    key = derive_key(export_password, salt, iterations)
+    yield header
+
+    # the final flag needs one chunk lookahead, an empty wallet is exported as a single empty final chunk
+    index, pending = 0, []
+    for batch in batched(records.iterator(chunk_size=chunk_size), chunk_size):
+        passwords = decrypt_many(wallet_key, [bytes(record.password) for record in batch])
+        chunk = [
+            {"username": record.username, "password": password.decode(), "description": record.description}
+            for record, password in zip(batch, passwords, strict=True)
+        ]
+        if index or pending:
+            yield _seal_chunk(key, header, index, False, pending)
+            index += 1
+        pending = chunk
+    yield _seal_chunk(key, header, index, True, pending)
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Wallet export is truncated.")
+    return data
+
+
+def read_wallet_export(stream: BinaryIO, export_password: str) -> Iterator[list[dict]]:
+    """Yields verified chunks of records, raises `ValueError` as soon as a chunk is not authentic."""
+    header = _read_exact(stream, HEADER_SIZE)
+    if not header.startswith(MAGIC):
+        raise ValueError("Unknown wallet export format.")
+    (iterations,) = struct.unpack(">I", header[len(MAGIC) : len(MAGIC) + 4])
+    if iterations > settings.WALLET["KDF_ITERATIONS"] * 10:
+        raise ValueError("Unsupported wallet export.")
+    salt = header[len(MAGIC) + 4 : len(MAGIC) + 4 + SALT_SIZE]
+    key = derive_key(export_password, salt, iterations)
+
+    index = 0
+    while True:
+        (size,) = struct.unpack(">I", _read_exact(stream, 4))
+        if not TAG_SIZE <= size <= MAX_CHUNK_SIZE:
+            raise ValueError("Invalid wallet export chunk.")
+        data = _read_exact(stream, size)
+        # the final flag is not stored, the chunk authenticates only under the right one
+        for final in (False, True):
+            try:
+                plaintext = _chunk_cipher(key, header, index, final).decrypt_and_verify(
+                    data[:-TAG_SIZE], data[-TAG_SIZE:]
+                )
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Invalid export password or corrupted wallet export.")
+        yield json.loads(plaintext)
+        if final:
+            if stream.read(1):
+                raise ValueError("Unexpected data after the end of wallet export.")
+            return
+        index += 1
+
+
+def import_wallet_records(
+    wallet, wallet_key: bytes, chunks: Iterable[list[dict]], batch_size: int | None = None
+) -> int:
+    """
+    Re-encrypts the records by the wallet key and creates them by batches. Everything runs in one
+    transaction, so an export which fails to verify in the middle is not imported partially.
+    """
+    batch_size = batch_size or settings.WALLET["IMPORT_BATCH_SIZE"]
+    model = wallet.records.model
+    created, pending = 0, []
+    with transaction.atomic():
+        for chunk in chunks:
+            pending += [
+                model(
+                    wallet=wallet,
+                    username=record["username"],
+                    password=encrypt(wallet_key, record["password"].encode()),
+                    description=record["description"],
+                )
+                for record in chunk
+            ]
+            while len(pending) >= batch_size:
+                model.objects.bulk_create(pending[:batch_size])
+                created += batch_size
+                pending = pending[batch_size:]
+        if pending:
+            model.objects.bulk_create(pending)
+            created += len(pending)
+    return created
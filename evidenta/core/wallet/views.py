@@ -0,0 +1,46 @@
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+
+from evidenta.common.exceptions import InvalidTokenAPIException
+from evidenta.common.schemas.response_cache import authenticate_request
+from evidenta.core.wallet.session import get_wallet_key
+from evidenta.core.wallet.transfer import export_wallet_records, import_wallet_records, read_wallet_export
+
+
+def _unlocked_wallet(request: HttpRequest):
+    authenticate_request(request)
+    if not request.user.is_authenticated:
+        return None, None
+    try:
+        return request.user.wallet, get_wallet_key(request, request.POST.get("wallet_session", ""))
+    except InvalidTokenAPIException:
+        return None, None
+
+
+@require_POST
+def wallet_export_view(request: HttpRequest) -> HttpResponse:
+    wallet, wallet_key = _unlocked_wallet(request)
+    if wallet is None:
+        return HttpResponse(status=401)
+    if not (export_password := request.POST.get("export_password")):
+        return HttpResponseBadRequest("Export password is required.")
+    response = StreamingHttpResponse(
+        export_wallet_records(wallet.records.order_by("pk"), wallet_key, export_password),
+        content_type="application/octet-stream",
+    )
+    response["Content-Disposition"] = 'attachment; filename="wallet.evwx"'
+    return response
+
+
+@require_POST
+def wallet_import_view(request: HttpRequest) -> HttpResponse:
+    wallet, wallet_key = _unlocked_wallet(request)
+    if wallet is None:
+        return HttpResponse(status=401)
+    if not (export_password := request.POST.get("export_password")) or "file" not in request.FILES:
+        return HttpResponseBadRequest("Export password and file are required.")
+    try:
+        created = import_wallet_records(wallet, wallet_key, read_wallet_export(request.FILES["file"], export_password))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse({"created": created})
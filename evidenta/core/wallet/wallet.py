@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.hashers import check_password
 
 import graphene
@@ -8,6 +9,10 @@ from graphene_django import DjangoObjectType
 from graphene_django.filter import DjangoFilterConnectionField
 from graphql import GraphQLError, GraphQLResolveInfo
 
+from evidenta.common.schemas.utils import is_field_selected
+from evidenta.core.wallet.crypto import WalletRecordDecryptor, derive_key, encrypt, get_wallet_salt
+from evidenta.core.wallet.session import close_wallet_session, get_wallet_key, open_wallet_session
+
 
 class WalletRecordNode(DjangoObjectType):
     class Meta:
@@ -23,25 +28,114 @@ class WalletRecordNode(DjangoObjectType):
         NOTE: `self` is typed as WalletRecord, because Graphene DjangoObjectType use `self`
         variable as `Meta.model` instance.
         """
-        # pylint: disable=unused-argument
-        return self.get_decrypted_password()
+        decryptor = getattr(info.context, "wallet_decryptor", None)
+        if decryptor is None:
+            raise GraphQLError("Wallet is locked!")
+        # the page was decrypted by `WalletRecordsConnectionField`, records resolved elsewhere are decrypted one by one
+        return decryptor.get(self)
+
+
+class WalletRecordsConnectionField(DjangoFilterConnectionField):
+    @classmethod
+    def connection_resolver(
+        cls,
+        resolver,
+        connection,
+        default_manager,
+        queryset_resolver,
+        max_limit,
+        enforce_first_or_last,
+        root,
+        info,
+        **args,
+    ):
+        connection = super().connection_resolver(
+            resolver,
+            connection,
+            default_manager,
+            queryset_resolver,
+            max_limit,
+            enforce_first_or_last,
+            root,
+            info,
+            **args,
+        )
+        # decrypt the whole page in one pass and only when the passwords are requested
+        if is_field_selected(info, "edges", "node", "decryptedPassword"):
+            info.context.wallet_decryptor.prefetch([edge.node for edge in connection.edges])
+        return connection
+
+
+def unlock_wallet(wallet, master_password: str) -> bytes:
+    if not check_password(master_password, wallet.password):
+        raise GraphQLError("Invalid wallet password!")
+    return derive_key(master_password, get_wallet_salt(wallet))
+
+
+def encrypt_wallet_password(info: GraphQLResolveInfo, wallet_session: str, password: str) -> bytes:
+    """Encrypts the password the same way `WalletRecordDecryptor` decrypts it, a locked wallet is rejected."""
+    return encrypt(get_wallet_key(info.context, wallet_session), password.encode())
 
 
 class WalletRecordsQuery(graphene.ObjectType):
     wallet_record = graphene.Field(WalletRecordNode)
-    wallet_records = DjangoFilterConnectionField(WalletRecordNode, master_password=graphene.String(required=True))
+    wallet_records = WalletRecordsConnectionField(
+        WalletRecordNode,
+        wallet_session=graphene.String(description="Handle returned by `unlockWallet`."),
+        master_password=graphene.String(description="Unlocks the wallet for this request only (slow)."),
+    )
 
     @classmethod
     @login_required
-    def resolve_wallet_records(cls, _, info: GraphQLResolveInfo, master_password: str):
+    def resolve_wallet_records(
+        cls, _, info: GraphQLResolveInfo, wallet_session: str | None = None, master_password: str | None = None
+    ):
         wallet = info.context.user.wallet
-        if not check_password(master_password, wallet.password):
-            raise GraphQLError("Invalid wallet password!")
+        if wallet_session:
+            wallet_key = get_wallet_key(info.context, wallet_session)
+        elif master_password:
+            wallet_key = unlock_wallet(wallet, master_password)
+        else:
+            raise GraphQLError("Wallet session or master password is required!")
+        info.context.wallet_decryptor = WalletRecordDecryptor(wallet_key)
         return wallet.records.all()
 
 
+class UnlockWallet(graphene.Mutation):
+    """Verifies the master password once and returns a short-lived handle of the unlocked wallet."""
+
+    class Arguments:
+        master_password = graphene.String(required=True)
+
+    wallet_session = graphene.String()
+    expires_in = graphene.Int()
+
+    @classmethod
+    @login_required
+    def mutate(cls, _, info: GraphQLResolveInfo, master_password: str) -> "UnlockWallet":
+        wallet_key = unlock_wallet(info.context.user.wallet, master_password)
+        return UnlockWallet(
+            wallet_session=open_wallet_session(info.context, wallet_key),
+            expires_in=settings.WALLET["SESSION_IDLE_TIMEOUT"],
+        )
+
+
+class LockWallet(graphene.Mutation):
+    class Arguments:
+        wallet_session = graphene.String(required=True)
+
+    success = graphene.Boolean()
+
+    @classmethod
+    @login_required
+    def mutate(cls, _, info: GraphQLResolveInfo, wallet_session: str) -> "LockWallet":
+        close_wallet_session(wallet_session)
+        return LockWallet(success=True)
+
+
 class WalletRecordsCreate(graphene.Mutation):
     class Arguments:
+        wallet_session = graphene.String(required=True, description="Handle returned by `unlockWallet`.")
         username = graphene.String(required=True)
         password = graphene.String(required=True)
         description = graphene.String(required=True)
@@ -51,12 +145,12 @@ class WalletRecordsCreate(graphene.Mutation):
     @classmethod
     @login_required
     def mutate(
-        cls, _, info: GraphQLResolveInfo, username: str, password: str, description: str
+        cls, _, info: GraphQLResolveInfo, wallet_session: str, username: str, password: str, description: str
     ) -> "WalletRecordsCreate":
         wallet_record = WalletRecord.objects.create(
             wallet=info.context.user.wallet,
             username=username,
-            password=password,
+            password=encrypt_wallet_password(info, wallet_session, password),
             description=description,
         )
 
@@ -66,6 +160,7 @@ class WalletRecordsCreate(graphene.Mutation):
 class WalletRecordsUpdate(graphene.Mutation):
     class Arguments:
         record_id = graphene.ID(required=True)
+        wallet_session = graphene.String(description="Handle returned by `unlockWallet`, required to change password.")
         username = graphene.String()
         password = graphene.String()
         description = graphene.String()
@@ -74,7 +169,9 @@ class WalletRecordsUpdate(graphene.Mutation):
 
     @classmethod
     @login_required
-    def mutate(cls, _, info: GraphQLResolveInfo, record_id: str, **kwargs) -> "WalletRecordsUpdate":
+    def mutate(
+        cls, _, info: GraphQLResolveInfo, record_id: str, wallet_session: str | None = None, **kwargs
+    ) -> "WalletRecordsUpdate":
         try:
             wallet_record: WalletRecord = Node.get_node_from_global_id(info, record_id)
         except Exception as exc:
@@ -83,7 +180,9 @@ class WalletRecordsUpdate(graphene.Mutation):
             raise GraphQLError("Non-existing wallet record!")
         for key, value in kwargs.items():
             if key == "password":
-                wallet_record.set_new_password(value)
+                if not wallet_session:
+                    raise GraphQLError("Wallet session is required to change the password!")
+                wallet_record.password = encrypt_wallet_password(info, wallet_session, value)
             else:
                 setattr(wallet_record, key, value)
         wallet_record.save()
@@ -113,3 +212,5 @@ class WalletRecordsMutation(graphene.ObjectType):
     create_wallet_record = WalletRecordsCreate.Field()
     update_wallet_record = WalletRecordsUpdate.Field()
     delete_wallet_record = WalletRecordsDelete.Field()
+    unlock_wallet = UnlockWallet.Field()
+    lock_wallet = LockWallet.Field()
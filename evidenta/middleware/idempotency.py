@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+
+from graphql import GraphQLResolveInfo, OperationType
+
+from evidenta.common.cache import is_shared_cache
+from evidenta.common.enums import ApiErrorCode
+from evidenta.common.exceptions import IdempotencyKeyReusedAPIException, MutationInProgressAPIException
+from evidenta.common.metrics import registry
+from evidenta.common.schemas.response_cache import authenticate_request
+from evidenta.common.schemas.utils import get_error_message_from_error_code
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "gql:idempotency:"
+
+IDEMPOTENT_MUTATIONS = registry.counter(
+    "graphql_idempotent_mutations_total",
+    "Mutations with clientMutationId by result (executed, replayed).",
+    ("result",),
+)
+
+
+@lru_cache
+def _warn_process_local_cache() -> None:
+    logger.warning("Idempotent mutations need a cache shared by all server processes, clientMutationId is ignored.")
+
+
+def is_idempotency_enabled() -> bool:
+    """Retries are handled by any worker, so without a shared cache mutations run without deduplication."""
+    config = settings.GRAPHQL_IDEMPOTENCY
+    if config["ENABLED"] and not is_shared_cache(config["CACHE_ALIAS"]):
+        _warn_process_local_cache()
+        return False
+    return config["ENABLED"]
+
+
+def get_input_hash(mutation_input: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(mutation_input, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_idempotency_key(info: GraphQLResolveInfo, client_mutation_id: str, mutation_input: dict[str, Any]) -> str:
+    request = info.context
+    authenticate_request(request)
+    if request.user.is_authenticated:
+        scope = f"user:{request.user.pk}"
+    else:
+        # anonymous clients (token auth, reset password link) can't be told apart, only their input can
+        scope = "anonymous:" + get_input_hash(mutation_input)
+    digest = hashlib.sha256(json.dumps([scope, info.field_name, client_mutation_id]).encode()).hexdigest()
+    return KEY_PREFIX + digest
+
+
+class IdempotentExecution:
+    """
+    One execution of a mutation per key. The payload is stored until TIMEOUT together with the hash of the input,
+    a retry with a different input (a client reusing its ids) is rejected instead of getting the stored payload.
+    Concurrent executions of the same key are serialized by a lock in the cache - the later ones poll for
+    the payload of the first one and run the mutation themselves only when the first one failed (failed mutations
+    are not stored, so they can be retried). Retries are handled by any worker, so the cache has to be shared.
+    """
+
+    def __init__(self, key: str, input_hash: str = ""):
+        self.config = settings.GRAPHQL_IDEMPOTENCY
+        self.cache = caches[self.config["CACHE_ALIAS"]]
+        self.input_hash = input_hash
+        self.result_key = f"{key}:result"
+        self.lock_key = f"{key}:lock"
+
+    def get_stored(self, mutation: str, client_mutation_id: str) -> Any | None:
+        if (stored := self.cache.get(self.result_key)) is None:
+            return None
+        input_hash, payload = stored
+        if input_hash != self.input_hash:
+            params = {"mutation": mutation, "client_mutation_id": client_mutation_id}
+            raise IdempotencyKeyReusedAPIException(
+                message=get_error_message_from_error_code(ApiErrorCode.IDEMPOTENCY_KEY_REUSED, **params),
+                error_data=params,
+                error_code=ApiErrorCode.IDEMPOTENCY_KEY_REUSED,
+            )
+        IDEMPOTENT_MUTATIONS.inc(result="replayed")
+        return payload
+
+    def acquire(self, mutation: str, client_mutation_id: str) -> str | None:
+        """Lock token, or None when the mutation was finished by another execution meanwhile."""
+        deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+        token = uuid.uuid4().hex
+        while not self.cache.add(self.lock_key, token, timeout=self.config["LOCK_TIMEOUT"]):
+            if self.cache.get(self.result_key) is not None:
+                return None
+            if time.monotonic() >= deadline:
+                params = {"mutation": mutation, "client_mutation_id": client_mutation_id}
+                raise MutationInProgressAPIException(
+                    message=get_error_message_from_error_code(ApiErrorCode.MUTATION_IN_PROGRESS, **params),
+                    error_data=params,
+                    error_code=ApiErrorCode.MUTATION_IN_PROGRESS,
+                )
+            time.sleep(self.config["POLL_INTERVAL"])
+        return token
+
+    def run(self, execute: Callable[[], Any], mutation: str, client_mutation_id: str) -> Any:
+        if (stored := self.get_stored(mutation, client_mutation_id)) is not None:
+            return stored
+        if (token := self.acquire(mutation, client_mutation_id)) is None:
+            return self.get_stored(mutation, client_mutation_id)
+        try:
+            # the first execution may have finished between the lookup and the lock
+            if (stored := self.get_stored(mutation, client_mutation_id)) is not None:
+                return stored
+            payload = execute()
+            IDEMPOTENT_MUTATIONS.inc(result="executed")
+            try:
+                self.cache.set(self.result_key, (self.input_hash, payload), timeout=self.config["TIMEOUT"])
+            except Exception:
+                logger.exception("Payload of mutation %s can't be stored, retries will execute it again.", mutation)
+            return payload
+        finally:
+            if self.cache.get(self.lock_key) == token:
+                self.cache.delete(self.lock_key)
+
+
+class IdempotencyMiddleware:
+    """
+    Graphene middleware replaying root mutations by their `clientMutationId`. A retry of a mutation (same user,
+    mutation, clientMutationId and input) gets the stored payload of the first execution instead of running it
+    again, mutations without clientMutationId (or without a shared cache) always run.
+    """
+
+    def resolve(self, next_, root, info: GraphQLResolveInfo, **kwargs):
+        mutation_input = kwargs.get("input")
+        if (
+            not is_idempotency_enabled()
+            or info.operation.operation != OperationType.MUTATION
+            or info.path.prev is not None
+            or not isinstance(mutation_input, dict)
+            or not (client_mutation_id := mutation_input.get("client_mutation_id"))
+        ):
+            return next_(root, info, **kwargs)
+
+        execution = IdempotentExecution(
+            get_idempotency_key(info, client_mutation_id, mutation_input), get_input_hash(mutation_input)
+        )
+        return execution.run(lambda: next_(root, info, **kwargs), info.field_name, client_mutation_id)
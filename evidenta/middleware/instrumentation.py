@@ -0,0 +1,149 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest
+
+from graphql import GraphQLResolveInfo
+
+from evidenta.common.metrics import DEFAULT_COUNT_BUCKETS, registry
+
+
+REQUEST_ATTRIBUTE = "graphql_instrumentation"
+OTHER_OPERATIONS = "other"
+ANONYMOUS_OPERATION = "anonymous"
+OUTSIDE_RESOLVERS = "<root>"
+
+_current_field_path: ContextVar[str] = ContextVar("current_field_path", default=OUTSIDE_RESOLVERS)
+_known_operations: set[str] = set()
+
+OPERATION_DURATION = registry.histogram(
+    "graphql_operation_duration_seconds",
+    "Wall time of the sampled GraphQL operations.",
+    ("operation",),
+)
+RESOLVER_DURATION = registry.histogram(
+    "graphql_resolver_duration_seconds",
+    "Wall time spent in the resolvers of a schema field (excluding child fields) per sampled operation.",
+    ("operation", "path"),
+)
+RESOLVER_SQL_QUERIES = registry.histogram(
+    "graphql_resolver_sql_queries",
+    "Number of SQL queries executed by the resolvers of a schema field per sampled operation.",
+    ("operation", "path"),
+    buckets=DEFAULT_COUNT_BUCKETS,
+)
+RESOLVER_SQL_DURATION = registry.histogram(
+    "graphql_resolver_sql_duration_seconds",
+    "Duration of SQL queries executed by the resolvers of a schema field per sampled operation.",
+    ("operation", "path"),
+)
+
+
+def get_field_path(info: GraphQLResolveInfo) -> str:
+    # schema coordinate instead of the response path - aliases are chosen by clients, so the response path
+    # would make the label cardinality unbounded, and all items of a connection are aggregated under one field
+    return f"{info.parent_type.name}.{info.field_name}"
+
+
+def get_operation_label(operation_name: str | None) -> str:
+    """Bounds the label cardinality - operation names are chosen by clients."""
+    if not operation_name:
+        return ANONYMOUS_OPERATION
+    if operation_name in _known_operations:
+        return operation_name
+    if len(_known_operations) < settings.GRAPHQL_INSTRUMENTATION["MAX_OPERATIONS"]:
+        _known_operations.add(operation_name)
+        return operation_name
+    return OTHER_OPERATIONS
+
+
+class FieldStats:
+    __slots__ = ("duration", "sql_queries", "sql_duration")
+
+    def __init__(self):
+        self.duration = 0.0
+        self.sql_queries = 0
+        self.sql_duration = 0.0
+
+
+class GraphQLInstrumentation:
+    """
+    Collects resolver and SQL timings of one GraphQL request. Attached to the request object, so
+    the `InstrumentationMiddleware` knows that the request was sampled.
+    """
+
+    def __init__(self, operation_name: str | None):
+        self.operation = get_operation_label(operation_name)
+        self.fields: dict[str, FieldStats] = {}
+        self.started = time.perf_counter()
+
+    def _field(self, path: str) -> FieldStats:
+        if (stats := self.fields.get(path)) is None:
+            stats = self.fields[path] = FieldStats()
+        return stats
+
+    def record_resolver(self, path: str, duration: float) -> None:
+        self._field(path).duration += duration
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats = self._field(_current_field_path.get())
+            stats.sql_queries += 1
+            stats.sql_duration += time.perf_counter() - start
+
+    def finish(self) -> None:
+        OPERATION_DURATION.observe(time.perf_counter() - self.started, operation=self.operation)
+        for path, stats in self.fields.items():
+            RESOLVER_DURATION.observe(stats.duration, operation=self.operation, path=path)
+            RESOLVER_SQL_QUERIES.observe(stats.sql_queries, operation=self.operation, path=path)
+            RESOLVER_SQL_DURATION.observe(stats.sql_duration, operation=self.operation, path=path)
+
+
+def should_sample() -> bool:
+    config = settings.GRAPHQL_INSTRUMENTATION
+    return config["ENABLED"] and random.random() < config["SAMPLE_RATE"]  # noqa: S311
+
+
+@contextmanager
+def instrument_graphql_request(request: HttpRequest, operation_name: str | None) -> Iterator[None]:
+    if not should_sample():
+        yield
+        return
+
+    instrumentation = GraphQLInstrumentation(operation_name)
+    setattr(request, REQUEST_ATTRIBUTE, instrumentation)
+    try:
+        with connection.execute_wrapper(instrumentation):
+            yield
+    finally:
+        delattr(request, REQUEST_ATTRIBUTE)
+        instrumentation.finish()
+
+
+class InstrumentationMiddleware:
+    """
+    Graphene middleware measuring wall time of every resolver of the sampled requests and attributing
+    the executed SQL to the schema field (`Type.field`). Requests which were not sampled pass straight through.
+    """
+
+    def resolve(self, next_, root, info: GraphQLResolveInfo, **kwargs):
+        instrumentation: GraphQLInstrumentation | None = getattr(info.context, REQUEST_ATTRIBUTE, None)
+        if instrumentation is None:
+            return next_(root, info, **kwargs)
+
+        path = get_field_path(info)
+        token = _current_field_path.set(path)
+        start = time.perf_counter()
+        try:
+            return next_(root, info, **kwargs)
+        finally:
+            instrumentation.record_resolver(path, time.perf_counter() - start)
+            _current_field_path.reset(token)
@@ -1,34 +1,138 @@
-# middlewares.py
-import json
-from datetime import datetime, timedelta
+import math
+import time
+import uuid
+from contextlib import contextmanager
 
+from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
-
-
-class RateLimitMiddleware(MiddlewareMixin):
-    RATE_LIMIT = {
-        "default": (5, 60),  # Defaultní limit: 5 požadavků za 60 sekund
-        "sendInvitation": (3, 120),  # Limit pro sendInvitation: 3 požadavky za 120 sekund
-    }
-
-    def process_request(self, request):
-        if request.content_type == "application/json":
-            try:
-                body = json.loads(request.body)
-                operation_name = body.get("operationName")
-                if operation_name:
-                    identifier = self.get_identifier(request)
-                    rate_limit, time_period = self.get_rate_limit(operation_name)
-
-                    if identifier and rate_limit and time_period:
-                        if not self.is_rate_limited(identifier, rate_limit, time_period):
-                            return JsonResponse({"error": "Rate limit exceeded"}, status=429)
-            except json.JSONDecodeError:
-                pass
+
+from graphql_jwt.exceptions import JSONWebTokenError
+
+from evidenta.common.schemas.cost import COST_REQUEST_ATTRIBUTE
+from evidenta.common.schemas.response_cache import authenticate_request
+
+
+class DatabaseTimer:
+    """Database execute wrapper summing the time spent in SQL."""
+
+    def __init__(self):
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+
+
+class TokenBucket:
+    """
+    Budget of one identifier stored in the cache. Tokens are refilled continuously up to the capacity and
+    the bucket can go into debt - the actual price of an operation is known only after it was executed.
+    Charges are read-modify-write of the cached state, so they are serialized by a lock in the cache and
+    concurrent requests of one identifier never overwrite each other's charges.
+    """
+
+    LOCK_TIMEOUT = 1
+    POLL_INTERVAL = 0.005
+
+    def __init__(self, identifier: str, capacity: float, refill_rate: float):
+        self.cache_key = f"rl:{identifier}"
+        self.lock_key = f"rl:{identifier}:lock"
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.load()
+
+    def load(self) -> None:
+        self.tokens, self.updated = cache.get(self.cache_key, (self.capacity, time.time()))
+        self.refill()
+
+    def refill(self) -> None:
+        now = time.time()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(-self.tokens / self.refill_rate))
+
+    @contextmanager
+    def lock(self):
+        token = uuid.uuid4().hex
+        # the lock is held only for a cache read and write and a lock left by a killed worker expires after
+        # LOCK_TIMEOUT, so waiting for it is short - the bucket is never written without it
+        while not cache.add(self.lock_key, token, timeout=self.LOCK_TIMEOUT):
+            time.sleep(self.POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            if cache.get(self.lock_key) == token:
+                cache.delete(self.lock_key)
+
+    def charge(self, price: float) -> None:
+        with self.lock():
+            # other requests of the identifier may have been charged since the bucket was loaded
+            self.load()
+            self.tokens -= price
+            # an idle bucket is full again after this time, there is no need to keep it longer
+            timeout = math.ceil((self.capacity - self.tokens) / self.refill_rate) + 1
+            cache.set(self.cache_key, (self.tokens, self.updated), timeout=timeout)
+
+
+class RateLimitMiddleware:
+    """
+    Charges every request to the GraphQL endpoint of an identifier (user or IP address) by the static cost of
+    its operation plus the time it spent in the database. Requests are rejected while the identifier's budget
+    is in debt, so cheap queries keep flowing while expensive ones (large exports, scrapers) are throttled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.GRAPHQL_RATE_LIMIT
+        if not config["ENABLED"] or request.path_info not in config["PATHS"]:
+            return self.get_response(request)
+
+        identifier = self.get_identifier(request)
+        bucket = TokenBucket(identifier, config["CAPACITY"], config["REFILL_RATE"])
+        if bucket.tokens <= 0:
+            response = JsonResponse({"error": "Rate limit exceeded"}, status=429)
+            response["Retry-After"] = bucket.retry_after
+            return response
+
+        timer = DatabaseTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        bucket.charge(self.get_price(request, timer.duration))
+        response["X-RateLimit-Remaining"] = max(0, math.floor(bucket.tokens))
+        return response
+
+    @staticmethod
+    def get_price(request, db_duration: float) -> float:
+        """
+        Price of the executed operation. Root fields are taken from the parsed document by the cost analysis,
+        so the price can't be avoided by renaming the operation, aliased fields are charged repeatedly.
+        """
+        config = settings.GRAPHQL_RATE_LIMIT
+        query_cost = getattr(request, COST_REQUEST_ATTRIBUTE, None)
+        if query_cost is None:
+            # invalid document or a response served from the cache
+            return config["MIN_PRICE"] + db_duration * 1000 * config["DB_MS_PRICE"]
+        fields_price = sum(config["FIELD_PRICES"].get(field, 0) for field in query_cost.root_fields)
+        return max(config["MIN_PRICE"], fields_price, query_cost.cost) + db_duration * 1000 * config["DB_MS_PRICE"]
 
     def get_identifier(self, request):
+        try:
+            # JWT users are otherwise authenticated only in the resolvers
+            authenticate_request(request)
+        except JSONWebTokenError:
+            # the invalid token is reported by the execution
+            pass
         if request.user.is_authenticated:
             return f"user:{request.user.id}"
         else:
@@ -41,20 +145,3 @@ class RateLimitMiddleware(MiddlewareMixin):
         else:
             ip = request.META.get("REMOTE_ADDR")
         return ip
-
-    def get_rate_limit(self, operation_name):
-        return self.RATE_LIMIT.get(operation_name, self.RATE_LIMIT["default"])
-
-    def is_rate_limited(self, identifier, rate_limit, time_period):
-        cache_key = f"rl:{identifier}"
-        requests = cache.get(cache_key, [])
-
-        now = datetime.now()
-        requests = [req for req in requests if req > now - timedelta(seconds=time_period)]
-
-        if len(requests) >= rate_limit:
-            return False
-
-        requests.append(now)
-        cache.set(cache_key, requests, timeout=time_period)
-        return True
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import HttpRequest
+
+from evidenta.common.metrics import registry
+
+
+logger = logging.getLogger("evidenta.graphql.slow")
+
+DROPPED_RECORDS = registry.counter(
+    "graphql_slow_log_dropped_total",
+    "Slow operation records dropped because the slow log queue was full.",
+)
+
+
+def hash_variables(variables: dict[str, Any] | None) -> str | None:
+    if not variables:
+        return None
+    return hashlib.sha256(json.dumps(variables, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class StatementRecorder:
+    """
+    Database execute wrapper keeping SQL (without parameters) and duration of every statement. Parameters
+    are kept for the slowest statement only, because they are needed for its EXPLAIN.
+    """
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self.statements: list[dict[str, Any]] = []
+        self.truncated = 0
+        self.slowest: tuple[float, str, Any] | None = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if len(self.statements) < self.max_statements:
+                self.statements.append({"sql": sql, "duration_ms": round(duration * 1000, 3)})
+            else:
+                self.truncated += 1
+            if not many and (self.slowest is None or duration > self.slowest[0]):
+                self.slowest = (duration, sql, params)
+
+
+class SlowLogWriter:
+    """
+    Writes slow operation records from a bounded queue in a background thread, so neither the logging nor
+    the EXPLAIN adds latency to the (already slow) request. Records are dropped when the queue is full.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: dict[str, Any], slowest: tuple[float, str, Any] | None) -> bool:
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait((record, slowest))
+        except queue.Full:
+            DROPPED_RECORDS.inc()
+            return False
+        return True
+
+    def join(self) -> None:
+        self.queue.join()
+
+    def _ensure_worker(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="graphql-slow-log", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            record, slowest = self.queue.get()
+            try:
+                self.write(record, slowest)
+            except Exception:
+                logger.exception("Unable to write slow GraphQL operation record.")
+            finally:
+                self.queue.task_done()
+
+    def write(self, record: dict[str, Any], slowest: tuple[float, str, Any] | None) -> None:
+        if slowest and settings.GRAPHQL_SLOW_LOG["EXPLAIN"]:
+            record["explain"] = self.explain(slowest[1], slowest[2])
+        logger.warning(json.dumps(record, default=str))
+
+    @staticmethod
+    def explain(sql: str, params: Any) -> Any:
+        db = connections["default"]
+        if db.vendor != "postgresql" or not sql.lstrip().upper().startswith("SELECT"):
+            return None
+        try:
+            with db.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                return cursor.fetchone()[0]
+        finally:
+            # the worker thread owns its connection, don't keep it open between records
+            db.close()
+
+
+slow_log_writer = SlowLogWriter(settings.GRAPHQL_SLOW_LOG["QUEUE_SIZE"])
+
+
+@contextmanager
+def log_slow_operation(
+    request: HttpRequest, operation_name: str | None, variables: dict[str, Any] | None
+) -> Iterator[None]:
+    config = settings.GRAPHQL_SLOW_LOG
+    if not config["ENABLED"]:
+        yield
+        return
+
+    recorder = StatementRecorder(config["MAX_STATEMENTS"])
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(recorder):
+            yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= config["THRESHOLD_MS"]:
+            user = getattr(request, "user", None)
+            slow_log_writer.enqueue(
+                {
+                    "operation_name": operation_name,
+                    "variables_hash": hash_variables(variables),
+                    "user_id": getattr(user, "pk", None),
+                    "duration_ms": round(duration_ms, 3),
+                    "sql_count": len(recorder.statements) + recorder.truncated,
+                    "sql_duration_ms": round(sum(s["duration_ms"] for s in recorder.statements), 3),
+                    "statements": recorder.statements,
+                    "statements_truncated": recorder.truncated,
+                },
+                recorder.slowest,
+            )
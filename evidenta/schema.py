@@ -1,10 +1,18 @@
 import graphene
 
 from evidenta.core.auth.schema import AuthMutation
-from evidenta.core.user.schemas import MeQuery, RoleQuery, UserMutation, UserQuery
+from evidenta.core.user.schemas import (
+    DeletionTaskQuery,
+    FirmStatisticsQuery,
+    MeQuery,
+    RoleQuery,
+    SyncQuery,
+    UserMutation,
+    UserQuery,
+)
 
 
-class Query(UserQuery, MeQuery, RoleQuery, graphene.ObjectType):
+class Query(UserQuery, MeQuery, RoleQuery, FirmStatisticsQuery, SyncQuery, DeletionTaskQuery, graphene.ObjectType):
     pass
 
 